@@ -0,0 +1,421 @@
+"""
+Local JSON API for the planner, for other tools that want stations, searches, itineraries and route geometry without the GUI.
+
+Endpoints
+---------
+GET    /stations?q=text                       Stations whose code, name or city contain `q`.
+GET    /stations/{code}                       One station.
+GET    /search?origin=&destination=&date=     One-way search (date as mm/dd/yyyy or yyyy-mm-dd).
+GET    /routes                                Route names.
+GET    /routes/{name}                         Route path coordinates and stops.
+GET    /connections?origin=&destination=      Route sequences between two stations, offline (&transfers=2&limit=5).
+POST   /itineraries                           Creates an empty itinerary, returns its id.
+GET    /itineraries/{id}                      Saved segments of an itinerary and any problems with them.
+POST   /itineraries/{id}/segments             Saves {"origin", "destination", "date", "index"}, index into the search results.
+DELETE /itineraries/{id}/segments/{n}         Deletes segment n.
+POST   /itineraries/{id}/segments/{n}/move    Moves segment n, {"direction": "up" | "down"}.
+GET    /stats                                 Search cache and coalescing counters.
+
+Usage
+-----
+python3 -m api.server --port 8765 --backend replay --offline
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from searcher.backends import BACKENDS, ReplayBackend, SeleniumBackend
+from searcher.batch import normalizeQuery
+from traintracks.train import RailPass
+from views import config as cfg
+
+MAX_BODY = 1048576
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+class ApiError(Exception):
+  """Raised by handlers, turned into a JSON error response."""
+  def __init__(self, status: int, message: str) -> None:
+    super().__init__(message)
+    self.status = status
+
+class SearchCoalescer:
+  """
+  A class that runs searches on a backend with limited concurrency. Identical searches that are in flight at the same time share one backend call, and finished searches are cached.
+
+  Attributes
+  ----------
+  backend : SearchBackend
+  concurrency : int
+      Backend searches running at the same time.
+  cacheSize : int
+  cacheTtl : float
+      Seconds a result is served from the cache.
+  stats : dict
+      Requests, backend searches, cache hits, coalesced requests and failures.
+
+  Methods
+  -------
+  search(query)
+      Returns the Trains for a normalized query.
+  """
+  def __init__(self, backend, concurrency: int=2, cacheSize: int=256, cacheTtl: float=600.) -> None:
+    self.backend = backend
+    self.concurrency = concurrency
+    self.cacheSize = cacheSize
+    self.cacheTtl = cacheTtl
+    self.stats = {"Requests": 0, "Backend Searches": 0, "Cache Hits": 0, "Coalesced": 0, "Failures": 0, "In Flight": 0}
+    self.__executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="search")
+    self.__semaphore = None
+    self.__inFlight = {}
+    self.__cache = OrderedDict() # Query key : (time, trains)
+
+  def __fromCache(self, key: tuple):
+    _entry = self.__cache.get(key)
+    if _entry == None: return None
+    if time.monotonic() - _entry[0] > self.cacheTtl:
+      self.__cache.pop(key)
+      return None
+    self.__cache.move_to_end(key)
+    return _entry[1]
+
+  async def __run(self, query: dict) -> dict:
+    if self.__semaphore == None: self.__semaphore = asyncio.Semaphore(self.concurrency)
+    async with self.__semaphore:
+      self.stats["Backend Searches"] += 1
+      _loop = asyncio.get_running_loop()
+      return await _loop.run_in_executor(self.__executor, self.backend.search, query["origin"], query["destination"], query["date"])
+
+  async def search(self, query: dict) -> dict:
+    """
+    Parameters
+    ----------
+    query : dict
+        Normalized query, see `searcher.batch.normalizeQuery`.
+
+    Returns
+    -------
+    dict
+        Index : Train.
+
+    Raises
+    ------
+    ApiError
+        The search failed, with the searcher's message.
+    """
+    self.stats["Requests"] += 1
+    key = (query["origin"], query["destination"], query["date"])
+    _cached = self.__fromCache(key)
+    if _cached != None:
+      self.stats["Cache Hits"] += 1
+      return _cached
+
+    _future = self.__inFlight.get(key)
+    if _future != None:
+      self.stats["Coalesced"] += 1
+    else:
+      _future = asyncio.ensure_future(self.__run(query))
+      self.__inFlight[key] = _future
+      self.stats["In Flight"] = len(self.__inFlight)
+      _future.add_done_callback(lambda f: self.__finish(key, f))
+
+    try:
+      result = await asyncio.shield(_future)
+    except Exception as e:
+      raise ApiError(502, str(e) or type(e).__name__)
+    if type(result) != dict:
+      raise ApiError(502, str(result).strip() or type(result).__name__)
+    return result
+
+  def __finish(self, key: tuple, future: asyncio.Future) -> None:
+    self.__inFlight.pop(key, None)
+    self.stats["In Flight"] = len(self.__inFlight)
+    if future.cancelled(): return
+    if future.exception() != None or type(future.result()) != dict:
+      self.stats["Failures"] += 1
+      return
+    self.__cache[key] = (time.monotonic(), future.result())
+    while len(self.__cache) > self.cacheSize:
+      self.__cache.popitem(last=False)
+
+  def shutdown(self) -> None:
+    self.__executor.shutdown(wait=False, cancel_futures=True)
+    self.backend.close()
+
+class PlannerServer:
+  """
+  A class to serve the planner API over HTTP/1.1 with keep-alive, using only asyncio streams.
+
+  Attributes
+  ----------
+  host : str
+  port : int
+  searches : SearchCoalescer
+  stations : dict
+      Station code : station information.
+  routes : dict
+      Route name : Route.
+  network : RailNetwork
+      Route graph for /connections.
+  itineraries : dict
+      Itinerary id : RailPass.
+  """
+  def __init__(self, backend, host: str="127.0.0.1", port: int=8765, concurrency: int=2, offline: bool=False) -> None:
+    self.host = host
+    self.port = port
+    self.offline = offline
+    self.searches = SearchCoalescer(backend, concurrency)
+    self.stations = {}
+    self.routes = {}
+    self.network = None
+    self.itineraries = {}
+    self.__server = None
+
+    self.__routes = [
+      ("GET", r"/stations", self.__listStations),
+      ("GET", r"/stations/(?P<code>[^/]+)", self.__getStation),
+      ("GET", r"/search", self.__search),
+      ("GET", r"/routes", self.__listRoutes),
+      ("GET", r"/routes/(?P<name>[^/]+)", self.__getRoute),
+      ("GET", r"/connections", self.__getConnections),
+      ("POST", r"/itineraries", self.__createItinerary),
+      ("GET", r"/itineraries/(?P<itinerary>[^/]+)", self.__getItinerary),
+      ("POST", r"/itineraries/(?P<itinerary>[^/]+)/segments", self.__addSegment),
+      ("DELETE", r"/itineraries/(?P<itinerary>[^/]+)/segments/(?P<segment>\d+)", self.__deleteSegment),
+      ("POST", r"/itineraries/(?P<itinerary>[^/]+)/segments/(?P<segment>\d+)/move", self.__moveSegment),
+      ("GET", r"/stats", self.__getStats)]
+
+  def __loadData(self) -> None:
+    """Loads stations, routes and the route network, runs in a worker thread at startup."""
+    from traintracks.maputils import _loadAllRoutes
+    from traintracks.network import RailNetwork
+    self.routes = _loadAllRoutes() or {}
+    self.stations = self.__loadStations()
+    self.network = RailNetwork(self.routes, self.stations)
+
+  def __loadStations(self) -> dict:
+    if not self.offline:
+      try:
+        from traintracks.stations import Stations
+        return {s["Code"]: s for s in Stations().stations.values()}
+      except Exception as e:
+        print("Could not load stations, using the saved list.", e)
+    with open("_retrieved/Stations.json", "r") as f:
+      return {code: {"Code": code, **data} for code, data in json.load(f).items()}
+
+  async def start(self) -> None:
+    await asyncio.get_running_loop().run_in_executor(None, self.__loadData)
+    self.__server = await asyncio.start_server(self.__handleConnection, self.host, self.port)
+    self.port = self.__server.sockets[0].getsockname()[1]
+
+  async def serveForever(self) -> None:
+    if self.__server == None: await self.start()
+    print(f"{cfg.APP_NAME} API on http://{self.host}:{self.port}")
+    async with self.__server:
+      await self.__server.serve_forever()
+
+  def close(self) -> None:
+    if self.__server != None: self.__server.close()
+    self.searches.shutdown()
+
+  # HTTP
+
+  async def __readRequest(self, reader: asyncio.StreamReader):
+    """Returns (method, target, headers, body), or None once the client closed the connection."""
+    _requestLine = await reader.readline()
+    if not _requestLine: return None
+    try:
+      method, target, _ = _requestLine.decode('latin-1').split()
+    except ValueError:
+      raise ApiError(400, "Malformed request line.")
+
+    headers = {}
+    while True:
+      _line = await reader.readline()
+      if _line in (b'\r\n', b'\n', b''): break
+      name, _, value = _line.decode('latin-1').partition(':')
+      headers[name.strip().lower()] = value.strip()
+
+    try:
+      _length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+      raise ApiError(400, "Malformed Content-Length.")
+    if _length > MAX_BODY: raise ApiError(413, "Request body too large.")
+    body = await reader.readexactly(_length) if _length > 0 else b''
+    return method.upper(), target, headers, body
+
+  async def __handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+      while True:
+        keepAlive = True
+        try:
+          request = await self.__readRequest(reader)
+          if request == None: break
+          method, target, headers, body = request
+          keepAlive = headers.get('connection', '').lower() != 'close'
+          status, payload = await self.__dispatch(method, target, body)
+        except ApiError as e:
+          status, payload, keepAlive = e.status, {"error": str(e)}, False
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+          break
+        except ValueError: # Line longer than the stream limit
+          status, payload, keepAlive = 400, {"error": "Request line or header too long."}, False
+
+        _body = json.dumps(payload).encode('utf-8')
+        _head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json\r\nContent-Length: {len(_body)}\r\nConnection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n"
+        writer.write(_head.encode('latin-1') + _body)
+        await writer.drain()
+        if not keepAlive: break
+    except (ConnectionError, asyncio.CancelledError): # Client went away, or the server is shutting down
+      pass
+    finally:
+      writer.close()
+
+  async def __dispatch(self, method: str, target: str, body: bytes):
+    _url = urlsplit(target)
+    _path = _url.path.rstrip('/') or '/'
+    _params = {k: v[0] for k, v in parse_qs(_url.query).items()}
+    _allowed = False
+    for routeMethod, pattern, handler in self.__routes:
+      _match = re.fullmatch(pattern, _path)
+      if _match:
+        _allowed = True
+        if routeMethod == method:
+          try:
+            _json = json.loads(body) if body else {}
+          except ValueError:
+            raise ApiError(400, "Body is not JSON.")
+          if not isinstance(_json, dict):
+            raise ApiError(400, "Body must be a JSON object.")
+          try:
+            return await handler(params=_params, body=_json, **{k: unquote(v) for k, v in _match.groupdict().items()})
+          except ApiError as e:
+            return e.status, {"error": str(e)}
+          except Exception as e:
+            print(e)
+            return 500, {"error": str(e)}
+    if _allowed: return 405, {"error": f"{method} is not allowed on {_path}."}
+    return 404, {"error": f"Nothing at {_path}."}
+
+  # Handlers, return (status, payload)
+
+  def __query(self, source: dict) -> dict:
+    try:
+      return normalizeQuery(source)
+    except ValueError as e:
+      raise ApiError(400, str(e))
+
+  def __itinerary(self, itinerary: str) -> RailPass:
+    try:
+      return self.itineraries[itinerary]
+    except KeyError:
+      raise ApiError(404, f"No itinerary {itinerary}.")
+
+  async def __listStations(self, params: dict, body: dict):
+    _text = params.get("q", "").lower()
+    return 200, [s for s in self.stations.values() if _text in s["Code"].lower() or _text in s["Name"].lower() or _text in s["City"].lower()]
+
+  async def __getStation(self, params: dict, body: dict, code: str):
+    try:
+      return 200, self.stations[code.upper()]
+    except KeyError:
+      raise ApiError(404, f"No station {code}.")
+
+  async def __search(self, params: dict, body: dict):
+    trains = await self.searches.search(self.__query(params))
+    return 200, [t.organizationalUnit for t in trains.values()]
+
+  async def __listRoutes(self, params: dict, body: dict):
+    return 200, sorted(self.routes)
+
+  async def __getRoute(self, params: dict, body: dict, name: str):
+    try:
+      _route = self.routes[name]
+    except KeyError:
+      raise ApiError(404, f"No route {name}.")
+    return 200, {"name": _route.name, "paths": _route.tupCoords, "stops": _route.stops}
+
+  async def __getConnections(self, params: dict, body: dict):
+    try:
+      origin, destination = params["origin"], params["destination"]
+      transfers, limit = int(params.get("transfers", 2)), int(params.get("limit", 5))
+    except KeyError as e:
+      raise ApiError(400, f"Missing {e}.")
+    except ValueError:
+      raise ApiError(400, "transfers and limit must be whole numbers.")
+    if not 0 <= transfers <= 4: raise ApiError(400, "transfers must be between 0 and 4.")
+    return 200, self.network.connections(origin, destination, transfers, limit)
+
+  async def __createItinerary(self, params: dict, body: dict):
+    _id = uuid.uuid4().hex[:12]
+    self.itineraries[_id] = RailPass()
+    return 201, {"id": _id}
+
+  async def __getItinerary(self, params: dict, body: dict, itinerary: str):
+    _railPass = self.__itinerary(itinerary)
+    return 200, {"id": itinerary, "segments": {n: t.organizationalUnit for n, t in _railPass.getSegments().items()}, "issues": list(_railPass.getValidator().issues.values())}
+
+  async def __addSegment(self, params: dict, body: dict, itinerary: str):
+    _railPass = self.__itinerary(itinerary)
+    query = self.__query(body)
+    try:
+      _index = int(body.get("index", 0))
+    except (TypeError, ValueError):
+      raise ApiError(400, f"index must be a whole number, not {json.dumps(body.get('index'))}.")
+    trains = await self.searches.search(query)
+    try:
+      _train = trains[_index]
+    except KeyError:
+      raise ApiError(400, f"Search has no result {_index}.")
+    _railPass.addSearch(query["origin"], query["destination"], query["date"], trains)
+    _railPass.createSegment(_train, _railPass.numSearches)
+    return await self.__getItinerary(params, body, itinerary)
+
+  async def __deleteSegment(self, params: dict, body: dict, itinerary: str, segment: str):
+    _railPass = self.__itinerary(itinerary)
+    if int(segment) not in _railPass.segments:
+      raise ApiError(404, f"No segment {segment}.")
+    _railPass.deleteSegment(int(segment))
+    return await self.__getItinerary(params, body, itinerary)
+
+  async def __moveSegment(self, params: dict, body: dict, itinerary: str, segment: str):
+    _railPass = self.__itinerary(itinerary)
+    _keys = list(_railPass.segments)
+    _direction = body.get("direction")
+    if int(segment) not in _railPass.segments:
+      raise ApiError(404, f"No segment {segment}.")
+    if _direction not in ["up", "down"]:
+      raise ApiError(400, "Direction must be 'up' or 'down'.")
+    if (_direction == "up" and _keys.index(int(segment)) == 0) or (_direction == "down" and _keys.index(int(segment)) == len(_keys)-1):
+      raise ApiError(400, f"Segment {segment} cannot move {_direction}.")
+    _railPass.swapSegment(int(segment), _direction)
+    return await self.__getItinerary(params, body, itinerary)
+
+  async def __getStats(self, params: dict, body: dict):
+    return 200, self.searches.stats
+
+def main(argv: list=None) -> None:
+  parser = argparse.ArgumentParser(prog="api.server", description=f"{cfg.APP_NAME} - local JSON API.")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=8765)
+  parser.add_argument("-b", "--backend", choices=list(BACKENDS), default="selenium")
+  parser.add_argument("-c", "--concurrency", type=int, default=cfg.DRIVER_POOL_SIZE, help="Backend searches at the same time")
+  parser.add_argument("--offline", action="store_true", help="Use the saved station list instead of Wikipedia")
+  args = parser.parse_args(argv)
+
+  backend = ReplayBackend() if args.backend == "replay" else SeleniumBackend(size=args.concurrency)
+  server = PlannerServer(backend, args.host, args.port, args.concurrency, args.offline)
+  try:
+    asyncio.run(server.serveForever())
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.close()
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,45 @@
+"""
+Module level lazy imports for heavy dependencies, so starting the app does not pay for what the first search or map needs.
+
+`requests = lazy("requests")` binds a stand-in that imports the real module the first time an attribute is read or set. The import happens once, under a lock, and is safe from any thread, unlike `importlib.util.LazyLoader` on Python 3.11. `from x import y` still imports right away: use `lazy("x").y` where it is needed instead.
+
+`tools/bench_importtime.py` checks that none of these are imported eagerly.
+"""
+import importlib
+import threading
+
+class LazyModule:
+  """
+  A stand-in for a module that is imported on first use.
+
+  Attributes
+  ----------
+  name : str
+      Full module name.
+  """
+  def __init__(self, name: str) -> None:
+    object.__setattr__(self, "name", name)
+    object.__setattr__(self, "_LazyModule__module", None)
+    object.__setattr__(self, "_LazyModule__lock", threading.Lock())
+
+  def load(self):
+    """Imports the module if it is not yet, returns it."""
+    if self.__module == None:
+      with self.__lock:
+        if self.__module == None: object.__setattr__(self, "_LazyModule__module", importlib.import_module(self.name))
+    return self.__module
+
+  def isLoaded(self) -> bool:
+    return self.__module != None
+
+  def __getattr__(self, attr: str):
+    return getattr(self.load(), attr)
+
+  def __setattr__(self, attr: str, value) -> None:
+    setattr(self.load(), attr, value)
+
+  def __repr__(self) -> str:
+    return f"<lazy module '{self.name}'{' (loaded)' if self.isLoaded() else ''}>"
+
+def lazy(name: str) -> LazyModule:
+  return LazyModule(name)
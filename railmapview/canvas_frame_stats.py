@@ -0,0 +1,57 @@
+import tkinter
+from collections import deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .map_widget import TkinterMapView
+
+
+class CanvasFrameStats:
+    """ frame time overlay in the upper right corner of the map, used to measure redraw performance """
+
+    def __init__(self, map_widget: "TkinterMapView", sample_size: int = 120):
+        self.map_widget = map_widget
+        self.frame_durations = deque(maxlen=sample_size)  # render time of the last frames in seconds
+        self.frame_starts = deque(maxlen=sample_size)
+        self.canvas_text = None
+
+    def add_frame(self, frame_start: float, frame_end: float):
+        self.frame_durations.append(frame_end - frame_start)
+        self.frame_starts.append(frame_start)
+        self.draw()
+
+    def get_stats(self) -> dict:
+        """ returns average and maximum frame time in ms, frames rendered in the last second and canvas item count """
+
+        if len(self.frame_durations) == 0:
+            average, maximum = 0, 0
+        else:
+            average = sum(self.frame_durations) / len(self.frame_durations) * 1000
+            maximum = max(self.frame_durations) * 1000
+
+        last_second = [start for start in self.frame_starts if self.frame_starts[-1] - start < 1]
+        return {"average_ms": average,
+                "max_ms": maximum,
+                "fps": len(last_second),
+                "canvas_items": len(self.map_widget.canvas.find_all())}
+
+    def delete(self):
+        self.map_widget.canvas.delete(self.canvas_text)
+        self.canvas_text = None
+
+    def draw(self):
+        stats = self.get_stats()
+        text = f"frame {stats['average_ms']:.1f} ms avg / {stats['max_ms']:.1f} ms max\n" \
+               f"{stats['fps']} fps, {stats['canvas_items']} canvas items"
+
+        if self.canvas_text is None:
+            self.canvas_text = self.map_widget.canvas.create_text(self.map_widget.width - 10, 10,
+                                                                  anchor=tkinter.NE,
+                                                                  justify=tkinter.RIGHT,
+                                                                  text=text,
+                                                                  fill="black",
+                                                                  font="TkFixedFont",
+                                                                  tag="frame_stats")
+        else:
+            self.map_widget.canvas.coords(self.canvas_text, self.map_widget.width - 10, 10)
+            self.map_widget.canvas.itemconfig(self.canvas_text, text=text)
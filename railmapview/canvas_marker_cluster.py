@@ -0,0 +1,117 @@
+import math
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+
+if TYPE_CHECKING:
+    from .map_widget import TkinterMapView
+
+from .canvas_position_marker import CanvasPositionMarker
+from .utility_functions import decimal_to_osm
+
+
+class CanvasMarkerCluster:
+    """ group of markers that is merged into count markers on a pixel grid, the grouping is precomputed for every zoom level """
+
+    def __init__(self,
+                 map_widget: "TkinterMapView",
+                 position_list: List[tuple],
+                 text_list: List[str] = None,
+                 grid_size: int = 60,
+                 cluster_color_circle: str = "#3E69CB",
+                 cluster_color_outside: str = "#2A4A8F",
+                 cluster_text_color: str = "#2A4A8F",
+                 **kwargs):
+
+        self.map_widget = map_widget
+        self.position_list = position_list
+        self.text_list = text_list if text_list is not None else [None] * len(position_list)
+        self.grid_size = grid_size  # in pixel, markers inside the same grid cell are merged
+        self.cluster_color_circle = cluster_color_circle
+        self.cluster_color_outside = cluster_color_outside
+        self.cluster_text_color = cluster_text_color
+        self.marker_kwargs = kwargs  # passed to the CanvasPositionMarker of single, unclustered positions
+
+        self.deleted = False
+        self.drawn_zoom: Union[int, None] = None
+        self.markers: List[CanvasPositionMarker] = []
+
+        # zoom -> list of (center position, member indices)
+        self.clusters_per_zoom: Dict[int, List[Tuple[tuple, List[int]]]] = {}
+        for zoom in range(self.map_widget.min_zoom, self.map_widget.max_zoom + 1):
+            self.clusters_per_zoom[zoom] = self.calculate_clusters(zoom)
+
+    def get_clusters(self, zoom: int) -> List[Tuple[tuple, List[int]]]:
+        if zoom not in self.clusters_per_zoom:  # max_zoom can change with the tile server
+            self.clusters_per_zoom[zoom] = self.calculate_clusters(zoom)
+        return self.clusters_per_zoom[zoom]
+
+    def calculate_clusters(self, zoom: int) -> List[Tuple[tuple, List[int]]]:
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        cell_size = self.grid_size / self.map_widget.tile_size  # in OSM tile coords
+
+        for index, position in enumerate(self.position_list):
+            tile_x, tile_y = decimal_to_osm(*position, zoom)
+            cells.setdefault((math.floor(tile_x / cell_size), math.floor(tile_y / cell_size)), []).append(index)
+
+        clusters = []
+        for members in cells.values():
+            center = (sum(self.position_list[i][0] for i in members) / len(members),
+                      sum(self.position_list[i][1] for i in members) / len(members))
+            clusters.append((center, members))
+        return clusters
+
+    def delete(self):
+        if self in self.map_widget.canvas_marker_cluster_list:
+            self.map_widget.canvas_marker_cluster_list.remove(self)
+
+        self.delete_markers()
+        self.deleted = True
+
+    def delete_markers(self):
+        for marker in self.markers:
+            self.map_widget.canvas.delete(marker.polygon, marker.big_circle, marker.canvas_text, marker.canvas_image)
+            marker.polygon, marker.big_circle, marker.canvas_text, marker.canvas_image = None, None, None, None
+            marker.deleted = True
+        self.markers = []
+        self.drawn_zoom = None
+
+    def expand(self, marker: CanvasPositionMarker):
+        """ zooms in on a cluster marker until its members get separated """
+
+        zoom = round(self.map_widget.zoom)
+        members = marker.data
+        while zoom < self.map_widget.max_zoom and any(len(m) == len(members) and set(m) == set(members)
+                                                      for _, m in self.get_clusters(zoom)):
+            zoom += 1
+
+        self.map_widget.set_zoom(zoom)
+        self.map_widget.set_position(*marker.position)
+
+    def create_markers(self, zoom: int):
+        for center, members in self.get_clusters(zoom):
+            if len(members) == 1:
+                marker = CanvasPositionMarker(self.map_widget, self.position_list[members[0]],
+                                              text=self.text_list[members[0]], **self.marker_kwargs)
+            else:
+                marker = CanvasPositionMarker(self.map_widget, center,
+                                              text=str(len(members)),
+                                              text_color=self.cluster_text_color,
+                                              marker_color_circle=self.cluster_color_circle,
+                                              marker_color_outside=self.cluster_color_outside,
+                                              data=members,
+                                              command=self.expand)
+            self.markers.append(marker)
+        self.drawn_zoom = zoom
+
+    def draw(self, move=False):
+        if self.deleted:
+            return
+
+        zoom = min(max(round(self.map_widget.zoom), self.map_widget.min_zoom), self.map_widget.max_zoom)
+        if zoom != self.drawn_zoom:
+            self.delete_markers()
+            self.create_markers(zoom)
+            move = False
+
+        # only clusters inside the visible area have canvas items, so the item count is bounded by the grid
+        for marker in self.markers:
+            marker.draw(move=move)
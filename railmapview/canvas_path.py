@@ -100,7 +100,7 @@ class CanvasPath:
                 self.canvas_line = self.map_widget.canvas.create_line(self.canvas_line_positions,
                                                                       width=5, fill=self.path_color,
                                                                       capstyle=tkinter.ROUND, joinstyle=tkinter.ROUND,
-                                                                      tag="path")
+                                                                      tag=("path", "map_layer"))
 
                 if self.command is not None:
                     self.map_widget.canvas.tag_bind(self.canvas_line, "<Enter>", self.mouse_enter)
@@ -110,7 +110,7 @@ class CanvasPolygon:
                                                                             outline=self.outline_color,
                                                                             joinstyle=tkinter.ROUND,
                                                                             stipple="gray25",
-                                                                            tag="polygon")
+                                                                            tag=("polygon", "map_layer"))
                 if self.fill_color is None:
                     self.map_widget.canvas.itemconfig(self.canvas_polygon, fill="")
                 else:
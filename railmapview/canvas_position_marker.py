@@ -97,17 +97,20 @@ class CanvasPositionMarker:
 
         return canvas_pos_x, canvas_pos_y
 
-    def draw(self, event=None):
+    def draw(self, event=None, move=False):
         canvas_pos_x, canvas_pos_y = self.get_canvas_pos(self.position)
 
         if not self.deleted:
             if 0 - 50 < canvas_pos_x < self.map_widget.width + 50 and 0 < canvas_pos_y < self.map_widget.height + 70:
+                if move is True and self.polygon is not None:
+                    return  # marker is already in view and was moved together with the map layer
+
                 if self.polygon is None:
                     self.polygon = self.map_widget.canvas.create_polygon(canvas_pos_x - 0, canvas_pos_y - 0, #14,23
                                                                          canvas_pos_x, canvas_pos_y,
                                                                          canvas_pos_x + 0, canvas_pos_y - 0,
                                                                          fill=self.marker_color_outside, width=2,
-                                                                         outline=self.marker_color_outside, tag="marker")
+                                                                         outline=self.marker_color_outside, tag=("marker", "map_layer"))
                     if self.command is not None:
                         self.map_widget.canvas.tag_bind(self.polygon, "<Enter>", self.mouse_enter)
                         self.map_widget.canvas.tag_bind(self.polygon, "<Leave>", self.mouse_leave)
@@ -121,7 +124,7 @@ class CanvasPositionMarker:
                     self.big_circle = self.map_widget.canvas.create_oval(canvas_pos_x - 3, canvas_pos_y - 3, #-14,-45
                                                                          canvas_pos_x + 3, canvas_pos_y + 3, #+14,-17
                                                                          fill=self.marker_color_circle, width=6,
-                                                                         outline=self.marker_color_outside, tag="marker")
+                                                                         outline=self.marker_color_outside, tag=("marker", "map_layer"))
                     if self.command is not None:
                         self.map_widget.canvas.tag_bind(self.big_circle, "<Enter>", self.mouse_enter)
                         self.map_widget.canvas.tag_bind(self.big_circle, "<Leave>", self.mouse_leave)
@@ -138,7 +141,7 @@ class CanvasPositionMarker:
                                                                               text=self.text,
                                                                               fill=self.text_color,
                                                                               font=self.font,
-                                                                              tag=("marker", "marker_text"))
+                                                                              tag=("marker", "marker_text", "map_layer"))
                         if self.command is not None:
                             self.map_widget.canvas.tag_bind(self.canvas_text, "<Enter>", self.mouse_enter)
                             self.map_widget.canvas.tag_bind(self.canvas_text, "<Leave>", self.mouse_leave)
@@ -157,7 +160,7 @@ class CanvasPositionMarker:
                         self.canvas_image = self.map_widget.canvas.create_image(canvas_pos_x, canvas_pos_y - 85,
                                                                                 anchor=tkinter.S,
                                                                                 image=self.image,
-                                                                                tag=("marker", "marker_image"))
+                                                                                tag=("marker", "marker_image", "map_layer"))
                     else:
                         self.map_widget.canvas.coords(self.canvas_image, canvas_pos_x, canvas_pos_y - 85)
                 else:
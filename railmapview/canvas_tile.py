@@ -57,7 +57,7 @@ class CanvasTile:
                                                                          canvas_pos_y,
                                                                          image=self.image,
                                                                          anchor=tkinter.NW,
-                                                                         tags="tile")
+                                                                         tags=("tile", "map_layer"))
         else:
             self.map_widget.canvas.coords(self.canvas_object, canvas_pos_x, canvas_pos_y)
 
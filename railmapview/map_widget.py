@@ -12,7 +12,8 @@ import sqlite3
 import pyperclip
 import geocoder
 from PIL import Image, ImageTk
-from typing import Callable, List, Dict, Union, Tuple
+from collections import deque
+from typing import Callable, List, Dict, Union, Tuple, Deque
 from functools import partial
 
 from .canvas_position_marker import CanvasPositionMarker
@@ -21,6 +22,12 @@ from .utility_functions import decimal_to_osm, osm_to_decimal
 from .canvas_button import CanvasButton
 from .canvas_path import CanvasPath
 from .canvas_polygon import CanvasPolygon
+from .canvas_marker_cluster import CanvasMarkerCluster
+from .tile_cache import TileCache
+from .canvas_frame_stats import CanvasFrameStats
+
+TILE_IMAGE_CACHE_SIZE = 10_000  # PhotoImages kept for tiles shown before, 10_000 images = 80 MB RAM-usage
+PRE_CACHE_QUEUE_SIZE = 64  # decoded tiles waiting for the main thread, 64 RGBA tiles of 256x256 pixel = 16 MB RAM-usage on top of the TileCaches
 
 
 class TkinterMapView(tkinter.Frame):
@@ -104,13 +111,32 @@ class TkinterMapView(tkinter.Frame):
         self.tile_size: int = 256  # in pixel
         self.last_zoom: float = self.zoom
 
+        # redraw scheduling, events only mark the map dirty and at most one frame per frame_interval is rendered
+        self.frame_interval: float = 1 / 60  # in seconds
+        self.frame_scheduled: bool = False
+        self.last_frame_time: float = 0
+        self.redraw_zoom: bool = False
+        self.redraw_move: bool = False
+        self.z_order_dirty: bool = False
+        self.frame_stats: Union[CanvasFrameStats, None] = None
+
+        # panning moves all canvas items tagged "map_layer" at once, positions are only recalculated
+        # after zooming or when the summed up movement crosses pan_reprojection_threshold (in pixel)
+        self.last_drawn_upper_left_tile_pos: Union[Tuple[float, float], None] = None
+        self.pan_drift: float = 0
+        self.pan_reprojection_threshold: float = 10_000
+
         # canvas objects, image cache and standard empty images
         self.canvas_tile_array: List[List[CanvasTile]] = []
         self.canvas_marker_list: List[CanvasPositionMarker] = []
         self.canvas_path_list: List[CanvasPath] = []
         self.canvas_polygon_list: List[CanvasPolygon] = []
+        self.canvas_marker_cluster_list: List[CanvasMarkerCluster] = []
 
-        self.tile_image_cache: Dict[str, PIL.ImageTk.PhotoImage] = {}
+        self.tile_image_cache: Dict[str, PIL.ImageTk.PhotoImage] = {}  # images as displayed, base tile or composite
+        self.base_tile_cache = TileCache()  # decoded tiles, keyed by (server, zoom, x, y)
+        self.overlay_tile_cache = TileCache()
+        self.composite_tile_cache = TileCache()  # keyed by (server, overlay server, zoom, x, y)
         self.empty_tile_image = ImageTk.PhotoImage(Image.new("RGB", (self.tile_size, self.tile_size), (190, 190, 190)))  # used for zooming and moving
         self.not_loaded_tile_image = ImageTk.PhotoImage(Image.new("RGB", (self.tile_size, self.tile_size), (250, 250, 250)))  # only used when image not found on tile server
 
@@ -119,6 +145,7 @@ class TkinterMapView(tkinter.Frame):
         self.database_path = database_path
         self.use_database_only = use_database_only
         self.overlay_tile_server: Union[str, None] = None
+        self.tile_server_generation: int = 0  # raised on server changes, results of older generations are dropped
         self.max_zoom = max_zoom  # should be set according to tile server max zoom
         self.min_zoom: int = math.ceil(math.log2(math.ceil(self.width / self.tile_size)))  # min zoom at which map completely fills widget
 
@@ -127,9 +154,12 @@ class TkinterMapView(tkinter.Frame):
         self.pre_cache_thread = threading.Thread(daemon=True, target=self.pre_cache)
         self.pre_cache_thread.start()
 
-        # image loading in background threads
+        # image loading in background threads, the threads only download and decode tiles into raw buffers,
+        # PhotoImage objects are created on the main thread in update_canvas_tile_images
         self.image_load_queue_tasks: List[tuple] = []  # task: ((zoom, x, y), canvas_tile_object)
-        self.image_load_queue_results: List[tuple] = []  # result: ((zoom, x, y), canvas_tile_object, photo_image)
+        self.image_load_queue_results: Deque[tuple] = deque()  # result: ((zoom, x, y), canvas_tile_object, tile_buffer, generation)
+        self.pre_cache_queue_results: Deque[tuple] = deque()  # result: ((zoom, x, y), None, tile_buffer, generation)
+        self.tile_update_budget: float = 0.008  # seconds per frame spent creating PhotoImages, keeps panning at 60 fps
         self.after(10, self.update_canvas_tile_images)
         self.image_load_thread_pool: List[threading.Thread] = []
 
@@ -180,7 +210,7 @@ class TkinterMapView(tkinter.Frame):
             self.min_zoom = math.ceil(math.log2(math.ceil(self.width / self.tile_size)))
 
             self.set_zoom(self.zoom)  # call zoom to set the position vertices right
-            self.draw_move()  # call move to draw new tiles or delete tiles
+            self.schedule_redraw()  # call move to draw new tiles or delete tiles
             self.draw_rounded_corners()
 
     def add_right_click_menu_command(self, label: str, command: Callable, pass_coords: bool = False) -> None:
@@ -228,8 +258,13 @@ class TkinterMapView(tkinter.Frame):
 
         m.tk_popup(event.x_root, event.y_root)  # display menu
 
-    def set_overlay_tile_server(self, overlay_server: str):
-        self.overlay_tile_server = overlay_server
+    def set_overlay_tile_server(self, overlay_server: Union[str, None]):
+        """ sets or removes (None) the overlay server, already downloaded base and overlay tiles are reused """
+
+        if overlay_server != self.overlay_tile_server:
+            self.overlay_tile_server = overlay_server
+            self.reset_tile_images()
+            self.draw_initial_array()
 
     def set_tile_server(self, tile_server: str, tile_size: int = 256, max_zoom: int = 19):
         self.image_load_queue_tasks = []
@@ -237,11 +272,18 @@ class TkinterMapView(tkinter.Frame):
         self.tile_size = tile_size
         self.min_zoom = math.ceil(math.log2(math.ceil(self.width / self.tile_size)))
         self.tile_server = tile_server
-        self.tile_image_cache: Dict[str, PIL.ImageTk.PhotoImage] = {}
+        self.reset_tile_images()
         self.canvas.delete("tile")
-        self.image_load_queue_results = []
         self.draw_initial_array()
 
+    def reset_tile_images(self):
+        """ drops all displayed tile images, the decoded tile caches are keyed by server and stay valid """
+
+        self.tile_server_generation += 1
+        self.tile_image_cache: Dict[str, PIL.ImageTk.PhotoImage] = {}
+        self.image_load_queue_results = deque()
+        self.pre_cache_queue_results = deque()
+
     def get_position(self) -> tuple:
         """ returns current middle position of map widget in decimal coordinates """
 
@@ -325,17 +367,82 @@ class TkinterMapView(tkinter.Frame):
         self.canvas_polygon_list.append(polygon)
         return polygon
 
+    def set_marker_cluster(self, position_list: list, text_list: list = None, **kwargs) -> CanvasMarkerCluster:
+        marker_cluster = CanvasMarkerCluster(self, position_list, text_list=text_list, **kwargs)
+        marker_cluster.draw()
+        self.canvas_marker_cluster_list.append(marker_cluster)
+        return marker_cluster
+
     def delete(self, map_object: any):
-        if isinstance(map_object, (CanvasPath, CanvasPositionMarker, CanvasPolygon)):
+        if isinstance(map_object, (CanvasPath, CanvasPositionMarker, CanvasPolygon, CanvasMarkerCluster)):
             map_object.delete()
 
     def manage_z_order(self):
+        """ marks the z order dirty, it gets applied once at the end of the next frame for all canvas objects """
+
+        self.z_order_dirty = True
+        self.request_frame()
+
+    def apply_z_order(self):
+        self.z_order_dirty = False
         self.canvas.lift("polygon")
         self.canvas.lift("path")
         self.canvas.lift("marker")
         self.canvas.lift("marker_image")
         self.canvas.lift("corner")
         self.canvas.lift("button")
+        self.canvas.lift("frame_stats")
+
+    def schedule_redraw(self, zoom: bool = False):
+        """ marks the map dirty, all moves and zooms since the last frame are rendered together in the next frame """
+
+        if zoom:
+            self.redraw_zoom = True
+        else:
+            self.redraw_move = True
+        self.request_frame()
+
+    def request_frame(self):
+        if not self.frame_scheduled:
+            self.frame_scheduled = True
+
+            delay = self.last_frame_time + self.frame_interval - time.perf_counter()
+            if delay <= 0:
+                self.after_idle(self.render_frame)
+            else:
+                self.after(math.ceil(delay * 1000), self.after_idle, self.render_frame)
+
+    def render_frame(self):
+        self.frame_scheduled = False
+        frame_start = time.perf_counter()
+        self.last_frame_time = frame_start
+
+        if self.redraw_zoom:
+            self.redraw_zoom, self.redraw_move = False, False
+            self.draw_zoom()  # draw_zoom also moves
+        elif self.redraw_move:
+            self.redraw_move = False
+            self.draw_move()
+
+        if self.z_order_dirty:
+            self.apply_z_order()
+
+        if self.frame_stats is not None:
+            self.frame_stats.add_frame(frame_start, time.perf_counter())
+
+    def show_frame_stats(self, show: bool = True):
+        """ shows or hides the frame time overlay """
+
+        if show and self.frame_stats is None:
+            self.frame_stats = CanvasFrameStats(self)
+            self.frame_stats.draw()
+            self.manage_z_order()
+        elif not show and self.frame_stats is not None:
+            self.frame_stats.delete()
+            self.frame_stats = None
+
+    def toggle_frame_stats(self):
+        self.show_frame_stats(self.frame_stats is None)
 
     def pre_cache(self):
         """ single threaded pre-chache tile images in area of self.pre_cache_position """
@@ -360,17 +467,13 @@ class TkinterMapView(tkinter.Frame):
 
                 # pre cache top and bottom row
                 for x in range(self.pre_cache_position[0] - radius, self.pre_cache_position[0] + radius + 1):
-                    if f"{zoom}{x}{self.pre_cache_position[1] + radius}" not in self.tile_image_cache:
-                        self.request_image(zoom, x, self.pre_cache_position[1] + radius, db_cursor=db_cursor)
-                    if f"{zoom}{x}{self.pre_cache_position[1] - radius}" not in self.tile_image_cache:
-                        self.request_image(zoom, x, self.pre_cache_position[1] - radius, db_cursor=db_cursor)
+                    self.pre_cache_tile(zoom, x, self.pre_cache_position[1] + radius, db_cursor)
+                    self.pre_cache_tile(zoom, x, self.pre_cache_position[1] - radius, db_cursor)
 
                 # pre cache left and right column
                 for y in range(self.pre_cache_position[1] - radius, self.pre_cache_position[1] + radius + 1):
-                    if f"{zoom}{self.pre_cache_position[0] + radius}{y}" not in self.tile_image_cache:
-                        self.request_image(zoom, self.pre_cache_position[0] + radius, y, db_cursor=db_cursor)
-                    if f"{zoom}{self.pre_cache_position[0] - radius}{y}" not in self.tile_image_cache:
-                        self.request_image(zoom, self.pre_cache_position[0] - radius, y, db_cursor=db_cursor)
+                    self.pre_cache_tile(zoom, self.pre_cache_position[0] + radius, y, db_cursor)
+                    self.pre_cache_tile(zoom, self.pre_cache_position[0] - radius, y, db_cursor)
 
                 # raise the radius
                 radius += 1
@@ -378,19 +481,35 @@ class TkinterMapView(tkinter.Frame):
             else:
                 time.sleep(0.1)
 
-            # 10_000 images = 80 MB RAM-usage
-            if len(self.tile_image_cache) > 10_000:  # delete random tiles if cache is too large
-                # create list with keys to delete
-                keys_to_delete = []
-                for key in self.tile_image_cache.keys():
-                    if len(self.tile_image_cache) - len(keys_to_delete) > 10_000:
-                        keys_to_delete.append(key)
+    def pre_cache_tile(self, zoom: int, x: int, y: int, db_cursor=None):
+        if f"{zoom}{x}{y}" in self.tile_image_cache:
+            return
+
+        # don't decode more tiles than the main thread can turn into images, wait for it instead of skipping the tile
+        position = self.pre_cache_position
+        while len(self.pre_cache_queue_results) >= PRE_CACHE_QUEUE_SIZE:
+            if self.pre_cache_position != position:
+                return  # pre caching starts over around the new position
+            time.sleep(0.01)
+
+        generation = self.tile_server_generation
+        tile_buffer = self.request_image(zoom, x, y, db_cursor=db_cursor)
+        if isinstance(tile_buffer, tuple):
+            self.pre_cache_queue_results.append(((zoom, x, y), None, tile_buffer, generation))
 
-                # delete keys in list so that len(self.tile_image_cache) == 10_000
-                for key in keys_to_delete:
-                    del self.tile_image_cache[key]
+    @staticmethod
+    def decode_tile(image: Image.Image) -> tuple:
+        """ decodes a tile into a raw (mode, size, bytes) buffer in the calling thread,
+            pillow releases the GIL while decoding and converting, so this runs in parallel to the Tk main loop """
 
-    def request_image(self, zoom: int, x: int, y: int, db_cursor=None) -> ImageTk.PhotoImage:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        image.load()
+        return image.mode, image.size, image.tobytes()
+
+    def request_image(self, zoom: int, x: int, y: int, db_cursor=None) -> Union[tuple, ImageTk.PhotoImage]:
+        """ returns a decoded tile buffer (mode, size, bytes), or self.empty_tile_image if there is no tile,
+            safe to call from background threads because no Tk object is created here """
 
         # if database is available check first if tile is in database, if not try to use server
         if db_cursor is not None:
@@ -400,10 +519,7 @@ class TkinterMapView(tkinter.Frame):
                 result = db_cursor.fetchone()
 
                 if result is not None:
-                    image = Image.open(io.BytesIO(result[0]))
-                    image_tk = ImageTk.PhotoImage(image)
-                    self.tile_image_cache[f"{zoom}{x}{y}"] = image_tk
-                    return image_tk
+                    return self.decode_tile(Image.open(io.BytesIO(result[0])))
                 elif self.use_database_only:
                     return self.empty_tile_image
                 else:
@@ -418,26 +534,29 @@ class TkinterMapView(tkinter.Frame):
             except Exception:
                 return self.empty_tile_image
 
-        # try to get the tile from the server
+        # try to get the tile from the server or the decoded tile caches
         try:
-            url = self.tile_server.replace("{x}", str(x)).replace("{y}", str(y)).replace("{z}", str(zoom))
-            image = Image.open(requests.get(url, stream=True, headers={"User-Agent": "TkinterMapView"}).raw)
+            if self.overlay_tile_server is None:
+                return self.decode_tile(self.get_server_tile(self.tile_server, zoom, x, y, self.base_tile_cache))
 
-            if self.overlay_tile_server is not None:
-                url = self.overlay_tile_server.replace("{x}", str(x)).replace("{y}", str(y)).replace("{z}", str(zoom))
-                image_overlay = Image.open(requests.get(url, stream=True, headers={"User-Agent": "TkinterMapView"}).raw)
-                image = image.convert("RGBA")
-                image_overlay = image_overlay.convert("RGBA")
+            composite_key = (self.tile_server, self.overlay_tile_server, zoom, x, y)
+            image = self.composite_tile_cache.get(composite_key)
+            if image is None:
+                image = self.get_server_tile(self.tile_server, zoom, x, y, self.base_tile_cache).convert("RGBA")
+                try:
+                    image_overlay = self.get_server_tile(self.overlay_tile_server, zoom, x, y, self.overlay_tile_cache)
 
-                if image_overlay.size is not (self.tile_size, self.tile_size):
-                    image_overlay = image_overlay.resize((self.tile_size, self.tile_size), Image.ANTIALIAS)
+                    if image_overlay.size != (self.tile_size, self.tile_size):
+                        image_overlay = image_overlay.resize((self.tile_size, self.tile_size), Image.LANCZOS)
 
-                image.paste(image_overlay, (0, 0), image_overlay)
+                    # alpha blending of the whole buffer in pillow's C core, instead of a per pixel paste
+                    image = Image.alpha_composite(image, image_overlay)
+                except PIL.UnidentifiedImageError:  # overlay has no tile for given coordinates
+                    pass
 
-            image_tk = ImageTk.PhotoImage(image)
+                self.composite_tile_cache.put(composite_key, image)
 
-            self.tile_image_cache[f"{zoom}{x}{y}"] = image_tk
-            return image_tk
+            return self.decode_tile(image)
 
         except PIL.UnidentifiedImageError:  # image does not exist for given coordinates
             self.tile_image_cache[f"{zoom}{x}{y}"] = self.empty_tile_image
@@ -449,11 +568,43 @@ class TkinterMapView(tkinter.Frame):
         except Exception:
             return self.empty_tile_image
 
+    def get_server_tile(self, server: str, zoom: int, x: int, y: int, cache: TileCache) -> Image.Image:
+        """ returns a decoded tile of the given server, downloads it only if it is not in the cache yet """
+
+        image = cache.get((server, zoom, x, y))
+        if image is None:
+            url = server.replace("{x}", str(x)).replace("{y}", str(y)).replace("{z}", str(zoom))
+            image = Image.open(requests.get(url, stream=True, headers={"User-Agent": "TkinterMapView"}).raw)
+
+            # overlay tiles keep their alpha channel for compositing, base tiles are stored as RGB
+            image = image.convert("RGBA" if cache is self.overlay_tile_cache else "RGB")
+            cache.put((server, zoom, x, y), image)
+        return image
+
+    def tile_buffer_to_image(self, zoom: int, x: int, y: int, tile_buffer: Union[tuple, ImageTk.PhotoImage]) -> ImageTk.PhotoImage:
+        """ creates the PhotoImage for a decoded tile buffer and caches it, must only be called from the main thread """
+
+        if not isinstance(tile_buffer, tuple):
+            return tile_buffer
+
+        cached_image = self.get_tile_image_from_cache(zoom, x, y)
+        if cached_image is not False:
+            return cached_image  # tile was loaded twice, e.g. by pre caching and a background thread
+
+        mode, size, data = tile_buffer
+        image_tk = ImageTk.PhotoImage(Image.frombuffer(mode, size, data, "raw", mode, 0, 1))
+        self.tile_image_cache[f"{zoom}{x}{y}"] = image_tk
+
+        # drop the oldest tenth of the images once the cache is full, here on the main thread because
+        # the PhotoImages must be destroyed where they were created
+        if len(self.tile_image_cache) > TILE_IMAGE_CACHE_SIZE:
+            for key in list(self.tile_image_cache)[:len(self.tile_image_cache) - TILE_IMAGE_CACHE_SIZE * 9 // 10]:
+                del self.tile_image_cache[key]
+        return image_tk
+
     def get_tile_image_from_cache(self, zoom: int, x: int, y: int):
-        if f"{zoom}{x}{y}" not in self.tile_image_cache:
-            return False
-        else:
-            return self.tile_image_cache[f"{zoom}{x}{y}"]
+        # a single lookup, the main thread may evict the image between a check and a read
+        return self.tile_image_cache.get(f"{zoom}{x}{y}", False)
 
     def load_images_background(self):
         if self.database_path is not None:
@@ -471,32 +622,37 @@ class TkinterMapView(tkinter.Frame):
                 x, y = task[0][1], task[0][2]
                 canvas_tile = task[1]
 
+                generation = self.tile_server_generation
                 image = self.get_tile_image_from_cache(zoom, x, y)
                 if image is False:
                     image = self.request_image(zoom, x, y, db_cursor=db_cursor)
-                    if image is None:
-                        self.image_load_queue_tasks.append(task)
-                        continue
 
-                # result queue structure: [((zoom, x, y), corresponding canvas tile object, tile image), ... ]
-                self.image_load_queue_results.append(((zoom, x, y), canvas_tile, image))
+                # result queue structure: [((zoom, x, y), corresponding canvas tile object, tile buffer or image, generation), ... ]
+                self.image_load_queue_results.append(((zoom, x, y), canvas_tile, image, generation))
 
             else:
                 time.sleep(0.01)
 
     def update_canvas_tile_images(self):
+        frame_start = time.perf_counter()
+
+        # visible tiles first, pre cached tiles only get the time that is left of the frame budget
+        for result_queue in (self.image_load_queue_results, self.pre_cache_queue_results):
+            while len(result_queue) > 0 and time.perf_counter() - frame_start < self.tile_update_budget:
+                # result queue structure: [((zoom, x, y), corresponding canvas tile object, tile buffer or image, generation), ... ]
+                result = result_queue.popleft()
 
-        while len(self.image_load_queue_results) > 0:
-            # result queue structure: [((zoom, x, y), corresponding canvas tile object, tile image), ... ]
-            result = self.image_load_queue_results.pop(0)
+                # result was loaded for a tile server that is not used anymore
+                if result[3] != self.tile_server_generation:
+                    continue
 
-            zoom, x, y = result[0][0], result[0][1], result[0][2]
-            canvas_tile = result[1]
-            image = result[2]
+                zoom, x, y = result[0][0], result[0][1], result[0][2]
+                canvas_tile = result[1]
+                image = self.tile_buffer_to_image(zoom, x, y, result[2])
 
-            # check if zoom level of result is still up to date, otherwise don't update image
-            if zoom == round(self.zoom):
-                canvas_tile.set_image(image)
+                # check if zoom level of result is still up to date, otherwise don't update image
+                if canvas_tile is not None and zoom == round(self.zoom):
+                    canvas_tile.set_image(image)
 
         # This function calls itself every 10 ms with tk.after() so that the image updates come
         # from the main GUI thread, because tkinter can only be updated from the main thread.
@@ -583,11 +739,16 @@ class TkinterMapView(tkinter.Frame):
         # draw other objects on canvas
         for marker in self.canvas_marker_list:
             marker.draw()
+        for marker_cluster in self.canvas_marker_cluster_list:
+            marker_cluster.draw()
         for path in self.canvas_path_list:
             path.draw()
         for polygon in self.canvas_polygon_list:
             polygon.draw()
 
+        self.last_drawn_upper_left_tile_pos = self.upper_left_tile_pos
+        self.pan_drift = 0
+
         # update pre-cache position
         self.pre_cache_position = (round((self.upper_left_tile_pos[0] + self.lower_right_tile_pos[0]) / 2),
                                    round((self.upper_left_tile_pos[1] + self.lower_right_tile_pos[1]) / 2))
@@ -596,6 +757,20 @@ class TkinterMapView(tkinter.Frame):
 
         if self.canvas_tile_array:
 
+            # translate the whole map layer with one canvas call, so that panning costs the same for any number of path vertices
+            full_redraw = called_after_zoom or self.last_drawn_upper_left_tile_pos is None or self.pan_drift > self.pan_reprojection_threshold
+            if full_redraw:
+                self.pan_drift = 0
+            else:
+                widget_tile_width = self.lower_right_tile_pos[0] - self.upper_left_tile_pos[0]
+                widget_tile_height = self.lower_right_tile_pos[1] - self.upper_left_tile_pos[1]
+                x_move = ((self.last_drawn_upper_left_tile_pos[0] - self.upper_left_tile_pos[0]) / widget_tile_width) * self.width
+                y_move = ((self.last_drawn_upper_left_tile_pos[1] - self.upper_left_tile_pos[1]) / widget_tile_height) * self.height
+
+                self.canvas.move("map_layer", x_move, y_move)
+                self.pan_drift += abs(x_move) + abs(y_move)
+            self.last_drawn_upper_left_tile_pos = self.upper_left_tile_pos
+
             # insert or delete rows on top
             top_y_name_position = self.canvas_tile_array[0][0].tile_name_position[1]
             top_y_diff = self.upper_left_tile_pos[1] - top_y_name_position
@@ -650,18 +825,28 @@ class TkinterMapView(tkinter.Frame):
                             del self.canvas_tile_array[-1][y]
                         del self.canvas_tile_array[-1]
 
-            # draw all canvas tiles
-            for x_pos in range(len(self.canvas_tile_array)):
-                for y_pos in range(len(self.canvas_tile_array[0])):
-                    self.canvas_tile_array[x_pos][y_pos].draw()
-
-            # draw other objects on canvas
-            for marker in self.canvas_marker_list:
-                marker.draw()
-            for path in self.canvas_path_list:
-                path.draw(move=not called_after_zoom)
-            for polygon in self.canvas_polygon_list:
-                polygon.draw(move=not called_after_zoom)
+            if full_redraw:
+                # draw all canvas tiles
+                for x_pos in range(len(self.canvas_tile_array)):
+                    for y_pos in range(len(self.canvas_tile_array[0])):
+                        self.canvas_tile_array[x_pos][y_pos].draw()
+
+                # draw other objects on canvas
+                for marker in self.canvas_marker_list:
+                    marker.draw()
+                for marker_cluster in self.canvas_marker_cluster_list:
+                    marker_cluster.draw()
+                for path in self.canvas_path_list:
+                    path.draw()
+                for polygon in self.canvas_polygon_list:
+                    polygon.draw()
+            else:
+                # tiles, paths and polygons were moved with the map layer, markers only need to be
+                # created or deleted when they enter or leave the visible area
+                for marker in self.canvas_marker_list:
+                    marker.draw(move=True)
+                for marker_cluster in self.canvas_marker_cluster_list:
+                    marker_cluster.draw(move=True)
 
             # update pre-cache position
             self.pre_cache_position = (round((self.upper_left_tile_pos[0] + self.lower_right_tile_pos[0]) / 2),
@@ -724,7 +909,7 @@ class TkinterMapView(tkinter.Frame):
         self.upper_left_tile_pos = (self.upper_left_tile_pos[0] + tile_move_x, self.upper_left_tile_pos[1] + tile_move_y)
 
         self.check_map_border_crossing()
-        self.draw_move()
+        self.schedule_redraw()
 
     def mouse_click(self, event):
         self.fading_possible = False
@@ -748,7 +933,7 @@ class TkinterMapView(tkinter.Frame):
                 self.map_click_callback(coordinate_mouse_pos)
         else:
             # mouse was moved, start fading animation
-            self.after(1, self.fading_move)
+            self.after(math.ceil(self.frame_interval * 1000), self.fading_move)
 
     def fading_move(self):
         delta_t = time.time() - self.last_move_time
@@ -778,10 +963,10 @@ class TkinterMapView(tkinter.Frame):
             self.upper_left_tile_pos = (self.upper_left_tile_pos[0] + tile_move_x, self.upper_left_tile_pos[1] + tile_move_y)
 
             self.check_map_border_crossing()
-            self.draw_move()
+            self.schedule_redraw()
 
             if abs(self.move_velocity[0]) > 1 or abs(self.move_velocity[1]) > 1:
-                self.after(1, self.fading_move)
+                self.after(math.ceil(self.frame_interval * 1000), self.fading_move)
 
     def set_zoom(self, zoom: int, relative_pointer_x: float = 0.5, relative_pointer_y: float = 0.5):
 
@@ -808,7 +993,7 @@ class TkinterMapView(tkinter.Frame):
 
         if round(self.zoom) != round(self.last_zoom):
             self.check_map_border_crossing()
-            self.draw_zoom()
+            self.schedule_redraw(zoom=True)
             self.last_zoom = round(self.zoom)
 
     def mouse_zoom(self, event):
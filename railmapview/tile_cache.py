@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Union
+
+from PIL import Image
+
+
+class TileCache:
+    """ thread safe least recently used cache for decoded tile images """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size  # 256 RGBA tiles of 256x256 pixel = 64 MB RAM-usage
+        self.lock = threading.Lock()
+        self.images: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.images
+
+    def get(self, key: Hashable) -> Union[Image.Image, None]:
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: Image.Image):
+        with self.lock:
+            self.images[key] = image
+            self.images.move_to_end(key)
+
+            while len(self.images) > self.max_size:
+                self.images.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
@@ -4,16 +4,20 @@ from tkcalendar import Calendar
 from easygui import fileopenbox, filesavebox
 
 import sys
-from threading import Thread
+import time
+from threading import Lock, Thread
 import os
-import pickle
-from copy import deepcopy
 
+STARTED = time.perf_counter() # Start of the startup timeline
+
+from traintracks import journal, planfile
 from traintracks.maputils import _loadAllRoutes
+from traintracks.history import FareHistory
+from traintracks.stations import Stations
+from traintracks.timetable import ScheduleStore
 
-from searcher.driver import Driver
+from lazyimport import lazy
 from searcher.userselections import UserSelections
-from searcher.amtrak_searcher import AmtrakSearch
 
 from views import config as cfg
 from views.itinerary import Itinerary
@@ -26,6 +30,14 @@ from views.trainresultsarea import TrainResultsArea
 from views.menuoptions import MenuOptions
 from views.devtools import DevTools
 from views.map import Map
+from views.startup import Startup
+from views.dispatcher import UIDispatcher
+
+# Selenium and the browser drivers are imported by the startup task that creates the searcher
+amtrak_searcher = lazy("searcher.amtrak_searcher")
+driver_pool = lazy("searcher.driver_pool")
+backends = lazy("searcher.backends")
+watcher = lazy("searcher.watcher")
 
 class MainWindow(tk.Tk):
   """
@@ -40,7 +52,16 @@ class MainWindow(tk.Tk):
   self : Tk
     Root/master object.
   us : UserSelections
+  ui : UIDispatcher
+      Applies updates posted by background threads, once a frame.
+  startup : Startup
+      Runs the startup tasks and keeps their timeline.
   searcher : AmtrakSearch
+      `None` until it is created at startup.
+  routes : dict
+      Route name : Route, loaded the first time they are used.
+  driverPool : DriverPool
+      Warm browser sessions on the search page, shared by all searches. `None` in dev mode.
   statusMessage : StringVar
       Holds message for status bar at the bottom of the window.
   resultsBackground : str
@@ -51,8 +72,12 @@ class MainWindow(tk.Tk):
   dateSelectionArea : DateSelectionArea
   resultsHeadingArea : ResultsHeadingArea
   trainResultsArea : TrainResultsArea
+  railFilePath : str
+      Rail plan file last opened or saved, `None` for a new plan.
+  autosave : PlanJournal
+      Journals every edit to the open plan so it can be recovered after a crash, `None` if the autosave folder cannot be used.
   devTools : DevTools
-      Not used in production, only for testing.
+      Search diagnostics window, `None` if window is not open.
   itineraryWindow : Itinerary
       `None` if window is not open.
   statusBar : tk.Label
@@ -70,16 +95,27 @@ class MainWindow(tk.Tk):
   """
   def __init__(self) -> None:
     super().__init__()
+    self.ui = UIDispatcher(self)
+    self.ui.run()
+    self.startup = Startup(self, self.ui, STARTED)
     self.geometry(cfg.GEOMETRY)
     self.minsize(width=cfg.MINSIZE[0], height=cfg.MINSIZE[1])
     self.config(background=cfg.BACKGROUND)
     self.title(cfg.APP_NAME)
     if os.name == 'nt': self.iconbitmap(cfg.ICON)
     self.isSaved = True
+    self.railFilePath = None
+    self.autosave = None
 
     self.us = UserSelections()
     self.searcher = None
-    self.statusMessage = tk.StringVar(self, "Ready")
+    self.driverPool = None
+    self.schedules = None
+    self.fareHistory = None
+    self.watcher = None
+    self.statusMessage = tk.StringVar(self, "Starting up")
+    self.__routes = None
+    self.__routesLock = Lock()
     self.resultsBackground = "gainsboro"
 
     self.titleArea = TitleArea(self)
@@ -89,12 +125,12 @@ class MainWindow(tk.Tk):
     self.__setBackground()
     self.resultsHeadingArea = ResultsHeadingArea(self)
     self.trainResultsArea = TrainResultsArea(self)
-    #self.devTools = DevTools(self)
+    self.devTools = None
     self.itineraryWindow = None
-    self.mapWindow = Map(self)
+    self.mapWindow = None
     self.menuOptions = MenuOptions(self)
-    self.startThread(self.__startup)
     self.config(menu=self.menuOptions)
+    self.trainResultsArea.findTrainsBtn.config(state='disabled')
 
     self.statusBar = tk.Label(self, textvariable=self.statusMessage, bd=1, relief=tk.SUNKEN, anchor=tk.W)
     self.statusBar.pack(side=tk.BOTTOM, fill=tk.BOTH)
@@ -107,8 +143,35 @@ class MainWindow(tk.Tk):
     self.resultsHeadingArea.pack(fill=tk.X)
     self.trainResultsArea.pack(fill=tk.BOTH, expand=True)
 
+    self.startup.mark("Window")
+    self.__startup()
+    self.after_idle(self.startup.mark, "Interactive")
     self.update()
 
+  def __startAutosave(self) -> None:
+    """Offers to recover the plan of a session that did not close properly, then starts autosaving."""
+    if journal.hasRecovery():
+      try:
+        _recovered = journal.recover()
+        if _recovered != None and messagebox.askyesno(cfg.APP_NAME, "The planner did not close properly last time. Do you want to recover the unsaved plan?"):
+          self.us.userSelections = _recovered
+          self.resultsHeadingArea.changeSearchView(_recovered.numSearches)
+          self.isSaved = False
+          self.title(f"*{cfg.APP_NAME}")
+      except (OSError, planfile.PlanFileError) as e:
+        print(e)
+    try:
+      self.autosave = journal.PlanJournal()
+    except OSError as e:
+      print(e)
+    self.__autosavePlan()
+
+  def __autosavePlan(self, path: str=None, legacy: bool=False) -> None:
+    """Autosaves the plan in `us` from here on, starting from the file it was opened from or saved to."""
+    if self.autosave == None: return
+    try: self.autosave.start(self.us.userSelections, path, legacy)
+    except (OSError, planfile.PlanFileError) as e: print(e)
+
   def _isSavedCheck(self) -> bool:
     """
     Checks if the user wants to save their changes before losing them.
@@ -140,7 +203,9 @@ class MainWindow(tk.Tk):
       self.resultsHeadingArea.titleToAndFrom.set("Click \"Find Trains\" to start a search!")
       self.itineraryWindow.updateItinerary()
       self.isSaved = True
+      self.railFilePath = None
       self.title(cfg.APP_NAME)
+      self.__autosavePlan()
 
     if self._isSavedCheck():
       updateElements()
@@ -154,15 +219,25 @@ class MainWindow(tk.Tk):
       if _inpath != None:
         if _inpath.endswith('.railplan'):
           try:
-            with open(_inpath, 'rb') as infile:
-              _data = pickle.load(infile)
-              self.us.userSelections = deepcopy(_data)
-              self.resultsHeadingArea.changeSearchView(self.us.userSelections.numSearches)
-              self.itineraryWindow.updateItinerary()
-              self.isSaved = True
-              self.title(cfg.APP_NAME)
+            _legacy = False
+            try:
+              self.us.userSelections = planfile.load(_inpath)
+            except planfile.LegacyPlanFile:
+              # Older files are pickled, which can run code when opened
+              if not messagebox.askyesno("Import Rail Plan", "This plan was saved by an older version of the planner. Older plan files can run code on this computer when opened, only continue if you trust where it came from.\n\nOpen it anyway?", icon='warning'):
+                return
+              self.us.userSelections = planfile.loadLegacy(_inpath)
+              _legacy = True
+            self.railFilePath = _inpath
+            self.__autosavePlan(_inpath, _legacy)
+            self.resultsHeadingArea.changeSearchView(self.us.userSelections.numSearches)
+            self.itineraryWindow.updateItinerary()
+            self.isSaved = True
+            self.title(cfg.APP_NAME)
           except (FileNotFoundError, OSError):
             messagebox.showerror("Import Rail Plan", "There was an issue reading the file.")
+          except planfile.PlanFileError as e:
+            messagebox.showerror("Import Rail Plan", str(e))
         else:
           messagebox.showerror("Import Rail Plan", "Unsupported file type.")
     
@@ -178,18 +253,19 @@ class MainWindow(tk.Tk):
     bool
         Sucess in file saving.
     """
-    defaultPath = os.path.join(os.path.expanduser('~/'), 'My Plan.railplan')
+    defaultPath = self.railFilePath if self.railFilePath != None else os.path.join(os.path.expanduser('~/'), 'My Plan.railplan')
     _outpath = filesavebox(title="Save Rail Planner File", default=defaultPath, filetypes=['*.railplan', 'Rail Planner Files'])
     if _outpath != None:
       if not _outpath.endswith('.railplan'):
         _outpath += ".railplan"
       try:
-        with open(_outpath, 'wb') as outfile:
-          pickle.dump(self.us.userSelections, outfile, protocol=pickle.HIGHEST_PROTOCOL)
-          self.isSaved = True
-          self.title(cfg.APP_NAME)
-          return True
-      except (FileNotFoundError, OSError):
+        planfile.save(self.us.userSelections, _outpath)
+        self.railFilePath = _outpath
+        self.__autosavePlan(_outpath)
+        self.isSaved = True
+        self.title(cfg.APP_NAME)
+        return True
+      except (FileNotFoundError, OSError, planfile.PlanFileError):
         messagebox.showerror("Import Rail Plan", "There was an issue writing the file.")
         return False
     else: return False
@@ -211,16 +287,36 @@ class MainWindow(tk.Tk):
   def closeItinerary(self) -> None:
     self.itineraryWindow = None
   
-  def openMap(self) -> None:
-    """Opens the map. If already open, bring it to the front."""
-    if self.mapWindow == None:
+  def openMap(self, warmRoutes: bool=True) -> None:
+    """
+    Opens the map. If already open, bring it to the front.
+
+    Parameters
+    ----------
+    warmRoutes : bool, optional
+        Loads the routes in the background, ready to be drawn, by default True
+    """
+    if self.stationsArea.stations == None: # Markers need the stations
+      self.statusMessage.set("Loading stations, try again in a moment")
+    elif self.mapWindow == None:
       self.mapWindow = Map(self)
+      if warmRoutes and self.__routes == None: self.startThread(lambda: self.routes) # Ready before a route is drawn, usually
     else:
       self.mapWindow.lift()
   
   def closeMap(self) -> None:
     self.mapWindow = None
 
+  def openDevTools(self) -> None:
+    """Opens the search diagnostics. If already open, bring it to the front."""
+    if self.devTools == None:
+      self.devTools = DevTools(self)
+    else:
+      self.devTools.lift()
+
+  def closeDevTools(self) -> None:
+    self.devTools = None
+
   def __setBackground(self, f=None) -> None:
     """Sets the background to `cfg.BACKGROUND` for all non-results and non-ttk elements."""
     DONOTCHANGETHESE = [ttk.Button, ttk.Combobox, ttk.Treeview, ttk.Progressbar, ttk.Label, ttk.Frame, ttk.Scrollbar, Calendar]
@@ -271,24 +367,77 @@ class MainWindow(tk.Tk):
       """Closes application."""
       try: self.devTools.destroy()
       except: pass
+      if self.autosave != None: self.autosave.close()
+      if self.schedules != None: self.schedules.save()
+      if self.watcher != None: self.watcher.stop()
+      if self.fareHistory != None: self.fareHistory.close()
       self.destroy()
       # Close webdrivers
-      self.imageArea.imageCatcher.driver.close()
-      self.imageArea.imageCatcher.driver.quit()
-      self.searcher.driver.close()
-      self.searcher.driver.quit()
+      self.imageArea.prefetcher.stop()
+      self.imageArea.imageCatcher.close()
+      if self.driverPool != None: self.driverPool.shutdown()
       sys.exit()
 
     if self._isSavedCheck():
       cleanup()
 
   def __startup(self) -> None:
-    """Launches startup tasks: creating Amtrak searcher, loading routes, loading timetables."""
-    _dev = cfg.DEV_MODE
-    if not _dev: self.searcher = AmtrakSearch(self, Driver(cfg.SEARCH_URL, undetected=True).driver, status=self.statusMessage)
-    else: self.searcher = AmtrakSearch(self, None, status=self.statusMessage)
-    self.routes = _loadAllRoutes()
-    self.menuOptions._loadTimetables()
+    """
+    Launches startup tasks once the window is built: loading stations, creating the Amtrak searcher, loading timetables from the bundled index and then checking them against the search page, loading saved schedules and the fare history, starting the fare watcher, opening the map and autosave. Tasks run in parallel where they do not depend on each other. Routes are loaded when first used, see `routes`.
+    """
+    self.startup.add("Stations", Stations, onDone=self.stationsArea.setStations)
+    self.startup.add("Searcher", self.__createSearcher)
+    self.startup.add("Timetables", self.menuOptions._loadTimetables, onDone=lambda urls: self.menuOptions._createTimetableMenu())
+    self.startup.add("Timetables Refresh", self.menuOptions._refreshTimetables, requires=["Timetables", "Searcher"], onDone=lambda changed: self.menuOptions._createTimetableMenu() if changed else None)
+    self.startup.add("Schedules", ScheduleStore.load, onDone=self.__setSchedules)
+    self.startup.add("Fare History", FareHistory, onDone=lambda history: setattr(self, "fareHistory", history))
+    self.startup.add("Watcher", self.__startWatcher, requires=["Searcher", "Fare History"])
+    self.startup.add("Map", lambda: self.openMap(warmRoutes=False), requires=["Stations"], mainThread=True)
+    self.startup.add("Autosave", self.__startAutosave, requires=["Stations"], mainThread=True)
+    self.startup.add("Ready", self.__ready, requires=["Stations", "Searcher"], mainThread=True)
+    self.startup.run()
+
+  def __setSchedules(self, schedules: ScheduleStore) -> None:
+    with self.__routesLock:
+      if self.__routes != None: schedules.addRoutes(self.__routes)
+      self.schedules = schedules
+
+  def __createSearcher(self) -> None:
+    if not cfg.DEV_MODE:
+      self.driverPool = driver_pool.DriverPool()
+      self.searcher = amtrak_searcher.AmtrakSearch(self, None, status=self.statusMessage, pool=self.driverPool)
+    else: self.searcher = amtrak_searcher.AmtrakSearch(self, None, status=self.statusMessage)
+
+  def __startWatcher(self) -> None:
+    """Watches the saved segments and any rules in the data folder for fare and seat changes."""
+    if not cfg.WATCH_ENABLED: return
+    _backend = backends.ReplayBackend(rebase=True) if cfg.DEV_MODE else backends.SeleniumBackend(self.driverPool)
+    _record = lambda query, trains: self.fareHistory.record(*query, trains) if self.fareHistory != None else None
+    if cfg.DEV_MODE: _record = None # Replayed fares are not real, keep them out of the history
+    self.watcher = watcher.Watcher(_backend, onAlert=self.__watchAlert, onResults=_record, segments=lambda: list(self.us.userSelections.getSegments().values()))
+    for rule in watcher.loadRules(): self.watcher.addRule(rule)
+    self.watcher.start()
+
+  def __watchAlert(self, query: tuple, what, changes: list[str]) -> None:
+    origin, destination, travelDate = query
+    _what = f"Train {what[0]}" if isinstance(what, tuple) else "Watch"
+    _message = f"{_what}, {origin} to {destination} on {travelDate.strftime('%m/%d')}: {', '.join(changes)}"
+    self.ui.setVar(self.statusMessage, _message)
+
+  def __ready(self) -> None:
+    """Allows searching once there are stations to pick and a searcher."""
+    self.trainResultsArea.findTrainsBtn.config(state='normal')
+    self.statusMessage.set("Ready")
+
+  @property
+  def routes(self) -> dict:
+    with self.__routesLock:
+      if self.__routes == None:
+        _start = time.perf_counter()
+        self.__routes = _loadAllRoutes()
+        if self.schedules != None: self.schedules.addRoutes(self.__routes)
+        self.startup.mark("Routes (first use)", _start)
+    return self.__routes
 
 if __name__ == "__main__":
   app = MainWindow()
@@ -0,0 +1,65 @@
+"""
+Command line planner, runs many one-way searches without opening a window.
+
+Queries are read from a CSV file (origin,destination,date header) or a JSON list, results are written as JSON Lines or CSV while the searches finish.
+
+Usage
+-----
+python3 railplanner.py queries.csv -o results.jsonl --concurrency 2
+python3 railplanner.py queries.json --backend replay --format csv
+"""
+import argparse
+import sys
+
+from searcher.backends import BACKENDS, ReplayBackend, SeleniumBackend
+from searcher.batch import WRITERS, readQueries, runBatch
+from searcher.progress import PrintSearchProgress
+from views import config as cfg
+
+class StderrSearchProgress(PrintSearchProgress):
+  """Prints status messages to standard error, so they do not mix with results on standard output."""
+  def message(self, text: str, amount: float=0) -> None:
+    print(f"{self.label}{text}", file=sys.stderr)
+
+def parseArguments(argv: list=None) -> argparse.Namespace:
+  parser = argparse.ArgumentParser(prog="railplanner", description=f"{cfg.APP_NAME} - batch one-way searches.")
+  parser.add_argument("queries", help="CSV (origin,destination,date) or JSON file of queries, '-' for CSV on standard input")
+  parser.add_argument("-o", "--output", default="-", help="Output file, by default standard output")
+  parser.add_argument("-f", "--format", choices=list(WRITERS), default=None, help="Output format, by default from the output file extension, otherwise jsonl")
+  parser.add_argument("-b", "--backend", choices=list(BACKENDS), default="selenium", help="Search backend, by default selenium")
+  parser.add_argument("-c", "--concurrency", type=int, default=cfg.DRIVER_POOL_SIZE, help=f"Searches at the same time, by default {cfg.DRIVER_POOL_SIZE}")
+  parser.add_argument("--fixture", choices=['single', 'multiple', 'triservice', 'segments'], default=None, help="Saved search used by the replay backend")
+  parser.add_argument("-v", "--verbose", action="store_true", help="Print search progress to standard error")
+  return parser.parse_args(argv)
+
+def main(argv: list=None) -> int:
+  args = parseArguments(argv)
+  try:
+    queries = readQueries(args.queries)
+  except (OSError, ValueError) as e:
+    print(f"Could not read queries: {e}", file=sys.stderr)
+    return 2
+
+  _format = args.format
+  if _format == None:
+    _format = "csv" if args.output.endswith(".csv") else "jsonl"
+
+  if args.backend == "replay": backend = ReplayBackend(args.fixture)
+  else: backend = SeleniumBackend(size=max(1, args.concurrency))
+
+  progressFactory = None
+  if args.verbose:
+    progressFactory = lambda q: StderrSearchProgress(f"[{q['origin']}-{q['destination']} {q['date']}] ")
+
+  outfile = sys.stdout if args.output == "-" else open(args.output, 'w', newline='')
+  try:
+    counts = runBatch(queries, backend, WRITERS[_format](outfile), args.concurrency, progressFactory)
+  finally:
+    backend.close()
+    if outfile != sys.stdout: outfile.close()
+
+  print(f"{counts['Succeeded']} searches succeeded, {counts['Failed']} failed.", file=sys.stderr)
+  return 0 if counts["Failed"] == 0 else 1
+
+if __name__ == "__main__":
+  sys.exit(main())
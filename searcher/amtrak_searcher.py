@@ -1,17 +1,21 @@
+import threading
 import time
 import json
 import traceback
 from datetime import datetime
 from math import trunc
-from random import randint
-from tkinter import StringVar, Tk, Label, ttk
+from concurrent.futures import Future
+from tkinter import StringVar, Tk, ttk
 
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 
 from .driver import Driver
+from .driver_pool import DriverPool
+from .instrumentation import tracer
+from .progress import SearchProgress, TkSearchProgress, PrintSearchProgress
+from .singleflight import CancelToken, SearchCancelled, SingleFlight
 from traintracks.train import Train
 from views import config as cfg
 
@@ -21,6 +25,8 @@ class AmtrakSearch:
   """
   A class to search for an Amtrak journey(s). Results are overwritten with each run of the search function. Exists for the lifetime of the application.
 
+  Progress is reported through a `SearchProgress`, so the searcher also runs without a window (see `railplanner.py`).
+
   Attributes
   ----------
   origin : str
@@ -29,14 +35,27 @@ class AmtrakSearch:
   root : Tk
   hasAlreadySearched : bool
   driver : WebDriver
+      Driver of the current search. When searching through a pool, it is only set while a search is running.
+  pool : DriverPool
+      If set, every search borrows a session from the pool. Searchers sharing a pool can search at the same time.
   thisSearchResultsAsDict : dict
   thisSearchResultsAsTrain : dict
   numberTrainsFound : int
-  status : tk.Label
-  progressbar : ttk.Progressbar
-  numberTrainsLabel : StringVar
+  status : tk.StringVar
+  progress : SearchProgress
+      Receives status messages and the number of trains found.
   returnedError : bool
-      True if the search function exits on an exception of some kind. Reloads the page.
+      True if the search function exits on an exception of some kind. Reloads the page, or hands the session back to the pool to be reloaded.
+  stepTimings : dict
+      Seconds spent in each step of the last search, in the order the steps ran.
+  flights : SingleFlight
+      Searches started by `submitSearch` that have not finished.
+  cancelToken : CancelToken
+      Token of the running search, checked between its steps.
+  searchId : int
+      Tracer id of the running search, its spans are recorded under it. None between searches started by `submitSearch`.
+  traceIds : dict
+      Journey (origin, destination, departDate) : tracer id of its latest search started by `submitSearch`.
   
   Methods
   -------
@@ -44,15 +63,21 @@ class AmtrakSearch:
       Initializes search variables in the class
   oneWaySearch
       Performs a search for the requested journey.
+  submitSearch(origin, destination, departDate, pb, l, replay)
+      Searches in the background, sharing a search already running for the same journey and cancelling ones for other journeys.
+  replaySearch(fixture)
+      Returns the results of a saved search instead of searching.
+  timingReport
+      Returns the step timings of the last search as text.
   """
-  def __init__(self, root: Tk, driver: Driver, origin: str="WAS", destination: str="NYP", departDate: str="03/29/2022", status: Label=None) -> None:
+  def __init__(self, root: Tk, driver: Driver, origin: str="WAS", destination: str="NYP", departDate: str="03/29/2022", status: StringVar=None, pool: DriverPool=None, progress: SearchProgress=None) -> None:
     """
     Initializes a searcher.
 
     Parameters
     ----------
     root : tk.Tk
-        Parent window.
+        Parent window, None when searching without a window.
     driver : WebDriver
         The searching driver.
     origin : str, optional
@@ -61,8 +86,12 @@ class AmtrakSearch:
         Destination station, by default "NYP"
     departDate : str, optional
         Departure date as 'mm/dd/yyyy', by default "03/29/2022"
-    status : tk.Label, optional
-        Status bar object, by default None
+    status : tk.StringVar, optional
+        Status bar text, by default None
+    pool : DriverPool, optional
+        Pool to borrow a driver from for each search instead of using `driver`, by default None
+    progress : SearchProgress, optional
+        Receiver of progress updates, by default progress is ignored until `preSearchSetup` is given a progress bar.
     """
     self.origin = origin
     self.destination = destination
@@ -71,18 +100,94 @@ class AmtrakSearch:
 
     self.hasAlreadySearched = False
     self.driver = driver
+    self.pool = pool
     self.thisSearchResultsAsDict = dict()
     self.thisSearchResultsAsTrain = dict()
     self.numberTrainsFound = 0
     self.status = status
-    self.progressbar = None
-    self.numberTrainsLabel = None
+    self.progress = progress if progress != None else SearchProgress()
 
     self.returnedError = False
 
+    self.stepTimings = dict()
+    self.__currentStep = None
+    self.__stepStart = None
+    self.__deadline = None
+    self.flights = SingleFlight("Search")
+    self.cancelToken = None
+    self.searchId = None
+    self.traceIds = dict()
+    self.__searchLock = threading.Lock()
+
+  def __beginStep(self, name: str) -> None:
+    """
+    Ends the running step, adding its duration to `stepTimings` and recording it as a span, and starts timing the next one.
+
+    Parameters
+    ----------
+    name : str
+        Step name, or None to only end the running step.
+    """
+    if name != None and self.cancelToken != None: self.cancelToken.raiseIfCancelled()
+    _now = time.perf_counter_ns()
+    if self.__currentStep != None:
+      self.stepTimings[self.__currentStep] = self.stepTimings.get(self.__currentStep, 0) + (_now - self.__stepStart) / 1e9
+      tracer.record(self.__currentStep, self.__stepStart, _now, self.searchId)
+    self.__currentStep = name
+    self.__stepStart = _now
+
+  def timingReport(self) -> str:
+    """
+    Returns
+    -------
+    str
+        One line per step of the last search with its duration, and the total.
+    """
+    _lines = [f"{step:<24}{seconds*1000:>9.0f} ms" for step, seconds in self.stepTimings.items()]
+    _lines.append(f"{'Total':<24}{sum(self.stepTimings.values())*1000:>9.0f} ms")
+    return '\n'.join(_lines)
+
+  def __waitFor(self, condition, timeout: float=5., message: str=""):
+    """
+    Polls a condition with backoff until it returns something truthy. Never waits past the search latency budget.
+
+    Parameters
+    ----------
+    condition : function
+        Called with the driver, returns a truthy value once the page is ready.
+    timeout : float, optional
+        Seconds to wait for this condition, by default 5
+    message : str, optional
+        Message of the exception if the condition is not met in time.
+
+    Returns
+    -------
+    any
+        The first truthy value returned by `condition`.
+
+    Raises
+    ------
+    TimeoutException
+        The condition was not met before the timeout or the end of the latency budget.
+    """
+    _end = time.perf_counter() + timeout
+    if self.__deadline != None: _end = min(_end, self.__deadline)
+    _delay = cfg.SEARCH_POLL_INTERVAL[0]
+    while True:
+      try:
+        _result = condition(self.driver)
+        if _result: return _result
+      except NoSuchElementException: pass
+      if self.cancelToken != None: self.cancelToken.raiseIfCancelled()
+      _remaining = _end - time.perf_counter()
+      if _remaining <= 0:
+        raise TimeoutException(message)
+      time.sleep(min(_delay, _remaining))
+      _delay = min(_delay * 2, cfg.SEARCH_POLL_INTERVAL[1])
+
   def __updateStatusMessage(self, message: str, amt: int=0) -> None:
     """
-    Updates the parent window's status bar.
+    Reports a search step to `progress`.
 
     Parameters
     ----------
@@ -91,20 +196,13 @@ class AmtrakSearch:
     amt : int, optional
         Amount out of 50 to increment the progress bar, by default 0
     """
-    self.status.set(message)
-    self.progressbar['value'] += amt*2
-    #self.progressbar.step(amt)
-    self.root.update_idletasks()
+    self.progress.message(message, amt)
 
   def __updateNumberTrainsLabel(self) -> None:
-    """Updates the number of trains found in the main window."""
-    if self.numberTrainsFound == 1:
-      self.numberTrainsLabel.set(f"{self.numberTrainsFound} train found")
-    else:
-      self.numberTrainsLabel.set(f"{self.numberTrainsFound} trains found")
-    self.root.update_idletasks()
+    """Reports the number of trains found to `progress`."""
+    self.progress.trainsFound(self.numberTrainsFound)
 
-  def preSearchSetup(self, origin: str, destination: str, departDate: str, pb: ttk.Progressbar, l: StringVar) -> None:
+  def preSearchSetup(self, origin: str, destination: str, departDate: str, pb: ttk.Progressbar=None, l: StringVar=None) -> None:
     """
     Initializes variables to begin a search.
 
@@ -116,16 +214,54 @@ class AmtrakSearch:
         Amtrak station code of destination.
     departDate : str
         Date of the format mm/dd/yyyy
-    pb : ttk.Progressbar
-        Progressbar object to update during search.
-    l : tk.StringVar
+    pb : ttk.Progressbar, optional
+        Progressbar object to update during search. If None, `progress` is kept as is.
+    l : tk.StringVar, optional
         Number of trains label to update during search.
     """
     self.origin = origin
     self.destination = destination
     self.departDate = departDate
-    self.progressbar = pb
-    self.numberTrainsLabel = l
+    if pb != None:
+      self.progress = TkSearchProgress(self.root, self.status, pb, l)
+
+  def submitSearch(self, origin: str, destination: str, departDate: str, pb: ttk.Progressbar=None, l: StringVar=None, replay: bool=False) -> Future:
+    """
+    Searches in a background thread. A search for a journey that is already being searched shares that search. Searches for other journeys are superseded: they stop at their next step and their futures fail with SearchCancelled. With a pool, each search runs on its own searcher that leases a browser, so searches do not wait for each other. Without one they run one at a time, since they share `driver` and the results.
+
+    Parameters
+    ----------
+    origin, destination, departDate, pb, l
+        See `preSearchSetup`.
+    replay : bool, optional
+        Replays a saved search instead, see `replaySearch`, by default False
+
+    Returns
+    -------
+    Future
+        Resolves to what `oneWaySearch` returns.
+    """
+    def _search(token):
+      if self.pool != None:
+        searcher = AmtrakSearch(self.root, None, status=self.status, pool=self.pool, progress=self.progress)
+        return searcher.__runSearch(token, origin, destination, departDate, pb, l, replay, self.traceIds)
+      with self.__searchLock:
+        return self.__runSearch(token, origin, destination, departDate, pb, l, replay, self.traceIds)
+    return self.flights.submit((origin, destination, departDate), _search, group="Search")
+
+  def __runSearch(self, token: CancelToken, origin: str, destination: str, departDate: str, pb: ttk.Progressbar, l: StringVar, replay: bool, traceIds: dict) -> dict:
+    """One search started by `submitSearch`, on the thread it started. Its tracer id goes in `traceIds` of the searcher it was submitted to."""
+    token.raiseIfCancelled()
+    self.preSearchSetup(origin, destination, departDate, pb, l)
+    self.cancelToken = token
+    try:
+      _result = self.replaySearch() if replay else self.oneWaySearch()
+    finally:
+      self.cancelToken = None
+      if self.searchId != None: traceIds[(origin, destination, departDate)] = self.searchId
+      self.searchId = None
+    if isinstance(_result, SearchCancelled): raise _result
+    return _result
 
   def __test_returnSearchData(self):
     with open("TestTrainSearch.json", "r") as f:
@@ -136,13 +272,30 @@ class AmtrakSearch:
     return self.thisSearchResultsAsTrain
 
   def _test_search(self):
+    return self.replaySearch()
+
+  def replaySearch(self, fixture: str=None) -> dict:
+    """
+    Processes saved search results from `_retrieved` instead of searching.
+
+    Parameters
+    ----------
+    fixture : str, optional
+        'single', 'multiple', 'triservice' or 'segments', by default one is picked by the current time.
+
+    Returns
+    -------
+    dict
+        Trains, like `oneWaySearch`.
+    """
     self.numberTrainsFound = 0
     self.thisSearchResultsAsTrain.clear()
     self.thisSearchResultsAsDict.clear()
 
     _suffix = ['single', 'multiple', 'triservice', 'segments']
-    fileToUse = trunc(datetime.now().timestamp()) % 4
-    with open(f"_retrieved/searchresults_{_suffix[fileToUse]}.json", "r") as f:
+    if fixture == None: fixture = _suffix[trunc(datetime.now().timestamp()) % 4]
+    self.searchId = tracer.beginSearch(f"Replay searchresults_{fixture}")
+    with open(f"_retrieved/searchresults_{fixture}.json", "r") as f, tracer.span("JSON parse", self.searchId):
       temp = json.loads(f.read())
     self.__processTrainJson(temp)
     self.__updateStatusMessage("Done", 100)
@@ -326,11 +479,10 @@ class AmtrakSearch:
         
         # Loads next page and waits until elements load
         area.find_element(By.XPATH, f".//*[text()='{page}']").click()
-        WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, f".//a[text()='{page}']//ancestor::li[@class='pagination-page page-item active ng-star-inserted']")))
-        time.sleep(1)
+        self.__waitFor(EC.presence_of_element_located((By.XPATH, f".//a[text()='{page}']//ancestor::li[@class='pagination-page page-item active ng-star-inserted']")), message=f"Page {page} did not load.")
         
         searchResultsTable = self.driver.find_element(By.XPATH, "//div[contains(@class, 'trigger-searchList')]") # Search area
-        trainList = searchResultsTable.find_elements(By.XPATH, ".//div[contains(@class, 'trigger-searchItems')]") # List of train results
+        trainList = self.__waitFor(lambda d: searchResultsTable.find_elements(By.XPATH, ".//div[contains(@class, 'trigger-searchItems')]"), message=f"No results on page {page}.") # List of train results
         self.__findTrainInfo(trainList)
     
     if isScrape:
@@ -356,7 +508,9 @@ class AmtrakSearch:
     
     try:
       if file == None:
-        j = json.loads(self._getSessionStorage("searchresults", True))
+        _raw = self._getSessionStorage("searchresults", True, self.driver)
+        with tracer.span("JSON parse", self.searchId):
+          j = json.loads(_raw)
       else:
         j = file
         self.__updateStatusMessage('Test', 22)
@@ -459,7 +613,8 @@ class AmtrakSearch:
               print(e)
 
             if USE_TRAIN_CLASSES:
-              self.thisSearchResultsAsTrain.update({self.numberTrainsFound : (Train(outputDict))})
+              with tracer.span("Train construction", self.searchId):
+                self.thisSearchResultsAsTrain.update({self.numberTrainsFound : (Train(outputDict))})
             else:
               self.thisSearchResultsAsDict[self.numberTrainsFound] = outputDict
             self.numberTrainsFound += 1
@@ -489,8 +644,7 @@ class AmtrakSearch:
     inputField1 = fromStationSearchArea.find_element(By.XPATH, "//input[@id='mat-input-0']")
     inputField1.clear()
     inputField1.send_keys(self.origin)
-    WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//button[contains(@aria-label,'From')]"))) # Station name autofilled
-    time.sleep(randint(5,100)/100.)
+    self.__waitFor(EC.presence_of_element_located((By.XPATH, "//button[contains(@aria-label,'From')]")), message="Origin station was not autofilled.")
 
     # Entering destination station info
     toStationSearchArea = self.driver.find_element(By.XPATH, "//div[@class='to-station flex-grow-1']")
@@ -498,8 +652,7 @@ class AmtrakSearch:
     inputField2 = toStationSearchArea.find_element(By.XPATH, "//input[@id='mat-input-1']")
     inputField2.clear()
     inputField2.send_keys(self.destination)
-    WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//button[contains(@aria-label,'To')]"))) # Station name autofilled
-    time.sleep(randint(5,100)/100.)
+    self.__waitFor(EC.presence_of_element_located((By.XPATH, "//button[contains(@aria-label,'To')]")), message="Destination station was not autofilled.")
 
   def __enterDepartDate(self, area) -> None:
     """
@@ -516,9 +669,9 @@ class AmtrakSearch:
     inputField3.clear()
     inputField3.send_keys(f"{self.departDate}\t") #Depart Date
     #searchArea.find_element(by=By.XPATH, value="//input[@id='mat-input-4']").send_keys("03/27/2022") #Return Date
-    time.sleep(randint(5,100)/100.)
+    self.__waitFor(lambda d: inputField3.get_attribute('value') != '', message="Departure date was not accepted.")
 
-  def _getSessionStorage(self, key: str, beCareful: bool=False) -> dict:
+  def _getSessionStorage(self, key: str, beCareful: bool=False, driver=None) -> dict:
     """
     Retrieves an item from session storage.
 
@@ -528,18 +681,30 @@ class AmtrakSearch:
         Item to retrieve.
     beCareful : bool, optional
         If True, do NOT refresh the page to get the results, by default False
+    driver : WebDriver, optional
+        Driver to read from. By default a session is borrowed from the pool, or `driver` is used without one.
 
     Returns
     -------
     dict
-        Session storage item.
+        Session storage item, None if it did not show up in time.
     """
-    time.sleep(1)
-    _tc = self.driver.execute_script("return window.sessionStorage.getItem(arguments[0]);", key)
+    if driver == None and self.pool != None: # Never `driver`, it may belong to a search running on another thread
+      with self.pool.session() as pooledDriver:
+        return self._getSessionStorage(key, beCareful, pooledDriver)
+    if driver == None: driver = self.driver
+
+    def _poll():
+      try:
+        with tracer.span("Session storage fetch", self.searchId if driver is self.driver else None):
+          return self.__waitFor(lambda d: driver.execute_script("return window.sessionStorage.getItem(arguments[0]);", key), timeout=cfg.SEARCH_STORAGE_TIMEOUT)
+      except TimeoutException:
+        return None
+
+    _tc = _poll()
     if _tc == None and beCareful == False:
-      self.driver.refresh()
-      time.sleep(2)
-      _tc = self.driver.execute_script("return window.sessionStorage.getItem(arguments[0]);", key)
+      driver.refresh()
+      _tc = _poll()
     return _tc
 
   def oneWaySearch(self, isScrape: bool=False) -> dict:
@@ -561,6 +726,33 @@ class AmtrakSearch:
     Exception
         Catch-all for any failed searches, returns the error message.
     """
+    self.stepTimings.clear()
+    self.searchId = tracer.beginSearch(f"{self.origin}-{self.destination} {self.departDate}")
+    self.__deadline = time.perf_counter() + cfg.SEARCH_LATENCY_BUDGET
+    try:
+      if self.pool == None:
+        return self.__searchOnPage(isScrape)
+
+      try: # Borrowing a warm session, sessions that errored are reloaded by the pool instead of by the next search
+        self.__beginStep("Waiting for browser")
+        self.__updateStatusMessage("Searching - waiting for browser", 0)
+        self.driver = self.pool.acquire(timeout=60)
+      except TimeoutError as e:
+        print(e)
+        self.__updateStatusMessage("Error")
+        return e
+      self.returnedError = False
+      try:
+        return self.__searchOnPage(isScrape)
+      finally:
+        self.pool.release(self.driver, needsReload=self.returnedError)
+        self.driver = None
+    finally:
+      self.__beginStep(None)
+      self.__deadline = None
+
+  def __searchOnPage(self, isScrape: bool=False) -> dict:
+    """Performs the search on `driver`, see `oneWaySearch`."""
 
     # Resets/clears elements to begin new search
     self.numberTrainsFound = 0
@@ -568,6 +760,7 @@ class AmtrakSearch:
     self.thisSearchResultsAsDict.clear()
     
     try: # Loading the page
+      self.__beginStep("Loading page")
       self.__updateStatusMessage("Searching - loading page", 1)
       if (self.driver.current_url != cfg.SEARCH_URL) or self.returnedError: # If not at the page or an error occurred last time, reload
         self.driver.get(cfg.SEARCH_URL)
@@ -575,35 +768,41 @@ class AmtrakSearch:
       self.driver.execute_script("window.scrollTo(document.body.scrollHeight, 0)") # Reset after previous search
 
       # Make sure the page loads and the New Search button is available to us
-      WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//button[starts-with(@class, 'am-btn btn--secondary')]")))
+      self.__waitFor(EC.element_to_be_clickable((By.XPATH, "//button[starts-with(@class, 'am-btn btn--secondary')]")), message="The search page did not load.")
 
       try: # Clicking the new search button
+        self.__beginStep("Opening input fields")
         self.__updateStatusMessage("Searching - opening input fields", 4)
         newSearchButton = self.driver.find_element(By.XPATH, "//button[starts-with(@class, 'am-btn btn--secondary')]")
         newSearchButton.click()
-        time.sleep(1)
+        self.__waitFor(EC.visibility_of_element_located((By.XPATH, "//div[@id='refineSearch']")), message="The input fields did not open.")
 
         try: # Entering to/from stations
+          self.__beginStep("Entering stations")
           self.__updateStatusMessage("Searching - entering stations", 2)
           searchArea = self.driver.find_element(By.XPATH, "//div[@id='refineSearch']")
           searchArea = searchArea.find_element(By.XPATH, "//div[starts-with(@class, 'row align-items-center')]")
           self.__enterStationInfo(searchArea)
 
           try: # Entering departure date
+            self.__beginStep("Entering travel dates")
             self.__updateStatusMessage("Searching - entering travel dates", 1)
             self.__enterDepartDate(searchArea)
 
             # Wait until "Find Trains" button is enabled, then click it
+            self.__beginStep("Starting search")
             self.__updateStatusMessage("Searching - starting search", 2)
-            WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//button[@aria-label='FIND TRAINS' and @aria-disabled='false']")))
+            self.__waitFor(EC.presence_of_element_located((By.XPATH, "//button[@aria-label='FIND TRAINS' and @aria-disabled='false']")), message="The search button was not enabled.")
             searchArea.find_element(By.XPATH, "//div[starts-with(@class, 'amtrak-ff-body')]").click() # Get calendar popup out of the way
-            time.sleep(randint(5,100)/100.)
+            self.__waitFor(EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='FIND TRAINS' and @aria-disabled='false']")), message="The search button was covered.")
             searchArea.find_element(by=By.XPATH, value="//button[@aria-label='FIND TRAINS' and @aria-disabled='false']").click() # Click search button
 
             # Search has been completed, but there is no service
             try:
+              self.__beginStep("Loading results")
               self.__updateStatusMessage("Searching - starting search", 2)
-              time.sleep(2)
+              # Results, a no service alert, or a date suggestion dialog
+              self.__waitFor(lambda d: d.find_elements(By.XPATH, "//div[starts-with(@class, 'alert-yellow-text')] | //div[@amt-auto-test-id='am-dialog'] | //div[contains(@class, 'trigger-searchList')]"), timeout=cfg.SEARCH_RESULTS_TIMEOUT, message="The search did not finish.")
               self.__updateStatusMessage("Searching - loading results", 3)
               potentialError = self.driver.find_element(By.XPATH, "//div[starts-with(@class, 'alert-yellow-text')]").text
               print(potentialError)
@@ -625,8 +824,9 @@ class AmtrakSearch:
               # Search has been completed, and we found a train(s)
               except NoSuchElementException:
                 try:
+                  self.__beginStep("Parsing results")
                   self.__updateStatusMessage("Searching - parsing results page", 5)
-                  WebDriverWait(self.driver, 3).until(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'trigger-searchList')]")))
+                  self.__waitFor(EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'trigger-searchList')]")), timeout=3, message="The results list did not load.")
                   searchResultsTable = self.driver.find_element(By.XPATH, "//div[contains(@class, 'trigger-searchList')]") # Table of results
                   nextPage = searchResultsTable.find_element(By.XPATH, ".//ul[starts-with(@class, 'pagination paginator__pagination')]") # Page links area
                   numberSearchPages = int((len(nextPage.find_elements(By.XPATH, ".//*"))-4)/2) # Find out how many pages exist
@@ -663,5 +863,9 @@ if __name__ == "__main__":
   destination = input("Destination code: ")
   departureDate = input("Depature date (MM/DD/YYYY): ")
   d = Driver(cfg.SEARCH_URL)
-  a = AmtrakSearch(d.driver, origin, destination, departureDate)
-  a.oneWaySearch()
\ No newline at end of file
+  a = AmtrakSearch(None, d.driver, origin, destination, departureDate, progress=PrintSearchProgress())
+  results = a.oneWaySearch()
+  if type(results) == dict:
+    for train in results.values(): print(train)
+  else: print(results)
+  d.driver.quit()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import time
+import zlib
+from datetime import datetime
+
+from .amtrak_searcher import AmtrakSearch
+from .driver_pool import DriverPool
+from .progress import SearchProgress
+from traintracks.train import Train
+from views import config as cfg
+
+class SearchBackend:
+  """
+  A class that runs one-way searches without a window. `search` may be called from several threads at once.
+
+  Methods
+  -------
+  search(origin, destination, departDate, progress=None)
+      Returns a dict of Trains, or the error (str or Exception) of a failed search.
+  close
+      Releases anything the backend holds on to.
+  """
+  name = ""
+
+  def search(self, origin: str, destination: str, departDate: str, progress: SearchProgress=None):
+    raise NotImplementedError
+
+  def close(self) -> None:
+    pass
+
+class SeleniumBackend(SearchBackend):
+  """
+  Searches amtrak.com. Every search gets its own AmtrakSearch, the browser sessions come from a shared DriverPool.
+
+  Attributes
+  ----------
+  pool : DriverPool
+  """
+  name = "selenium"
+
+  def __init__(self, pool: DriverPool=None, size: int=cfg.DRIVER_POOL_SIZE) -> None:
+    self.__ownsPool = pool == None
+    self.pool = pool if pool != None else DriverPool(size)
+
+  def search(self, origin: str, destination: str, departDate: str, progress: SearchProgress=None):
+    searcher = AmtrakSearch(None, None, origin, destination, departDate, pool=self.pool, progress=progress)
+    return searcher.oneWaySearch()
+
+  def close(self) -> None:
+    if self.__ownsPool: self.pool.shutdown()
+
+class ReplayBackend(SearchBackend):
+  """
+  Returns saved searches from `_retrieved` instead of searching. The trains are those of the saved search, whatever the query was. Used for testing and load tests.
+
+  Attributes
+  ----------
+  fixture : str
+      'single', 'multiple', 'triservice' or 'segments', None to rotate by time (or by query, when rebasing).
+  latency : float
+      Seconds every search pretends to take.
+  rebase : bool
+      Moves the saved trains to the query's stations and date, keeping their times of day and durations, so multi-leg plans can be built from fixtures.
+  """
+  name = "replay"
+  FIXTURES = ['single', 'multiple', 'triservice', 'segments']
+
+  def __init__(self, fixture: str=None, latency: float=0., rebase: bool=False) -> None:
+    self.fixture = fixture
+    self.latency = latency
+    self.rebase = rebase
+
+  def search(self, origin: str, destination: str, departDate: str, progress: SearchProgress=None):
+    if self.latency > 0: time.sleep(self.latency)
+    _fixture = self.fixture
+    if self.rebase and _fixture == None:
+      _fixture = self.FIXTURES[zlib.crc32(f"{origin}{destination}".encode()) % len(self.FIXTURES)]
+    searcher = AmtrakSearch(None, None, origin, destination, departDate, progress=progress)
+    results = searcher.replaySearch(_fixture)
+    if self.rebase and type(results) == dict:
+      _date = datetime.strptime(departDate, "%m/%d/%Y").date()
+      results = {i: self.__rebaseTrain(t, origin, destination, _date) for i, t in results.items()}
+    return results
+
+  def __rebaseTrain(self, train: Train, origin: str, destination: str, date) -> Train:
+    _shift = date - train.departure.date()
+    _unit = train.organizationalUnit
+    return Train({
+      "Origin": origin,
+      "Destination": destination,
+      "Number": _unit["Number"],
+      "Name": _unit["Name"],
+      "Departure": (train.departure + _shift).isoformat(),
+      "Arrival": (train.arrival + _shift).isoformat(),
+      "Travel Time": train.travelTime,
+      "Coach Price": train.coachPrice,
+      "Business Price": train.businessPrice,
+      "Sleeper Price": train.sleeperPrice,
+      "Segments": train.numberOfSegments,
+      "Segment Info": train.segmentInfo,
+      "City Segments": [origin] + train.citySegments[1:-1] + [destination]})
+
+BACKENDS = {b.name: b for b in [SeleniumBackend, ReplayBackend]}
@@ -0,0 +1,156 @@
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from .backends import SearchBackend
+from .progress import SearchProgress
+
+QUERY_FIELDS = ["origin", "destination", "date"]
+DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d"]
+
+def normalizeQuery(query) -> dict:
+  """
+  Turns a query into {"origin", "destination", "date"} with upper case station codes and a mm/dd/yyyy date.
+
+  Parameters
+  ----------
+  query : dict or list
+      Either keyed by `QUERY_FIELDS` or [origin, destination, date]. Dates may be mm/dd/yyyy or yyyy-mm-dd.
+
+  Raises
+  ------
+  ValueError
+      The query is not a dict or list, a field is missing or the date is not understood.
+  """
+  if isinstance(query, (list, tuple)):
+    query = dict(zip(QUERY_FIELDS, query))
+  if not isinstance(query, dict):
+    raise ValueError(f"Query {query} is not an object or a list.")
+  _missing = [f for f in QUERY_FIELDS if query.get(f) == None or str(query[f]).strip() == '']
+  if _missing:
+    raise ValueError(f"Query {query} is missing {', '.join(_missing)}.")
+  origin, destination, date = [str(query[f]).strip() for f in QUERY_FIELDS]
+
+  for fmt in DATE_FORMATS:
+    try:
+      date = datetime.strptime(date, fmt).strftime("%m/%d/%Y")
+      break
+    except ValueError: pass
+  else:
+    raise ValueError(f"Date '{date}' is not mm/dd/yyyy or yyyy-mm-dd.")
+  return {"origin": origin.upper(), "destination": destination.upper(), "date": date}
+
+def readQueries(path: str) -> list:
+  """
+  Reads queries from a CSV file (with an origin,destination,date header) or a JSON list.
+
+  Parameters
+  ----------
+  path : str
+      '.csv' or '.json' file, '-' reads CSV from standard input.
+
+  Returns
+  -------
+  list[dict]
+      Normalized queries. A query that could not be normalized keeps whatever fields it had and has an "error" key, `runBatch` reports it without searching.
+
+  Raises
+  ------
+  ValueError
+      The file itself could not be parsed.
+  """
+  if path.endswith('.json'):
+    with open(path, 'r') as f:
+      _raw = json.load(f)
+    if not isinstance(_raw, list):
+      raise ValueError(f"{path} is not a JSON list of queries.")
+  else:
+    if path == '-':
+      _raw = list(csv.DictReader(sys.stdin))
+    else:
+      with open(path, 'r', newline='') as f:
+        _raw = list(csv.DictReader(f))
+    _raw = [{k.strip().lower(): v for k, v in row.items() if k != None} for row in _raw]
+  _queries = []
+  for q in _raw:
+    try:
+      _queries.append(normalizeQuery(q))
+    except ValueError as e:
+      _fields = dict(zip(QUERY_FIELDS, q)) if isinstance(q, (list, tuple)) else q if isinstance(q, dict) else {}
+      _queries.append({**{f: '' if _fields.get(f) == None else str(_fields[f]) for f in QUERY_FIELDS}, "error": str(e)})
+  return _queries
+
+class JsonLinesWriter:
+  """Writes one JSON object per query, with its trains or its error."""
+  def __init__(self, stream) -> None:
+    self.stream = stream
+
+  def write(self, query: dict, trains: list, error: str=None) -> None:
+    self.stream.write(json.dumps({**{f: query[f] for f in QUERY_FIELDS}, "ok": error == None, "error": error, "trains": trains}) + '\n')
+    self.stream.flush()
+
+class CsvWriter:
+  """Writes one row per train, prefixed with the query. A failed query is one row with only the error filled in."""
+  COLUMNS = ["Origin", "Destination", "Number", "Name", "Departure Datetime", "Arrival Datetime", "Duration", "Coach Price", "Business Price", "Sleeper Price", "Number of Segments", "City Segments", "Train Segments"]
+
+  def __init__(self, stream) -> None:
+    self.stream = stream
+    self.writer = csv.writer(stream)
+    self.writer.writerow(QUERY_FIELDS + self.COLUMNS + ["error"])
+
+  def write(self, query: dict, trains: list, error: str=None) -> None:
+    _prefix = [query[f] for f in QUERY_FIELDS]
+    if error != None:
+      self.writer.writerow(_prefix + [''] * len(self.COLUMNS) + [error])
+    for train in trains:
+      self.writer.writerow(_prefix + [';'.join(map(str, train[c])) if isinstance(train[c], list) else train[c] for c in self.COLUMNS] + [''])
+    self.stream.flush()
+
+WRITERS = {"jsonl": JsonLinesWriter, "csv": CsvWriter}
+
+def runBatch(queries: list, backend: SearchBackend, writer, concurrency: int=1, progressFactory=None) -> dict:
+  """
+  Runs every query through the backend and writes each result as soon as its search finishes.
+
+  Parameters
+  ----------
+  queries : list[dict]
+      Normalized queries, see `readQueries`. Queries with an "error" key are written as failed without searching.
+  backend : SearchBackend
+  writer : JsonLinesWriter or CsvWriter
+  concurrency : int, optional
+      Searches running at the same time, by default 1
+  progressFactory : function, optional
+      Called with a query, returns the SearchProgress for its search, by default progress is ignored.
+
+  Returns
+  -------
+  dict
+      {"Succeeded": int, "Failed": int}
+  """
+  def _search(query: dict):
+    _progress = progressFactory(query) if progressFactory != None else SearchProgress()
+    return backend.search(query["origin"], query["destination"], query["date"], _progress)
+
+  _counts = {"Succeeded": 0, "Failed": 0}
+  for query in queries:
+    if "error" in query:
+      writer.write(query, [], query["error"])
+      _counts["Failed"] += 1
+  with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+    _futures = {executor.submit(_search, q): q for q in queries if "error" not in q}
+    for future in as_completed(_futures):
+      query = _futures[future]
+      try:
+        result = future.result()
+      except Exception as e:
+        result = e
+      if type(result) == dict:
+        writer.write(query, [train.organizationalUnit for train in result.values()])
+        _counts["Succeeded"] += 1
+      else:
+        writer.write(query, [], str(result).strip() or type(result).__name__)
+        _counts["Failed"] += 1
+  return _counts
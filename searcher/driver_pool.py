@@ -0,0 +1,245 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Condition, Thread
+
+from selenium.common.exceptions import WebDriverException
+
+from .driver import Driver
+from .procmem import treeRss
+from views import config as cfg
+
+class DriverPool:
+  """
+  A pool of webdrivers that are already sitting on the search page, so searches do not have to launch or reload a browser.
+
+  Extended Summary
+  ----------------
+  Sessions are launched in the background when the pool is created. A search borrows one with `acquire` (or the `session` context manager) and hands it back with `release`. A background thread reloads sessions that were returned after an error, replaces sessions whose browser crashed, and recycles the biggest idle session while the pool's browsers use more memory than allowed. Browsers are only ever quit outside the pool's lock, since shutting one down can take seconds.
+
+  Attributes
+  ----------
+  url : str
+      Page every session is warmed up on.
+  size : int
+      Number of sessions kept alive.
+  undetected : bool
+      Whether sessions use the undetected chromedriver.
+  maxMemory : int
+      Upper bound for the summed resident memory of all browsers in MB, including their renderer processes.
+  checkInterval : float
+      Seconds between health checks.
+  isShutdown : bool
+
+  Methods
+  -------
+  acquire(timeout=None)
+      Borrows an idle session, waiting for one if necessary.
+  release(driver, needsReload=False)
+      Returns a session to the pool.
+  session(timeout=None)
+      Context manager around acquire/release.
+  memoryUsage
+      Last known resident memory of the pool's browsers in MB.
+  shutdown
+      Quits every session.
+  """
+  def __init__(self, size: int=cfg.DRIVER_POOL_SIZE, url: str=cfg.SEARCH_URL, undetected: bool=True, maxMemory: int=cfg.DRIVER_POOL_MAX_MEMORY, checkInterval: float=30.) -> None:
+    self.url = url
+    self.size = size
+    self.undetected = undetected
+    self.maxMemory = maxMemory
+    self.checkInterval = checkInterval
+    self.isShutdown = False
+
+    self.__condition = Condition()
+    self.__idle = deque()
+    self.__needsReload = deque()
+    self.__memory = {} # Driver : last known resident memory of its browser in MB
+
+    for _ in range(self.size):
+      self.__launch()
+    Thread(target=self.__maintain, daemon=True).start()
+
+  def __launch(self) -> None:
+    """Starts a new session in the background, it is added to the idle sessions once the page is loaded."""
+    def _launch():
+      try:
+        driver = Driver(self.url, undetected=self.undetected).driver
+      except Exception as e:
+        print("Could not launch a pooled driver.", e)
+        driver = None
+      with self.__condition:
+        _keep = driver != None and not self.isShutdown
+        if _keep:
+          self.__memory[driver] = 0
+          self.__idle.append(driver)
+        self.__condition.notify_all()
+      if driver != None and not _keep: self.__quit(driver)
+
+    Thread(target=_launch, daemon=True).start()
+
+  def __quit(self, driver) -> None:
+    """Quits a browser. Never call it holding the lock."""
+    with self.__condition:
+      self.__memory.pop(driver, None)
+    try: driver.quit()
+    except Exception as e: print(e) # Browser already gone
+
+  def __browserPid(self, driver) -> int:
+    """The undetected chromedriver starts the browser itself, otherwise the browser is a child of chromedriver."""
+    try: return driver.browser_pid
+    except AttributeError: pass
+    try: return driver.service.process.pid
+    except AttributeError: return None
+
+  def __isHealthy(self, driver) -> bool:
+    """Checks if the browser still responds and records its resident memory."""
+    try:
+      driver.execute_script("return 1;")
+    except WebDriverException:
+      return False
+    _pid = self.__browserPid(driver)
+    _rss = treeRss(_pid) if _pid != None else None
+    with self.__condition:
+      if driver in self.__memory: self.__memory[driver] = _rss or 0.
+    return True
+
+  def __replace(self, driver) -> None:
+    self.__quit(driver)
+    if not self.isShutdown: self.__launch()
+
+  def __reload(self, driver) -> None:
+    """Puts a session back on the start page after a failed search."""
+    try:
+      driver.get(self.url)
+      self.release(driver)
+    except WebDriverException:
+      self.__replace(driver)
+
+  def __checkIdle(self) -> None:
+    """Replaces crashed idle sessions and recycles the biggest one while over the memory cap."""
+    with self.__condition:
+      _toCheck = list(self.__idle)
+      self.__idle.clear()
+
+    _healthy = []
+    for driver in _toCheck:
+      if self.__isHealthy(driver): _healthy.append(driver)
+      else: self.__replace(driver)
+
+    if self.memoryUsage() > self.maxMemory and _healthy != []:
+      _biggest = max(_healthy, key=lambda d: self.__memory.get(d, 0))
+      _healthy.remove(_biggest)
+      self.__replace(_biggest)
+
+    with self.__condition:
+      if not self.isShutdown: self.__idle.extend(_healthy)
+      self.__condition.notify_all()
+    if self.isShutdown:
+      for driver in _healthy: self.__quit(driver)
+
+  def __maintain(self) -> None:
+    _lastCheck = time.monotonic()
+    while not self.isShutdown:
+      with self.__condition:
+        if len(self.__needsReload) == 0:
+          self.__condition.wait(timeout=self.checkInterval)
+        _reloads = list(self.__needsReload)
+        self.__needsReload.clear()
+      if self.isShutdown: break
+
+      for driver in _reloads:
+        self.__reload(driver)
+      if time.monotonic() - _lastCheck >= self.checkInterval:
+        self.__checkIdle()
+        _lastCheck = time.monotonic()
+
+  def memoryUsage(self) -> float:
+    """
+    Returns
+    -------
+    float
+        Summed resident memory of all browsers in MB, as of their last health check. 0 where it cannot be read on this system.
+    """
+    with self.__condition:
+      return sum(self.__memory.values())
+
+  def acquire(self, timeout: float=None):
+    """
+    Borrows an idle session.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds to wait for a session, by default None (wait forever)
+
+    Returns
+    -------
+    WebDriver
+
+    Raises
+    ------
+    TimeoutError
+        No session became available in time, or the pool was shut down.
+    """
+    with self.__condition:
+      _ready = self.__condition.wait_for(lambda: len(self.__idle) > 0 or self.isShutdown, timeout=timeout)
+      if not _ready or self.isShutdown:
+        raise TimeoutError("No browser session is available right now.")
+      return self.__idle.popleft()
+
+  def release(self, driver, needsReload: bool=False) -> None:
+    """
+    Returns a session to the pool.
+
+    Parameters
+    ----------
+    driver : WebDriver
+    needsReload : bool, optional
+        If True, the session is put back on the start page before it is handed out again, by default False
+    """
+    with self.__condition:
+      _quit = self.isShutdown
+      if _quit: pass # Quit below, outside the lock
+      elif needsReload: self.__needsReload.append(driver)
+      else: self.__idle.append(driver)
+      self.__condition.notify_all()
+    if _quit: self.__quit(driver)
+
+  @contextmanager
+  def session(self, timeout: float=None):
+    """
+    Borrows a session for the duration of a `with` block. It is reloaded if the block raises.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Seconds to wait for a session, by default None (wait forever)
+    """
+    driver = self.acquire(timeout)
+    _failed = False
+    try:
+      yield driver
+    except Exception:
+      _failed = True
+      raise
+    finally:
+      self.release(driver, needsReload=_failed)
+
+  def shutdown(self) -> None:
+    """Quits every session. Sessions that are still borrowed are quit when they are released."""
+    with self.__condition:
+      self.isShutdown = True
+      _drivers = list(self.__idle) + list(self.__needsReload)
+      self.__idle.clear()
+      self.__needsReload.clear()
+      self.__condition.notify_all()
+    for driver in _drivers: self.__quit(driver)
+
+if __name__ == "__main__":
+  pool = DriverPool(size=2)
+  with pool.session() as d:
+    print(d.current_url)
+  print(f"{pool.memoryUsage():.1f} MB")
+  pool.shutdown()
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from views import config as cfg
+
+class ImageCache:
+  """
+  A class to keep city photos that are already cropped and resized, on disk and the most recent ones in memory.
+
+  Entries are keyed by 'City, State' and the photo dimensions, and stored as encoded image bytes so they can be shared between threads. The oldest files are removed once there are more than `maxFiles`.
+
+  Attributes
+  ----------
+  directory : str
+  maxFiles : int
+  stats : dict
+      {"Memory Hits", "Disk Hits", "Misses", "Stored"}
+
+  Methods
+  -------
+  get(city, dims)
+      Returns the cached photo bytes, or None.
+  has(city, dims)
+      Checks for a photo without reading it.
+  put(city, dims, data)
+      Stores photo bytes.
+  """
+  def __init__(self, directory: str=os.path.join(cfg.DATA_DIR, "images"), maxFiles: int=cfg.IMAGE_CACHE_MAX_FILES, memoryItems: int=32) -> None:
+    self.directory = directory
+    self.maxFiles = maxFiles
+    self.stats = {"Memory Hits": 0, "Disk Hits": 0, "Misses": 0, "Stored": 0}
+    self.__memoryItems = memoryItems
+    self.__memory = OrderedDict()
+    self.__lock = threading.Lock()
+    os.makedirs(directory, exist_ok=True)
+
+  def __path(self, city: str, dims: list[int]) -> str:
+    _key = f"{city.strip().lower()}|{dims[0]}x{dims[1]}"
+    return os.path.join(self.directory, hashlib.sha1(_key.encode('utf-8')).hexdigest() + ".img")
+
+  def __remember(self, path: str, data: bytes) -> None:
+    self.__memory[path] = data
+    self.__memory.move_to_end(path)
+    while len(self.__memory) > self.__memoryItems:
+      self.__memory.popitem(last=False)
+
+  def get(self, city: str, dims: list[int]) -> bytes:
+    _path = self.__path(city, dims)
+    with self.__lock:
+      if _path in self.__memory:
+        self.__memory.move_to_end(_path)
+        self.stats["Memory Hits"] += 1
+        return self.__memory[_path]
+    try:
+      with open(_path, 'rb') as f:
+        data = f.read()
+      os.utime(_path) # Recently used files are pruned last
+    except OSError:
+      with self.__lock: self.stats["Misses"] += 1
+      return None
+    with self.__lock:
+      self.__remember(_path, data)
+      self.stats["Disk Hits"] += 1
+    return data
+
+  def has(self, city: str, dims: list[int]) -> bool:
+    _path = self.__path(city, dims)
+    return _path in self.__memory or os.path.exists(_path)
+
+  def put(self, city: str, dims: list[int], data: bytes) -> None:
+    _path = self.__path(city, dims)
+    _temp = f"{_path}.{threading.get_ident()}.tmp"
+    try:
+      with open(_temp, 'wb') as f:
+        f.write(data)
+      os.replace(_temp, _path) # Readers never see half a file
+    except OSError as e:
+      print(e)
+      return
+    with self.__lock:
+      self.__remember(_path, data)
+      self.stats["Stored"] += 1
+    self.__prune()
+
+  def __prune(self) -> None:
+    try:
+      _files = [e for e in os.scandir(self.directory) if e.name.endswith(".img")]
+      if len(_files) <= self.maxFiles: return
+      _files.sort(key=lambda e: e.stat().st_mtime)
+      for entry in _files[:len(_files)-self.maxFiles]:
+        os.remove(entry.path)
+    except OSError as e:
+      print(e)
+
+class ImagePrefetcher:
+  """
+  A class to fill an ImageCache in the background, one city at a time, using the image area's provider.
+
+  The provider lock is only taken between the image area's own searches: a prefetch waits while the lock is held and pauses after each photo, so a station the user picks never waits for more than one prefetch.
+
+  Attributes
+  ----------
+  catcher : ImageSearch
+  lock : threading.Lock
+      Guards `catcher`'s provider, which may be a browser.
+  dims : list[int]
+
+  Methods
+  -------
+  want(cities, first=False)
+      Queues cities to fetch if they are not cached yet.
+  stop
+      Stops after the current photo.
+  """
+  def __init__(self, catcher, lock: threading.Lock, dims: list[int]=cfg.IMAGE_DIMENSIONS, pause: float=cfg.IMAGE_PREFETCH_PAUSE) -> None:
+    self.catcher = catcher
+    self.lock = lock
+    self.dims = dims
+    self.__pause = pause
+    self.__queue = queue.PriorityQueue()
+    self.__queued = set()
+    self.__order = 0
+    self.__stopped = threading.Event()
+    self.__thread = threading.Thread(target=self.__run, name="ImagePrefetcher", daemon=True)
+    self.__thread.start()
+
+  def want(self, cities: list[str], first: bool=False) -> None:
+    """
+    Queues cities to fetch.
+
+    Parameters
+    ----------
+    cities : list[str]
+        'City, State' strings, ones already cached or queued are skipped.
+    first : bool, optional
+        Fetch these before anything queued earlier, by default False
+    """
+    for city in cities:
+      if city == None or city in self.__queued or self.catcher.cache.has(city, self.dims): continue
+      self.__queued.add(city)
+      self.__order += 1
+      self.__queue.put((0 if first else 1, self.__order, city))
+
+  def stop(self) -> None:
+    self.__stopped.set()
+    self.__queue.put((-1, 0, None))
+
+  def __run(self) -> None:
+    while not self.__stopped.is_set():
+      _, _, city = self.__queue.get()
+      if city == None: break
+      self.__queued.discard(city)
+      while not self.lock.acquire(timeout=self.__pause):
+        if self.__stopped.is_set(): return
+      try:
+        if not self.catcher.cache.has(city, self.dims): self.catcher.cacheImage(city, self.dims)
+      except Exception as e: # The provider may fail on any city, or be closing
+        print(e)
+      finally:
+        self.lock.release()
+      self.__stopped.wait(self.__pause)
@@ -0,0 +1,187 @@
+import base64
+import json
+import os
+import re
+import urllib.parse
+import urllib.request
+
+from views import config as cfg
+
+class ImageProvider:
+  """
+  A class that finds a photo of a city. `photo` is called by one thread at a time.
+
+  Methods
+  -------
+  photo(city)
+      Returns the encoded image (any format PIL reads), or None if there is none.
+  close
+      Releases anything the provider holds on to.
+  """
+  name = ""
+
+  def photo(self, city: str) -> bytes:
+    raise NotImplementedError
+
+  def close(self) -> None:
+    pass
+
+class LocalImageProvider(ImageProvider):
+  """
+  Reads photos from a folder shipped with the app, one file per city named by `fileName`.
+
+  Attributes
+  ----------
+  directory : str
+  """
+  name = "local"
+  EXTENSIONS = [".jpg", ".jpeg", ".png", ".webp"]
+
+  def __init__(self, directory: str=cfg.IMAGE_PACK_DIR) -> None:
+    self.directory = directory
+
+  @staticmethod
+  def fileName(city: str) -> str:
+    """'Portland, OR' -> 'portland-or'"""
+    return re.sub(r"[^a-z0-9]+", "-", city.lower()).strip("-")
+
+  def photo(self, city: str) -> bytes:
+    _base = os.path.join(self.directory, self.fileName(city))
+    for extension in self.EXTENSIONS:
+      try:
+        with open(_base + extension, 'rb') as f:
+          return f.read()
+      except OSError:
+        pass
+    return None
+
+  def add(self, city: str, data: bytes, extension: str=".jpg") -> None:
+    """Saves a photo into the pack, for building one."""
+    os.makedirs(self.directory, exist_ok=True)
+    with open(os.path.join(self.directory, self.fileName(city) + extension), 'wb') as f:
+      f.write(data)
+
+class HttpImageProvider(ImageProvider):
+  """
+  Finds the lead image of the city's Wikipedia article with two plain HTTP requests, no browser.
+
+  Attributes
+  ----------
+  timeout : float
+      Seconds each request may take.
+  width : int
+      Width of the thumbnail asked for, larger than shown so cropping keeps it sharp.
+  """
+  name = "http"
+  API_URL = "https://en.wikipedia.org/w/api.php"
+
+  def __init__(self, timeout: float=cfg.IMAGE_HTTP_TIMEOUT, width: int=cfg.IMAGE_DIMENSIONS[0]*2) -> None:
+    self.timeout = timeout
+    self.width = width
+
+  def __get(self, url: str) -> bytes:
+    _request = urllib.request.Request(url, headers={"User-Agent": f"{cfg.APP_NAME}/{cfg.APP_VERSION}"})
+    with urllib.request.urlopen(_request, timeout=self.timeout) as connection:
+      return connection.read()
+
+  def photo(self, city: str) -> bytes:
+    _query = urllib.parse.urlencode({
+      "action": "query", "format": "json", "generator": "search", "gsrsearch": city, "gsrlimit": 1, "gsrnamespace": 0,
+      "prop": "pageimages", "piprop": "thumbnail", "pithumbsize": self.width})
+    _pages = json.loads(self.__get(f"{self.API_URL}?{_query}")).get("query", {}).get("pages", {})
+    for page in _pages.values():
+      _source = page.get("thumbnail", {}).get("source")
+      if _source != None: return self.__get(_source)
+    return None
+
+class SeleniumImageProvider(ImageProvider):
+  """
+  Takes the first Google Images result for the city, in a headless Chrome started the first time it is needed. Only used when the other providers find nothing, since the browser costs as much memory as the search one.
+
+  Attributes
+  ----------
+  driver : WebDriver
+      `None` until the first photo is asked for.
+  """
+  name = "selenium"
+
+  def __init__(self) -> None:
+    self.driver = None
+
+  def photo(self, city: str) -> bytes:
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    if self.driver == None:
+      from .driver import Driver
+      self.driver = Driver().driver
+
+    self.driver.get(f"https://www.google.com/search?tbm=isch&q={urllib.parse.quote(city)}")
+    image = WebDriverWait(self.driver,5).until(EC.presence_of_element_located((By.XPATH, "//img[@class='rg_i Q4LuWd']")))
+
+    try: # Try and get image from URL and not base64 preview from google
+      self.driver.find_element(By.XPATH, "//div[@class='bRMDJf islir']").click()
+      bigImageArea = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//img[@class='n3VNCb']")))
+      with urllib.request.urlopen(bigImageArea.get_attribute('src')) as connection:
+        return connection.read()
+    except:
+      s = image.get_attribute('src')
+      if s != None and s.startswith('data:image/') and ';base64,' in s:
+        return base64.b64decode(s.split(';base64,')[1])
+      return None
+
+  def close(self) -> None:
+    if self.driver != None:
+      self.driver.close()
+      self.driver.quit()
+      self.driver = None
+
+class ImageProviderChain(ImageProvider):
+  """
+  Asks each provider in turn until one has a photo. A provider that fails is skipped for that city.
+
+  Attributes
+  ----------
+  providers : list[ImageProvider]
+  lastProvider : str
+      Name of the provider that found the last photo.
+  """
+  name = "chain"
+
+  def __init__(self, providers: list[ImageProvider]) -> None:
+    self.providers = providers
+    self.lastProvider = None
+
+  def photo(self, city: str) -> bytes:
+    for provider in self.providers:
+      try:
+        data = provider.photo(city)
+      except Exception as e: # Network errors, timeouts, browser errors
+        print(f"{provider.name} image provider: {e}")
+        continue
+      if data != None:
+        self.lastProvider = provider.name
+        return data
+    return None
+
+  def close(self) -> None:
+    for provider in self.providers:
+      provider.close()
+
+PROVIDERS = {"local": LocalImageProvider, "http": HttpImageProvider, "selenium": SeleniumImageProvider}
+
+def makeProvider(names: list[str]=cfg.IMAGE_PROVIDERS) -> ImageProvider:
+  """
+  Builds the providers in `names`, tried in that order.
+
+  Parameters
+  ----------
+  names : list[str], optional
+      Keys of `PROVIDERS`, by default `cfg.IMAGE_PROVIDERS`
+
+  Returns
+  -------
+  ImageProvider
+  """
+  _providers = [PROVIDERS[name]() for name in names]
+  return _providers[0] if len(_providers) == 1 else ImageProviderChain(_providers)
@@ -1,17 +1,16 @@
-import PIL.Image, PIL.ImageTk, PIL.ImageFile
 from tkinter import PhotoImage
 from io import BytesIO
-import base64
-import urllib.parse
-import urllib.request
 from tkinter import TclError
 from fractions import Fraction
 
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
+from lazyimport import lazy
+from .image_cache import ImageCache
+from .image_providers import ImageProvider, makeProvider
 
-from .driver import Driver
+# Only needed once a photo is shown
+Image = lazy("PIL.Image")
+ImageTk = lazy("PIL.ImageTk")
+ImageFile = lazy("PIL.ImageFile")
 
 class ImageSearch:
   """
@@ -19,7 +18,10 @@ class ImageSearch:
 
   Attributes
   ----------
-  driver : Driver
+  provider : ImageProvider
+      Finds the photos, by default the providers in `cfg.IMAGE_PROVIDERS`.
+  cache : ImageCache
+      Photos already cropped and resized, `None` to always search.
   photo_city1 : PhotoImage
   photo_city2 : PhotoImage
   name_city1 : str
@@ -27,8 +29,14 @@ class ImageSearch:
 
   Methods
   -------
-  loadImage(c, no, dims)
-      Returns an image object for a specified city.
+  loadImage(c, no, dims, cachedOnly=False)
+      Shows a photo of a city, from the cache when it has one.
+  showImage(c, no, data)
+      Shows a photo already found. Runs on the Tk thread.
+  cacheImage(c, dims)
+      Finds a city photo, resizes it and stores it in the cache.
+  close
+      Closes the provider.
   doCitySwap
       Swaps the city photo objects without finding new ones.
   getCityName(cityNo)
@@ -38,75 +46,32 @@ class ImageSearch:
   getCityPhoto(cityNo)
       Returns a city's photo object.
   """
-  def __init__(self) -> None:
-    self.driver = Driver().driver
-    PIL.ImageFile.LOAD_TRUNCATED_IMAGES = True
+  def __init__(self, cache: ImageCache=None, provider: ImageProvider=None) -> None:
+    self.provider = provider if provider != None else makeProvider()
+    self.cache = cache
 
     self.photo_city1 = None
     self.photo_city2 = None
     self.name_city1 = None
     self.name_city2 = None
 
-  def __returnCityPhoto(self, c: str) -> list:
+  def cacheImage(self, c: str, dims: list[int]) -> bytes:
     """
-    Searches Google for the first image of a city and saves it.
+    Finds an image of a city, crops and resizes it, and stores it in the cache. Callers hold the image area's lock, the provider may use a browser.
 
     Parameters
     ----------
     c : str
         'City, State'
+    dims : list
+        Width and height of output image.
 
     Returns
     -------
-    list[str, bytes]
-        Returns a list with type of image (Image "Img" or Base64 "B64") and the raw data.
-    """
-    URL = f"https://www.google.com/search?tbm=isch&q={urllib.parse.quote(c)}"
-    self.driver.get(URL)
-    image = WebDriverWait(self.driver,5).until(EC.presence_of_element_located((By.XPATH, "//img[@class='rg_i Q4LuWd']")))
-
-    def checkIfB64(src: str) -> str:
-      header = src.split(',')[0]
-      if header.startswith('data') and ';base64' in header:
-        imgType = header.replace('data:image/', '').replace(';base64', '')
-        return imgType
-      return None
-    
-    def getHiDef() -> list: # Try and get image from URL and not base64 preview from google
-      try:
-        self.driver.find_element(By.XPATH, "//div[@class='bRMDJf islir']").click()
-        bigImageArea = WebDriverWait(self.driver, 5).until(EC.presence_of_element_located((By.XPATH, "//img[@class='n3VNCb']")))
-        imageLink = bigImageArea.get_attribute('src')
-        with urllib.request.urlopen(imageLink) as connection:
-          raw_data = connection.read()
-        return ["Img", raw_data]
-
-      except:
-        s = image.get_attribute('src')
-        if s is not None:
-          if checkIfB64(s):
-            return ["B64", (s.split(';base64,')[1])]
-          else:
-            return None
-        else:
-          return None
-
-    return getHiDef()
-
-  def loadImage(self, c: str, no: int, dims: list[int]) -> None:
-    """
-    Finds an image for a given city and returns an image object with specified dimensions.
-
-    Parameters
-    ----------
-    c : str
-        'City, State'
-    no : int
-        Accepts 1 (left/origin) or 2 (right/destination).
-    dims : list
-        Width and height of output image.
+    bytes
+        The resized image, PNG encoded, or None if no provider found one.
     """
-    def crop_resize(image: PIL.Image) -> PIL.Image:
+    def crop_resize(image: "PIL.Image") -> "PIL.Image":
       ratio = Fraction(dims[0], dims[1])
       size = dims
       # crop to ratio, center
@@ -122,23 +87,73 @@ class ImageSearch:
       #  image.thumbnail(size, PIL.Image.ANTIALIAS)
       return image
     
-    try:
-      onlineImage = self.__returnCityPhoto(c)
-      if onlineImage[0] == "B64":
-        onlineImage[1] = (base64.b64decode(onlineImage[1]))
+    onlineImage = self.provider.photo(c)
+    if onlineImage == None: return None
+
+    fh = BytesIO(onlineImage)
+    ImageFile.LOAD_TRUNCATED_IMAGES = True
+    img = Image.open(fh, mode='r')
+    img = crop_resize(img)
+    img.thumbnail((dims), Image.LANCZOS)
+    out = BytesIO()
+    img.save(out, format='PNG')
+    if self.cache != None: self.cache.put(c, dims, out.getvalue())
+    return out.getvalue()
+
+  def loadImage(self, c: str, no: int, dims: list[int], cachedOnly: bool=False) -> bool:
+    """
+    Shows an image for a given city with specified dimensions, searching for one if it is not cached.
 
-      fh = BytesIO(onlineImage[1])
-      img = PIL.Image.open(fh, mode='r')
-      img = crop_resize(img)
-      img.thumbnail((dims), PIL.Image.ANTIALIAS)
-      render = PIL.ImageTk.PhotoImage(image=img)
+    Parameters
+    ----------
+    c : str
+        'City, State'
+    no : int
+        Accepts 1 (left/origin) or 2 (right/destination).
+    dims : list
+        Width and height of output image.
+    cachedOnly : bool, optional
+        Do not search if the city is not cached, by default False
 
+    Returns
+    -------
+    bool
+        False if `cachedOnly` and the city is not cached.
+    """
+    data = self.cache.get(c, dims) if self.cache != None else None
+    if data == None:
+      if cachedOnly: return False
+      data = self.cacheImage(c, dims)
+    self.showImage(c, no, data)
+    return True
+
+  def showImage(self, c: str, no: int, data: bytes) -> None:
+    """
+    Makes the photo object for an image found by `cacheImage` or in the cache. Creates a Tk image, so only call it from the Tk thread.
+
+    Parameters
+    ----------
+    c : str
+        'City, State'
+    no : int
+        Accepts 1 (left/origin) or 2 (right/destination).
+    data : bytes
+        PNG image, None to show no photo.
+    """
+    if data == None:
+      self.setCityPhoto(no, None)
+      self.__setCityName(no, c)
+      return
+    try:
+      render = ImageTk.PhotoImage(image=Image.open(BytesIO(data), mode='r'))
       self.setCityPhoto(no, render)
       self.__setCityName(no, c)
-      print(img.size)
     except TclError as e:
       print(e)
 
+  def close(self) -> None:
+    self.provider.close()
+
   def doCitySwap(self) -> None:
     """
     Swaps images and city names for the origin and destination.
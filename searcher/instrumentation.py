@@ -0,0 +1,167 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class SearchTracer:
+  """
+  A class to record how long each phase of a search takes. Spans from all searches are kept, so phases can be compared across searches. Searches can overlap, so each span is given the id of its search by whoever records it.
+
+  Attributes
+  ----------
+  spans : deque[dict]
+      Recorded spans with name, search, thread, start and end (perf_counter_ns).
+  searches : dict
+      Search id : label.
+  currentSearch : int
+      Id of the latest search.
+
+  Methods
+  -------
+  beginSearch(label)
+      Starts a new search, returns its id for the spans that belong to it.
+  span(name, search=None)
+      Context manager that records the time spent inside it.
+  record(name, start, end, search=None)
+      Records a span that was timed elsewhere.
+  summary
+      Aggregated durations per phase.
+  searchReport(search=None)
+      Time spent in each phase of one search, as text.
+  exportJson(path)
+      Writes spans and summary as JSON.
+  exportChromeTrace(path)
+      Writes spans in Chrome trace format (chrome://tracing, Perfetto).
+  """
+  def __init__(self, maxSpans: int=20000) -> None:
+    self.spans = deque(maxlen=maxSpans)
+    self.searches = dict()
+    self.currentSearch = 0
+    self.__lock = threading.Lock()
+    self.__origin = time.perf_counter_ns()
+
+  def beginSearch(self, label: str) -> int:
+    """
+    Parameters
+    ----------
+    label : str
+        Description of the search, e.g. 'WAS-NYP 03/29/2022'.
+
+    Returns
+    -------
+    int
+        Id of the new search.
+    """
+    with self.__lock:
+      self.currentSearch += 1
+      self.searches[self.currentSearch] = label
+      return self.currentSearch
+
+  def record(self, name: str, start: int, end: int, search: int=None) -> None:
+    """
+    Parameters
+    ----------
+    name : str
+        Phase name.
+    start : int
+        `perf_counter_ns` at the start of the phase.
+    end : int
+        `perf_counter_ns` at the end of the phase.
+    search : int, optional
+        Id from `beginSearch` of the search the phase is part of, by default none.
+    """
+    with self.__lock:
+      self.spans.append({"name": name, "search": search, "thread": threading.get_ident(), "start": start, "end": end})
+
+  @contextmanager
+  def span(self, name: str, search: int=None):
+    _start = time.perf_counter_ns()
+    try:
+      yield
+    finally:
+      self.record(name, _start, time.perf_counter_ns(), search)
+
+  def summary(self) -> dict:
+    """
+    Returns
+    -------
+    dict
+        Phase name : {"Count", "Total", "Mean", "Median", "P95", "Max"}, durations in ms. Phases are in the order they first ran.
+    """
+    with self.__lock:
+      _spans = list(self.spans)
+    _durations = {}
+    for s in _spans:
+      _durations.setdefault(s["name"], []).append((s["end"] - s["start"]) / 1e6)
+
+    _summary = {}
+    for name, durations in _durations.items():
+      durations.sort()
+      _summary[name] = {
+        "Count": len(durations),
+        "Total": sum(durations),
+        "Mean": statistics.fmean(durations),
+        "Median": statistics.median(durations),
+        "P95": durations[min(len(durations)-1, int(len(durations)*0.95))],
+        "Max": durations[-1]}
+    return _summary
+
+  def searchReport(self, search: int=None) -> str:
+    """
+    Parameters
+    ----------
+    search : int, optional
+        Search id, by default the latest search.
+
+    Returns
+    -------
+    str
+        The search's label, one line per phase with its duration, and the time from the first phase to the end of the last. Empty if no spans were recorded for the search.
+    """
+    with self.__lock:
+      search = search if search != None else self.currentSearch
+      _spans = [s for s in self.spans if s["search"] == search]
+      _label = self.searches.get(search, str(search))
+    if search == None or not _spans: return ""
+    _durations = {}
+    for s in _spans:
+      _durations[s["name"]] = _durations.get(s["name"], 0) + (s["end"] - s["start"]) / 1e6
+    _lines = [_label] + [f"{name:<24}{ms:>9.0f} ms" for name, ms in _durations.items()]
+    _lines.append(f"{'Total':<24}{(max(s['end'] for s in _spans) - min(s['start'] for s in _spans)) / 1e6:>9.0f} ms")
+    return '\n'.join(_lines)
+
+  def clear(self) -> None:
+    with self.__lock:
+      self.spans.clear()
+      self.searches.clear()
+
+  def exportJson(self, path: str) -> None:
+    with self.__lock:
+      _spans = list(self.spans)
+      _searches = dict(self.searches)
+    with open(path, 'w') as outfile:
+      json.dump({"searches": _searches, "spans": _spans, "summary": self.summary()}, outfile, indent=2)
+
+  def exportChromeTrace(self, path: str) -> None:
+    """Writes complete ("X") events with microsecond timestamps, one row per thread, the search label in the event args."""
+    with self.__lock:
+      _spans = list(self.spans)
+      _searches = dict(self.searches)
+    _events = []
+    for s in _spans:
+      _events.append({
+        "name": s["name"],
+        "cat": "search",
+        "ph": "X",
+        "ts": (s["start"] - self.__origin) / 1000.,
+        "dur": (s["end"] - s["start"]) / 1000.,
+        "pid": os.getpid(),
+        "tid": s["thread"],
+        "args": {"search": _searches.get(s["search"], s["search"])}})
+    with open(path, 'w') as outfile:
+      json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, outfile)
+
+tracer = SearchTracer()
@@ -0,0 +1,334 @@
+"""
+Builds whole rail pass itineraries from a list of cities to visit, instead of one search per leg by hand.
+
+Usage
+-----
+python3 -m searcher.optimizer
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from itertools import permutations
+
+from .backends import SearchBackend
+from .batch import DATE_FORMATS
+from traintracks.train import RailPass, Train
+from views import config as cfg
+
+EXACT_LIMIT = 7 # Most visits whose orders are all enumerated, more use a nearest neighbour tour
+MIN_CONNECTION = timedelta(hours=1) # Same-day connections need at least this long between trains
+LONGEST_LEG = timedelta(days=3) # Departures are searched from this long before a visit's earliest arrival
+
+def toDate(value) -> date:
+  """Accepts a date, datetime, or a mm/dd/yyyy or yyyy-mm-dd string."""
+  if value == None or type(value) == date: return value
+  if isinstance(value, datetime): return value.date()
+  for fmt in DATE_FORMATS:
+    try:
+      return datetime.strptime(value.strip(), fmt).date()
+    except ValueError: pass
+  raise ValueError(f"Date '{value}' is not mm/dd/yyyy or yyyy-mm-dd.")
+
+class Visit:
+  """
+  A city to visit on the trip.
+
+  Attributes
+  ----------
+  code : str
+      Station code.
+  nights : int
+      Nights to stay, 0 to change trains without stopping over.
+  earliest : datetime.date
+      Earliest arrival date, None for any.
+  latest : datetime.date
+      Latest arrival date, None for any.
+  """
+  def __init__(self, code: str, nights: int=1, earliest=None, latest=None) -> None:
+    self.code = code.upper()
+    self.nights = max(0, int(nights))
+    self.earliest = toDate(earliest)
+    self.latest = toDate(latest)
+    if self.earliest != None and self.latest != None and self.latest < self.earliest:
+      raise ValueError(f"Visit to {self.code} ends before it begins.")
+
+  def __repr__(self) -> str:
+    return f"Visit({self.code}, {self.nights}, {self.earliest}, {self.latest})"
+
+def travelHours(train: Train) -> float:
+  return (train.arrival - train.departure).total_seconds() / 3600
+
+def trainPrice(train: Train, fareClass: str="Coach Price"):
+  """Price of the fare class as a number, None when the class is not sold on this train."""
+  _price = train.organizationalUnit.get(fareClass)
+  try:
+    return float(str(_price).replace('$', '').replace(',', '')) if _price not in (None, '', 'N/A') else None
+  except ValueError:
+    return None
+
+OBJECTIVES = {
+  "time": lambda train, fareClass: travelHours(train),
+  "price": lambda train, fareClass: trainPrice(train, fareClass),
+  "transfers": lambda train, fareClass: (train.numberOfSegments - 1) * 1000 + travelHours(train)}
+
+class ItineraryOptimizer:
+  """
+  A class to find the best itineraries for a trip through several cities.
+
+  Visit orders are enumerated (or built with a nearest neighbour tour when there are many visits) and pruned by their date windows, so only the most promising `maxOrderings` are searched. The searches every kept order needs are de-duplicated and run concurrently, earlier results are reused from `cache`. Each order is then solved exactly by dynamic programming over its legs.
+
+  Attributes
+  ----------
+  backend : SearchBackend
+  network : RailNetwork
+      Used to rank visit orders by distance, None ranks them by date windows only.
+  concurrency : int
+      Searches running at the same time.
+  maxOrderings : int
+  datesPerLeg : int
+      Departure dates searched for each leg.
+  cache : dict
+      (origin, destination, mm/dd/yyyy) : search results or error. May be shared between optimizers.
+  stats : dict
+      Counters of the last `plan`.
+
+  Methods
+  -------
+  plan(origin, start, visits, returnTo=None, end=None, objective="time", fareClass="Coach Price", keepOrder=False, top=3)
+      Returns the best itineraries, each with a RailPass.
+  """
+  def __init__(self, backend: SearchBackend, network=None, concurrency: int=cfg.DRIVER_POOL_SIZE, maxOrderings: int=cfg.OPTIMIZER_MAX_ORDERINGS, datesPerLeg: int=cfg.OPTIMIZER_DATES_PER_LEG, cache: dict=None) -> None:
+    self.backend = backend
+    self.network = network
+    self.concurrency = max(1, concurrency)
+    self.maxOrderings = maxOrderings
+    self.datesPerLeg = max(1, datesPerLeg)
+    self.cache = cache if cache != None else {}
+    self.stats = {}
+
+  # Orders
+
+  def __distance(self, a: str, b: str) -> float:
+    if self.network == None: return 0.
+    return self.network.distance(a, b)
+
+  def __estimate(self, stops: list) -> float:
+    return sum(self.__distance(a, b) for a, b in zip(stops, stops[1:]))
+
+  def __dateBounds(self, start: date, end: date, order: list, returnTo: str):
+    """
+    Returns ([earliest departure], [latest departure or None]) for every leg of an order, or None when the date windows cannot be met in this order. Earliest dates assume a leg arrives the day it departs, they are raised as real trains are found.
+    """
+    _earliest = []
+    _day = start
+    for visit in order:
+      _arrive = max(_day, visit.earliest) if visit.earliest != None else _day
+      if visit.latest != None and _arrive > visit.latest: return None
+      _earliest.append(max(_day, visit.earliest - LONGEST_LEG) if visit.earliest != None else _day)
+      _day = _arrive + timedelta(days=visit.nights)
+    if returnTo != None:
+      if end != None and _day > end: return None
+      _earliest.append(_day)
+
+    # Latest departures, backwards from the arrival windows and the nights at each visit
+    _legs = len(_earliest)
+    _latest = [None] * _legs
+    for i in reversed(range(_legs)):
+      _bounds = []
+      _arriveBy = order[i].latest if i < len(order) else end
+      if _arriveBy != None: _bounds.append(_arriveBy)
+      if i+1 < _legs and _latest[i+1] != None: _bounds.append(_latest[i+1] - timedelta(days=order[i].nights))
+      _latest[i] = min(_bounds) if _bounds else None
+    return _earliest, _latest
+
+  def __orders(self, origin: str, visits: list, returnTo: str, keepOrder: bool):
+    """Yields candidate visit orders."""
+    if keepOrder or len(visits) < 2:
+      yield list(visits)
+    elif len(visits) <= EXACT_LIMIT:
+      yield from (list(o) for o in permutations(visits))
+    else:
+      # Nearest neighbour tour, then the same tour sorted by date windows
+      _left, _tour, _at = list(visits), [], origin
+      while _left:
+        _next = min(_left, key=lambda v: (v.earliest or date.min, self.__distance(_at, v.code)))
+        _tour.append(_next)
+        _left.remove(_next)
+        _at = _next.code
+      yield _tour
+      yield sorted(visits, key=lambda v: (v.earliest or date.min, v.latest or date.max))
+
+  # Searches
+
+  def __runSearches(self, queries: set) -> None:
+    """Fills `cache` with the results of every query not already in it."""
+    _missing = [q for q in queries if q not in self.cache]
+    self.stats["Cache Hits"] += len(queries) - len(_missing)
+    self.stats["Searches"] += len(_missing)
+    if not _missing: return
+    with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+      _futures = {executor.submit(self.backend.search, *q): q for q in _missing}
+      for future in as_completed(_futures):
+        try:
+          self.cache[_futures[future]] = future.result()
+        except Exception as e:
+          self.cache[_futures[future]] = e
+
+  def __legQueries(self, leg: tuple):
+    """Yields a search query for every departure date of a leg."""
+    _from, _to, _first, _last = leg
+    _day = _first
+    while _day <= _last:
+      yield (_from, _to, _day.strftime("%m/%d/%Y"))
+      _day += timedelta(days=1)
+
+  def __trainsFor(self, leg: tuple) -> list:
+    """Returns [(train, search query, result index)] for every date of a leg."""
+    _trains = []
+    for query in self.__legQueries(leg):
+      results = self.cache.get(query)
+      if type(results) == dict:
+        _trains.extend((train, query, index) for index, train in results.items())
+    return _trains
+
+  # Solving
+
+  def __window(self, state: dict, i: int) -> tuple:
+    """Returns leg i of an order as (from, to, first date, last date), starting when the best trains so far are ready to leave, or None if that is too late."""
+    _first = state["Earliest"][i]
+    if i > 0:
+      _nights = state["Order"][i-1].nights
+      _ready = min(path[-1][0].arrival.date() + timedelta(days=_nights) for _, path in state["Frontier"])
+      _first = max(_first, _ready)
+    _last = _first + timedelta(days=self.datesPerLeg-1)
+    if state["Latest"][i] != None: _last = min(_last, state["Latest"][i])
+    if _last < _first: return None
+    return (state["Stops"][i], state["Stops"][i+1], _first, _last)
+
+  def __advance(self, state: dict, i: int, window: tuple, score, end: date) -> bool:
+    """
+    One step of dynamic programming over the legs of an order: keeps, for every train on leg i, the cheapest path of earlier trains it can follow. Returns False when no train fits.
+    A leg can follow another once the nights at the visit have passed, and must arrive within the visit's window.
+    """
+    _visit = state["Order"][i] if i < len(state["Order"]) else None
+    _frontier = []
+    for train, query, index in self.__trainsFor(window):
+      _cost = score(train)
+      if _cost == None: continue
+      _arrival = train.arrival.date()
+      if _visit != None:
+        if _visit.earliest != None and _arrival < _visit.earliest: continue
+        if _visit.latest != None and _arrival > _visit.latest: continue
+      elif end != None and _arrival > end: continue
+
+      if i == 0:
+        _frontier.append((_cost, [(train, query, index)]))
+        continue
+      _options = [(total, path) for total, path in state["Frontier"] if self.__connects(path[-1][0], train, state["Order"][i-1].nights)]
+      if _options:
+        total, path = min(_options, key=lambda p: p[0])
+        _frontier.append((total + _cost, path + [(train, query, index)]))
+    state["Frontier"] = _frontier
+    return len(_frontier) > 0
+
+  def __connects(self, previous: Train, train: Train, nights: int) -> bool:
+    if nights == 0: return train.departure >= previous.arrival + MIN_CONNECTION
+    return train.departure.date() >= previous.arrival.date() + timedelta(days=nights)
+
+  def __makeRailPass(self, path: list) -> RailPass:
+    railPass = RailPass()
+    for train, query, index in path:
+      railPass.addSearch(query[0], query[1], datetime.strptime(query[2], "%m/%d/%Y").date(), self.cache[query])
+      railPass.createSegment(train, railPass.numSearches)
+      railPass.updateSearch(railPass.numSearches, [index])
+    return railPass
+
+  def plan(self, origin: str, start, visits: list, returnTo: str=None, end=None, objective: str="time", fareClass: str="Coach Price", keepOrder: bool=False, top: int=3) -> list[dict]:
+    """
+    Finds the best itineraries that leave `origin` no earlier than `start` and visit every city.
+
+    Parameters
+    ----------
+    origin : str
+        Station code to leave from.
+    start : datetime.date or str
+        First departure date.
+    visits : list[Visit]
+    returnTo : str, optional
+        Station code to end the trip at, by default the trip ends at the last visit.
+    end : datetime.date or str, optional
+        Latest arrival date at `returnTo`, by default any.
+    objective : str, optional
+        'time' (hours on trains), 'price' (total of `fareClass`) or 'transfers' (then hours), by default 'time'
+    fareClass : str, optional
+        'Coach Price', 'Business Price' or 'Sleeper Price', by default 'Coach Price'. Trains without it are skipped when pricing.
+    keepOrder : bool, optional
+        Visit the cities in the given order, by default False
+    top : int, optional
+        Most itineraries returned, by default 3
+
+    Returns
+    -------
+    list[dict]
+        Best first, each {"Order": [codes], "Score", "Hours" on trains, "Price" (None if a train does not sell `fareClass`), "Transfers" within legs, "RailPass"}.
+    """
+    if objective not in OBJECTIVES: raise ValueError(f"Objective must be one of {', '.join(OBJECTIVES)}.")
+    origin, start, end = origin.upper(), toDate(start), toDate(end)
+    returnTo = returnTo.upper() if returnTo != None else None
+    _score = lambda train: OBJECTIVES[objective](train, fareClass)
+    self.stats = {"Orders": 0, "Orders Searched": 0, "Searches": 0, "Cache Hits": 0}
+
+    _states, _seen = [], set()
+    for order in self.__orders(origin, visits, returnTo, keepOrder):
+      _codes = tuple(v.code for v in order)
+      if _codes in _seen: continue
+      _seen.add(_codes)
+      self.stats["Orders"] += 1
+      _bounds = self.__dateBounds(start, end, order, returnTo)
+      if _bounds == None: continue
+      _stops = [origin] + [v.code for v in order] + ([returnTo] if returnTo != None else [])
+      _states.append({"Order": order, "Stops": _stops, "Earliest": _bounds[0], "Latest": _bounds[1], "Frontier": [], "Estimate": self.__estimate(_stops)})
+    _states.sort(key=lambda s: s["Estimate"])
+    _states = _states[:self.maxOrderings]
+    self.stats["Orders Searched"] = len(_states)
+
+    # One round per leg: the searches of every order are pooled, so orders sharing a leg and date search it once
+    _legs = len(visits) + (1 if returnTo != None else 0)
+    for i in range(_legs):
+      _windows = [(state, self.__window(state, i)) for state in _states]
+      _windows = [(state, window) for state, window in _windows if window != None]
+      _queries = set()
+      for _, window in _windows:
+        _queries.update(self.__legQueries(window))
+      self.__runSearches(_queries)
+      _states = [state for state, window in _windows if self.__advance(state, i, window, _score, end)]
+
+    _plans = []
+    for state in _states:
+      score, path = min(state["Frontier"], key=lambda p: p[0])
+      _trains = [p[0] for p in path]
+      _prices = [trainPrice(t, fareClass) for t in _trains]
+      _plans.append({
+        "Order": [v.code for v in state["Order"]],
+        "Score": round(score, 2),
+        "Hours": round(sum(travelHours(t) for t in _trains), 2),
+        "Price": sum(_prices) if None not in _prices else None,
+        "Transfers": sum(t.numberOfSegments - 1 for t in _trains),
+        "Path": path})
+    _plans.sort(key=lambda p: p["Score"])
+
+    for plan in _plans[:top]:
+      plan["RailPass"] = self.__makeRailPass(plan.pop("Path"))
+    return _plans[:top]
+
+if __name__ == "__main__":
+  import time
+  from .backends import ReplayBackend
+  from traintracks.maputils import _loadAllRoutes
+  from traintracks.network import RailNetwork
+
+  optimizer = ItineraryOptimizer(ReplayBackend(latency=0.1, rebase=True), RailNetwork(_loadAllRoutes()), concurrency=4)
+  _start = time.perf_counter()
+  plans = optimizer.plan("WAS", "06/01/2022", [Visit("CHI", 2), Visit("NOL", 2), Visit("LAX", 3, latest="06/20/2022"), Visit("SEA", 2)], returnTo="WAS", objective="time")
+  print(f"{time.perf_counter()-_start:.2f}s", optimizer.stats)
+  for plan in plans:
+    print(" > ".join(plan["Order"]), plan["Score"], plan["Hours"], plan["Price"], plan["Transfers"])
@@ -0,0 +1,49 @@
+"""
+Resident memory of a process and everything it started, for capping browser sessions and measuring providers. Summed with psutil when it is installed and from /proc otherwise.
+"""
+import os
+
+def treeRss(pid: int=None) -> float:
+  """
+  Parameters
+  ----------
+  pid : int, optional
+      Root process, by default this one.
+
+  Returns
+  -------
+  float
+      Resident memory in MB of the process and all of its descendants, None if it cannot be read on this system.
+  """
+  pid = pid if pid != None else os.getpid()
+  try:
+    import psutil
+    try:
+      _process = psutil.Process(pid)
+      return sum(p.memory_info().rss for p in [_process] + _process.children(recursive=True)) / 2**20
+    except psutil.Error:
+      return 0.
+  except ImportError:
+    pass
+
+  # Linux without psutil
+  if not os.path.isdir("/proc"): return None
+  _children = {}
+  for entry in os.listdir("/proc"):
+    if not entry.isdigit(): continue
+    try:
+      with open(f"/proc/{entry}/stat") as f:
+        _ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+      _children.setdefault(_ppid, []).append(int(entry))
+    except (OSError, IndexError, ValueError):
+      pass
+  _total, _stack = 0, [pid]
+  while _stack:
+    _pid = _stack.pop()
+    _stack.extend(_children.get(_pid, []))
+    try:
+      with open(f"/proc/{_pid}/status") as f:
+        _total += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+    except OSError:
+      pass
+  return _total / 1024
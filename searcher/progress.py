@@ -0,0 +1,62 @@
+class SearchProgress:
+  """
+  A class to receive progress from a search. This base class ignores everything, which is what headless searches use.
+
+  Methods
+  -------
+  message(text, amount)
+      A search step started.
+  trainsFound(number)
+      The number of trains found so far changed.
+  """
+  def message(self, text: str, amount: float=0) -> None:
+    """
+    Parameters
+    ----------
+    text : str
+        Status message.
+    amount : float, optional
+        Progress made, out of 50 for a whole search, by default 0
+    """
+    pass
+
+  def trainsFound(self, number: int) -> None:
+    pass
+
+class PrintSearchProgress(SearchProgress):
+  """Prints status messages, prefixed with a label to tell concurrent searches apart."""
+  def __init__(self, label: str="") -> None:
+    self.label = label
+
+  def message(self, text: str, amount: float=0) -> None:
+    print(f"{self.label}{text}")
+
+class TkSearchProgress(SearchProgress):
+  """
+  Shows progress in the main window's status bar, progress bar and number of trains label. Searches run in background threads, so changes are posted to the window's UI dispatcher instead of made here.
+
+  Attributes
+  ----------
+  root : tk.Tk
+  status : tk.StringVar
+  progressbar : ttk.Progressbar
+  numberTrainsLabel : tk.StringVar
+  """
+  def __init__(self, root, status, progressbar, numberTrainsLabel) -> None:
+    self.root = root
+    self.status = status
+    self.progressbar = progressbar
+    self.numberTrainsLabel = numberTrainsLabel
+
+  def message(self, text: str, amount: float=0) -> None:
+    self.root.ui.setVar(self.status, text)
+    if amount != 0: self.root.ui.post(self.__advance, amount*2) # Not keyed, every step adds up
+
+  def __advance(self, amount: float) -> None:
+    self.progressbar['value'] += amount
+
+  def trainsFound(self, number: int) -> None:
+    if number == 1:
+      self.root.ui.setVar(self.numberTrainsLabel, f"{number} train found")
+    else:
+      self.root.ui.setVar(self.numberTrainsLabel, f"{number} trains found")
@@ -0,0 +1,142 @@
+"""
+Request coalescing: identical requests made while one is running share it instead of running again.
+
+A `SingleFlight` keeps one in-flight job per key. Asking for a key that is already running returns that job's future. Jobs can share a group, where a job for a new key supersedes the ones running for other keys: they are cancelled, and their futures fail with `SearchCancelled` right away, so whoever is waiting moves on. A cancelled job keeps running until it next checks its `CancelToken`, and its result is dropped.
+"""
+import threading
+from concurrent.futures import Future
+
+class SearchCancelled(Exception):
+  """The search was cancelled or superseded by a newer one."""
+
+class CancelToken:
+  """
+  Handed to a job so it can stop early once it is cancelled.
+
+  Methods
+  -------
+  cancel
+  cancelled
+      Checks if the job was cancelled.
+  raiseIfCancelled
+      Raises SearchCancelled if the job was cancelled.
+  """
+  def __init__(self) -> None:
+    self.__event = threading.Event()
+
+  def cancel(self) -> None:
+    self.__event.set()
+
+  def cancelled(self) -> bool:
+    return self.__event.is_set()
+
+  def raiseIfCancelled(self) -> None:
+    if self.__event.is_set(): raise SearchCancelled("The search was cancelled.")
+
+class Flight:
+  """
+  One running job.
+
+  Attributes
+  ----------
+  key : hashable
+  group : str
+  future : Future
+  token : CancelToken
+  joined : int
+      Requests after the first that were given this job's future.
+  """
+  def __init__(self, key, group: str) -> None:
+    self.key = key
+    self.group = group
+    self.future = Future()
+    self.future.set_running_or_notify_cancel()
+    self.token = CancelToken()
+    self.joined = 0
+
+class SingleFlight:
+  """
+  A class to run at most one job per key at a time, each in its own thread.
+
+  Attributes
+  ----------
+  stats : dict
+      {"Started", "Joined", "Cancelled"}.
+
+  Methods
+  -------
+  submit(key, function, group=None)
+      Starts `function(token)` for `key`, or returns the future of the job already running for it.
+  cancel(key=None, group=None)
+      Cancels the job for a key, or every job in a group.
+  inFlight
+      Returns the keys of the running jobs.
+  """
+  def __init__(self, name: str="Flight") -> None:
+    self.name = name
+    self.stats = {"Started": 0, "Joined": 0, "Cancelled": 0}
+    self.__flights = {}
+    self.__lock = threading.Lock()
+
+  def submit(self, key, function, group: str=None) -> Future:
+    """
+    Parameters
+    ----------
+    key : hashable
+        Requests with equal keys share a job.
+    function : function
+        Takes the job's CancelToken, returns its result.
+    group : str, optional
+        Cancels running jobs of this group that have another key, by default none
+
+    Returns
+    -------
+    Future
+        Resolves to the result of `function`, or fails with its exception, or with SearchCancelled.
+    """
+    with self.__lock:
+      flight = self.__flights.get(key)
+      if flight != None:
+        flight.joined += 1
+        self.stats["Joined"] += 1
+        return flight.future
+      _superseded = [self.__remove(f) for f in list(self.__flights.values()) if group != None and f.group == group]
+      flight = Flight(key, group)
+      self.__flights[key] = flight
+      self.stats["Started"] += 1
+    self.__fail(_superseded, "Superseded")
+    threading.Thread(target=self.__run, args=(flight, function), name=f"{self.name} {key}", daemon=True).start()
+    return flight.future
+
+  def __run(self, flight: Flight, function) -> None:
+    try:
+      _result, _error = function(flight.token), None
+    except BaseException as e:
+      _result, _error = None, e
+    with self.__lock:
+      if self.__flights.get(flight.key) is not flight: return # Cancelled, its future already failed
+      del self.__flights[flight.key]
+    # Done callbacks run here, so resolve outside the lock: they may be slow or submit again
+    if _error != None: flight.future.set_exception(_error)
+    else: flight.future.set_result(_result)
+
+  def __remove(self, flight: Flight) -> Flight:
+    """Holding the lock. Cancels a flight and takes it out of the table, `__fail` it once the lock is released."""
+    flight.token.cancel()
+    del self.__flights[flight.key]
+    self.stats["Cancelled"] += 1
+    return flight
+
+  def __fail(self, flights: list[Flight], reason: str) -> None:
+    for flight in flights: flight.future.set_exception(SearchCancelled(f"{reason}: {flight.key}"))
+
+  def cancel(self, key=None, group: str=None) -> int:
+    """Cancels the job for `key`, or every job in `group`. Returns how many were cancelled."""
+    with self.__lock:
+      _flights = [self.__remove(f) for f in list(self.__flights.values()) if (key != None and f.key == key) or (group != None and f.group == group)]
+    self.__fail(_flights, "Cancelled")
+    return len(_flights)
+
+  def inFlight(self) -> list:
+    with self.__lock:
+      return list(self.__flights)
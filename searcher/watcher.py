@@ -0,0 +1,368 @@
+"""
+Fare and availability watcher: re-checks saved segments and watch rules in the background and alerts when they change in a way that matters.
+
+Watches are grouped by route and date, so every train saved on one route shares a single search per check. Each route is checked on its own jittered interval, so watches added together do not stay in step. Every search first takes a token from a `TokenBucket`, so hundreds of watches still search at a steady, bounded rate. Searches go through a `SearchBackend`: in the app that is the shared browser pool, in tests the replay backend. Time comes from a clock object, so a `FakeClock` can run hours of checks instantly.
+"""
+import heapq
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime
+
+from traintracks.history import _price, _seats
+from views import config as cfg
+from .backends import SearchBackend
+
+FARE_CLASSES = ["Coach", "Business", "Sleeper"]
+
+class Clock:
+  """Real time. `sleep` returns early if `stop` is set."""
+  def time(self) -> float:
+    return time.time()
+
+  def today(self) -> date:
+    return date.today()
+
+  def sleep(self, seconds: float, stop: threading.Event=None) -> None:
+    if stop != None: stop.wait(max(seconds, 0))
+    else: time.sleep(max(seconds, 0))
+
+class FakeClock(Clock):
+  """A clock that only moves when slept on, for running a watcher's schedule without waiting."""
+  def __init__(self, start: float=None) -> None:
+    self.now = start if start != None else time.time()
+
+  def time(self) -> float:
+    return self.now
+
+  def today(self) -> date:
+    return datetime.fromtimestamp(self.now).date()
+
+  def sleep(self, seconds: float, stop: threading.Event=None) -> None:
+    self.now += max(seconds, 0)
+
+class TokenBucket:
+  """
+  A rate limiter holding up to `burst` tokens, refilled at `rate` tokens per second.
+
+  Methods
+  -------
+  take
+      Takes a token, returns 0. If there is none, takes nothing and returns the seconds until there will be.
+  """
+  def __init__(self, rate: float, burst: int, clock: Clock) -> None:
+    self.rate = rate
+    self.burst = burst
+    self.clock = clock
+    self.__tokens = float(burst)
+    self.__updated = clock.time()
+    self.__lock = threading.Lock()
+
+  def take(self) -> float:
+    with self.__lock:
+      _now = self.clock.time()
+      self.__tokens = min(self.burst, self.__tokens + (_now - self.__updated) * self.rate)
+      self.__updated = _now
+      if self.__tokens >= 1 - 1e-9: # Refilling for exactly the time returned can land a rounding error short
+        self.__tokens = max(self.__tokens - 1, 0.)
+        return 0.
+      return (1 - self.__tokens) / self.rate
+
+def trainKey(train) -> tuple:
+  """Identifies a train across searches: its number and departure."""
+  return (str(train.number), train.departure.isoformat(timespec='minutes'))
+
+def snapshot(train) -> dict:
+  """The parts of a result the watcher compares."""
+  return {"Coach": _price(train.coachPrice), "Business": _price(train.businessPrice), "Sleeper": _price(train.sleeperPrice), "Seats": _seats(train)}
+
+def diff(old: dict, new: dict, minChange: float=cfg.WATCH_MIN_PRICE_CHANGE, lowSeats: int=cfg.WATCH_LOW_SEATS) -> list[str]:
+  """
+  Meaningful changes between two snapshots of the same train. Either may be None, meaning the train was not in the results.
+
+  Returns
+  -------
+  list[str]
+      Descriptions, empty if nothing changed enough to alert.
+  """
+  if old == None and new == None: return []
+  if new == None: return ["Sold out"]
+  if old == None: return ["Available again"]
+  _changes = []
+  for fareClass in FARE_CLASSES:
+    _old, _new = old[fareClass], new[fareClass]
+    if _old != None and _new == None: _changes.append(f"{fareClass} sold out")
+    elif _old == None and _new != None: _changes.append(f"{fareClass} available at ${_new:.0f}")
+    elif _old != None and abs(_new - _old) >= minChange:
+      _changes.append(f"{fareClass} {'down' if _new < _old else 'up'} ${abs(_new - _old):.0f} to ${_new:.0f}")
+  if new["Seats"] != None and new["Seats"] <= lowSeats and (old["Seats"] == None or old["Seats"] > lowSeats):
+    _changes.append(f"{new['Seats']} seats left")
+  return _changes
+
+class WatchRule:
+  """
+  Alerts when the lowest fare of a class on a route and date drops below a target.
+
+  Attributes
+  ----------
+  origin : str
+  destination : str
+  date : date
+  fareClass : str
+  below : float
+  """
+  def __init__(self, origin: str, destination: str, date: date, fareClass: str="Coach", below: float=None) -> None:
+    self.origin = origin.upper()
+    self.destination = destination.upper()
+    self.date = date
+    self.fareClass = fareClass
+    self.below = below
+    self.met = False
+
+  def check(self, results: list) -> str:
+    """Returns an alert the first time the target is met, until it stops being met."""
+    _fares = [f for f in (_price(getattr(t, self.fareClass.lower() + "Price")) for t in results) if f != None]
+    _lowest = min(_fares) if _fares else None
+    _met = _lowest != None and (self.below == None or _lowest < self.below)
+    _alert = f"{self.fareClass} from ${_lowest:.0f}" if _met and not self.met else None
+    self.met = _met
+    return _alert
+
+  @classmethod
+  def fromDict(cls, d: dict) -> "WatchRule":
+    return cls(d["origin"], d["destination"], datetime.strptime(d["date"], "%Y-%m-%d").date(), d.get("fareClass", "Coach"), d.get("below"))
+
+def loadRules(path: str=os.path.join(cfg.DATA_DIR, "watches.json")) -> list[WatchRule]:
+  """Reads watch rules, a JSON list of {"origin", "destination", "date" (yyyy-mm-dd), "fareClass", "below"}."""
+  try:
+    with open(path, 'r') as f:
+      return [WatchRule.fromDict(d) for d in json.load(f)]
+  except FileNotFoundError:
+    return []
+  except (OSError, ValueError, KeyError) as e:
+    print(f"Could not read watch rules: {e}")
+    return []
+
+class RouteWatch:
+  """
+  Everything watched on one route and date.
+
+  Attributes
+  ----------
+  query : tuple
+      (origin, destination, date).
+  trains : dict
+      Train key : snapshot from the last check (or from when it was saved), None if it was not in the results.
+  rules : list[WatchRule]
+  nextCheck : float
+  failures : int
+      Failed checks in a row.
+  """
+  def __init__(self, query: tuple) -> None:
+    self.query = query
+    self.trains = {}
+    self.rules = []
+    self.nextCheck = 0.
+    self.failures = 0
+
+class Watcher:
+  """
+  A class to check watched routes on a schedule, in a background thread or stepped by hand.
+
+  Attributes
+  ----------
+  backend : SearchBackend
+  clock : Clock
+  bucket : TokenBucket
+  routes : dict
+      Query : RouteWatch.
+  onAlert : function
+      Called with (query, train key or rule, list of changes) from the watcher thread.
+  onResults : function
+      Called with (query, list of Trains) after every successful check, by default nothing.
+  stats : dict
+      {"Searches", "Failures", "Alerts"}.
+
+  Methods
+  -------
+  watchSegments(trains)
+      Watches exactly these saved trains, dropping ones no longer given.
+  addRule(rule)
+      Watches a route for a fare target.
+  runPending(until=None)
+      Checks every route that is due, waiting for tokens as needed.
+  runUntil(t)
+      Runs the schedule until clock time `t`.
+  start / stop
+      Runs the schedule in a background thread.
+  """
+  def __init__(self, backend: SearchBackend, onAlert=None, onResults=None, segments=None, clock: Clock=None, interval: float=cfg.WATCH_INTERVAL, jitter: float=cfg.WATCH_JITTER, rate: float=cfg.WATCH_SEARCHES_PER_MINUTE/60, burst: int=cfg.WATCH_BURST, seed: int=None) -> None:
+    """
+    Parameters
+    ----------
+    backend : SearchBackend
+    onAlert : function, optional
+        See `onAlert`, by default printing the alert.
+    onResults : function, optional
+        See `onResults`.
+    segments : function, optional
+        Returns the saved trains to watch, called before every pass so the watches follow the plan, by default none.
+    clock : Clock, optional
+        By default real time.
+    interval : float, optional
+        Seconds between checks of a route, by default `cfg.WATCH_INTERVAL`
+    jitter : float, optional
+        Each interval is scaled by a random factor within 1 ± `jitter`, by default `cfg.WATCH_JITTER`
+    rate : float, optional
+        Searches per second, by default `cfg.WATCH_SEARCHES_PER_MINUTE` a minute.
+    burst : int, optional
+        Searches that may run back to back, by default `cfg.WATCH_BURST`
+    seed : int, optional
+        Seeds the jitter, for repeatable runs.
+    """
+    self.backend = backend
+    self.clock = clock if clock != None else Clock()
+    self.bucket = TokenBucket(rate, burst, self.clock)
+    self.onAlert = onAlert if onAlert != None else lambda query, what, changes: print(f"Watch {query} {what}: {', '.join(changes)}")
+    self.onResults = onResults
+    self.segments = segments
+    self.interval = interval
+    self.jitter = jitter
+    self.routes = {}
+    self.stats = {"Searches": 0, "Failures": 0, "Alerts": 0}
+    self.__random = random.Random(seed)
+    self.__queue = [] # (next check, query)
+    self.__lock = threading.RLock()
+    self.__stop = threading.Event()
+    self.__thread = None
+
+  def __route(self, query: tuple) -> RouteWatch:
+    if query not in self.routes:
+      self.routes[query] = RouteWatch(query)
+      self.__schedule(self.routes[query], self.__random.uniform(0, self.interval * self.jitter))
+    return self.routes[query]
+
+  def __schedule(self, route: RouteWatch, delay: float) -> None:
+    route.nextCheck = self.clock.time() + delay
+    heapq.heappush(self.__queue, (route.nextCheck, route.query))
+
+  def __nextDelay(self, route: RouteWatch) -> float:
+    """The route's interval, jittered, doubled for every failed check in a row up to `cfg.WATCH_MAX_BACKOFF` times."""
+    _backoff = min(2 ** route.failures, cfg.WATCH_MAX_BACKOFF)
+    return self.interval * _backoff * self.__random.uniform(1 - self.jitter, 1 + self.jitter)
+
+  def watchSegments(self, trains: list) -> None:
+    """
+    Parameters
+    ----------
+    trains : list[Train]
+        Saved segments. Their prices at the time they were saved are what the first check compares against.
+    """
+    with self.__lock:
+      _wanted = {}
+      for train in trains:
+        if not isinstance(train.number, int): continue # Multiple trains or buses, no single number to follow
+        _wanted.setdefault((train.origin, train.destination, train.departure.date()), {})[trainKey(train)] = train
+      for query, route in list(self.routes.items()):
+        for key in [k for k in route.trains if k not in _wanted.get(query, {})]: del route.trains[key]
+        if not route.trains and not route.rules: del self.routes[query]
+      for query, saved in _wanted.items():
+        route = self.__route(query)
+        for key, train in saved.items():
+          if key not in route.trains: route.trains[key] = snapshot(train)
+
+  def addRule(self, rule: WatchRule) -> None:
+    with self.__lock:
+      self.__route((rule.origin, rule.destination, rule.date)).rules.append(rule)
+
+  def check(self, route: RouteWatch) -> bool:
+    """Searches a route once and alerts on what changed. Returns False if the search failed."""
+    origin, destination, travelDate = route.query
+    self.stats["Searches"] += 1
+    try:
+      _results = self.backend.search(origin, destination, travelDate.strftime("%m/%d/%Y"))
+    except Exception as e:
+      _results = e
+    if type(_results) != dict:
+      self.stats["Failures"] += 1
+      print(f"Watch {route.query} failed: {_results}")
+      return False
+
+    _trains = list(_results.values())
+    _current = {trainKey(t): snapshot(t) for t in _trains}
+    with self.__lock:
+      for key, last in list(route.trains.items()):
+        _changes = diff(last, _current.get(key))
+        if _changes: self.__alert(route.query, key, _changes)
+        route.trains[key] = _current.get(key)
+      for rule in route.rules:
+        _alert = rule.check(_trains)
+        if _alert != None: self.__alert(route.query, rule, [_alert])
+    if self.onResults != None: self.onResults(route.query, _trains)
+    return True
+
+  def __alert(self, query: tuple, what, changes: list[str]) -> None:
+    self.stats["Alerts"] += 1
+    try: self.onAlert(query, what, changes)
+    except Exception as e: print(e)
+
+  def nextDue(self) -> float:
+    """Clock time of the next check, None if nothing is watched."""
+    with self.__lock:
+      while self.__queue and (self.__queue[0][1] not in self.routes or self.routes[self.__queue[0][1]].nextCheck != self.__queue[0][0]):
+        heapq.heappop(self.__queue) # Dropped or rescheduled
+      return self.__queue[0][0] if self.__queue else None
+
+  def runPending(self, until: float=None) -> int:
+    """
+    Checks every route that is due, oldest first. Waits on the clock for a token before each search, and drops routes whose date has passed.
+
+    Parameters
+    ----------
+    until : float, optional
+        Clock time to stop starting checks at, by default when none are due. With more routes than the rate allows, some are always due.
+
+    Returns
+    -------
+    int
+        Routes checked.
+    """
+    if self.segments != None: self.watchSegments(self.segments())
+    _checked = 0
+    while not self.__stop.is_set():
+      _due = self.nextDue()
+      if _due == None or _due > self.clock.time() or (until != None and self.clock.time() >= until): break
+      with self.__lock:
+        _, query = heapq.heappop(self.__queue)
+        route = self.routes[query]
+        if query[2] < self.clock.today():
+          del self.routes[query]
+          continue
+      _wait = self.bucket.take()
+      while _wait > 0 and not self.__stop.is_set():
+        self.clock.sleep(_wait, self.__stop)
+        _wait = self.bucket.take()
+      if self.__stop.is_set(): break
+      route.failures = 0 if self.check(route) else route.failures + 1
+      _checked += 1
+      with self.__lock:
+        if query in self.routes: self.__schedule(route, self.__nextDelay(route))
+    return _checked
+
+  def runUntil(self, t: float, idle: float=cfg.WATCH_IDLE_POLL) -> None:
+    """Runs checks as they come due until clock time `t`, sleeping on the clock in between. Wakes at least every `idle` seconds to pick up new segments."""
+    while self.clock.time() < t and not self.__stop.is_set():
+      self.runPending(min(t, self.clock.time() + idle))
+      _due = self.nextDue()
+      _until = min(t, _due if _due != None else t, self.clock.time() + idle)
+      self.clock.sleep(_until - self.clock.time(), self.__stop)
+
+  def start(self) -> None:
+    self.__stop.clear()
+    self.__thread = threading.Thread(target=self.runUntil, args=(float('inf'),), name="Watcher", daemon=True)
+    self.__thread.start()
+
+  def stop(self) -> None:
+    self.__stop.set()
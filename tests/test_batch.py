@@ -0,0 +1,59 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from searcher.batch import CsvWriter, JsonLinesWriter, readQueries, runBatch
+
+class FakeBackend:
+  def __init__(self) -> None:
+    self.searched = []
+
+  def search(self, origin, destination, date, progress):
+    self.searched.append((origin, destination, date))
+    return {}
+
+class TestBatch(unittest.TestCase):
+  def writeFile(self, suffix: str, text: str) -> str:
+    _fd, _path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(_fd, 'w', newline='') as f:
+      f.write(text)
+    self.addCleanup(os.remove, _path)
+    return _path
+
+  def test_bad_csv_rows_do_not_stop_the_batch(self):
+    _path = self.writeFile(".csv", "origin,destination,date\nwas,nyp,2027-01-05\nWAS,NYP,not a date\nBOS\nCHI,LAX,01/07/2027\n")
+    queries = readQueries(_path)
+    self.assertEqual(len(queries), 4)
+    self.assertEqual(queries[0], {"origin": "WAS", "destination": "NYP", "date": "01/05/2027"})
+    self.assertIn("error", queries[1])
+    self.assertEqual(queries[2]["origin"], "BOS")
+    self.assertIn("destination, date", queries[2]["error"])
+
+    backend = FakeBackend()
+    _stream = io.StringIO()
+    counts = runBatch(queries, backend, JsonLinesWriter(_stream))
+    self.assertEqual(counts, {"Succeeded": 2, "Failed": 2})
+    self.assertEqual(sorted(backend.searched), [("CHI", "LAX", "01/07/2027"), ("WAS", "NYP", "01/05/2027")])
+    _lines = [json.loads(l) for l in _stream.getvalue().splitlines()]
+    self.assertEqual([l["ok"] for l in _lines], [False, False, True, True])
+    self.assertEqual(_lines[0]["date"], "not a date")
+
+  def test_bad_json_rows_are_written_as_errors(self):
+    _path = self.writeFile(".json", json.dumps([["WAS", "NYP", "01/05/2027"], {"origin": "WAS", "date": "01/05/2027"}, 7, [None, "NYP", "01/05/2027"]]))
+    queries = readQueries(_path)
+    self.assertEqual(["error" in q for q in queries], [False, True, True, True])
+
+    _stream = io.StringIO()
+    counts = runBatch(queries, FakeBackend(), CsvWriter(_stream))
+    self.assertEqual(counts, {"Succeeded": 1, "Failed": 3})
+    _rows = _stream.getvalue().splitlines()
+    self.assertEqual(len(_rows), 4) # Header and one row per failed query, the search found no trains
+    self.assertTrue(_rows[3].startswith(",NYP,01/05/2027,"))
+
+  def test_json_file_must_be_a_list(self):
+    self.assertRaises(ValueError, readQueries, self.writeFile(".json", json.dumps({"origin": "WAS"})))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+from traintracks import journal, planfile
+from traintracks.train import RailPass
+
+class TestPlanJournal(unittest.TestCase):
+  def crashAfterSnapshot(self, failAt: int, searches: int) -> RailPass:
+    """Journals `searches` searches compacting every two, failing right after snapshot number `failAt` is written, then recovers."""
+    _directory = tempfile.mkdtemp()
+    _save = planfile.save
+    _saves = []
+    def save(*args, **kwargs):
+      _result = _save(*args, **kwargs)
+      _saves.append(args[1])
+      if len(_saves) == failAt: raise OSError("Injected failure before the journal is emptied")
+      return _result
+
+    autosave = journal.PlanJournal(_directory, compactEvery=2)
+    railPass = RailPass()
+    autosave.start(railPass)
+    with mock.patch.object(journal.planfile, "save", save):
+      for n in range(searches):
+        railPass.addSearch(f"Origin {n}", f"Destination {n}", date(2027, 1, n+1), {})
+        autosave.flush()
+        if len(_saves) == failAt: break
+    self.assertEqual(len(_saves), failAt)
+    return journal.recover(_directory) # The session never closed
+
+  def test_crash_between_snapshot_and_truncation(self):
+    for failAt in [1, 2, 3]:
+      with self.subTest(compaction=failAt):
+        recovered = self.crashAfterSnapshot(failAt, 8)
+        self.assertEqual(sorted(recovered.allResults), list(range(1, failAt*2 + 1)))
+        self.assertEqual([recovered.allResults[n]["Origin"] for n in sorted(recovered.allResults)], [f"Origin {n}" for n in range(failAt*2)])
+
+  def test_recover_without_crash(self):
+    _directory = tempfile.mkdtemp()
+    autosave = journal.PlanJournal(_directory, compactEvery=2)
+    railPass = RailPass()
+    autosave.start(railPass)
+    for n in range(5):
+      railPass.addSearch(f"Origin {n}", f"Destination {n}", date(2027, 1, n+1), {})
+      autosave.flush()
+    self.assertEqual(sorted(journal.recover(_directory).allResults), [1, 2, 3, 4, 5])
+    autosave.close()
+    self.assertFalse(journal.hasRecovery(_directory))
+
+if __name__ == "__main__":
+  unittest.main()
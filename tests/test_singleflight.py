@@ -0,0 +1,86 @@
+import threading
+import unittest
+
+from searcher.singleflight import SearchCancelled, SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+  def test_concurrent_submits_run_once(self):
+    flights = SingleFlight("Test")
+    _calls = []
+    _release = threading.Event()
+    def job(token):
+      _calls.append(token)
+      _release.wait(5)
+      return "result"
+
+    _futures = []
+    _barrier = threading.Barrier(10)
+    def submit():
+      _barrier.wait()
+      _futures.append(flights.submit(("WAS", "NYP", "03/29/2022"), job))
+    _threads = [threading.Thread(target=submit) for _ in range(10)]
+    for t in _threads: t.start()
+    for t in _threads: t.join()
+    _release.set()
+
+    self.assertEqual([f.result(5) for f in _futures], ["result"]*10)
+    self.assertEqual(len(_calls), 1)
+    self.assertEqual(len({id(f) for f in _futures}), 1)
+    self.assertEqual(flights.stats["Started"], 1)
+    self.assertEqual(flights.stats["Joined"], 9)
+    self.assertEqual(flights.inFlight(), [])
+
+  def test_superseded_job_never_delivers(self):
+    flights = SingleFlight("Test")
+    _started, _release = threading.Event(), threading.Event()
+    _tokens = []
+    def old(token):
+      _tokens.append(token)
+      _started.set()
+      _release.wait(5)
+      return "stale"
+
+    _old = flights.submit("old", old, group="search")
+    _started.wait(5)
+    _new = flights.submit("new", lambda token: "fresh", group="search")
+    self.assertRaises(SearchCancelled, _old.result, 0) # Fails at once, without waiting for the old job
+    self.assertTrue(_tokens[0].cancelled())
+    _release.set()
+    self.assertEqual(_new.result(5), "fresh")
+    self.assertRaises(SearchCancelled, _old.result, 0)
+    self.assertEqual(flights.stats["Cancelled"], 1)
+
+  def test_cancelled_job_never_delivers(self):
+    flights = SingleFlight("Test")
+    _release = threading.Event()
+    _finished = threading.Event()
+    def job(token):
+      _release.wait(5)
+      _finished.set()
+      token.raiseIfCancelled()
+      return "result"
+
+    _future = flights.submit("key", job)
+    self.assertEqual(flights.cancel(key="key"), 1)
+    _release.set()
+    _finished.wait(5)
+    self.assertRaises(SearchCancelled, _future.result, 5)
+    self.assertEqual(flights.inFlight(), [])
+    self.assertEqual(flights.cancel(key="key"), 0)
+
+  def test_callback_runs_outside_lock(self):
+    flights = SingleFlight("Test")
+    _again = []
+    _done = threading.Event()
+    def callback(future):
+      _again.append(flights.submit("second", lambda token: "second")) # Would deadlock while the lock is held
+      _again[0].add_done_callback(lambda f: _done.set())
+
+    _release = threading.Event()
+    flights.submit("first", lambda token: _release.wait(5)).add_done_callback(callback)
+    _release.set() # The callback runs on the job's thread
+    self.assertTrue(_done.wait(5))
+    self.assertEqual(_again[0].result(5), "second")
+
+if __name__ == "__main__":
+  unittest.main()
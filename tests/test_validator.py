@@ -0,0 +1,52 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from traintracks.validator import ItineraryValidator
+
+class Segment:
+  def __init__(self, name: str, start: int, end: int) -> None:
+    self.name, self.origin, self.destination = name, "WAS", "WAS"
+    self.departure = datetime(2027, 1, 1) + timedelta(hours=start)
+    self.arrival = datetime(2027, 1, 1) + timedelta(hours=end)
+
+def overlaps(validator: ItineraryValidator) -> set:
+  return {frozenset((a, b)) for kind, a, b in validator.issues if kind == "Overlap"}
+
+def expectedOverlaps(segments: list) -> set:
+  """Every segment that leaves while an earlier one is still travelling, paired with the latest-arriving of those."""
+  _expected = set()
+  _order = sorted(segments, key=lambda s: (s.departure, id(s)))
+  for n, segment in enumerate(_order):
+    if n == 0: continue
+    _latest = max(_order[:n], key=lambda s: s.arrival) # First of a tie, as the validator keeps
+    if _latest.arrival > segment.departure: _expected.add(frozenset((id(_latest), id(segment))))
+  return _expected
+
+class TestItineraryValidator(unittest.TestCase):
+  def test_long_segment_overlaps_every_later_one(self):
+    a, b, c = Segment("A", 0, 30), Segment("B", 2, 3), Segment("C", 5, 6)
+    validator = ItineraryValidator()
+    validator.rebuild([a, b, c])
+    self.assertEqual(overlaps(validator), {frozenset((id(a), id(b))), frozenset((id(a), id(c)))})
+    validator.remove(a)
+    self.assertEqual(overlaps(validator), set())
+    self.assertFalse(validator.hasErrors())
+
+  def test_random_edits_match_full_check(self):
+    _random = random.Random(7)
+    validator = ItineraryValidator()
+    segments = []
+    for step in range(400):
+      if segments and _random.random() < 0.4:
+        segment = segments.pop(_random.randrange(len(segments)))
+        validator.remove(segment)
+      else:
+        _start = _random.randrange(48)
+        segment = Segment(f"S{step}", _start, _start + _random.randrange(1, 20))
+        segments.append(segment)
+        validator.append(segment)
+      self.assertEqual(overlaps(validator), expectedOverlaps(segments), f"step {step}")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,59 @@
+"""
+Fare history query check: fills a scratch database with random results and times the trend queries against it.
+
+Fails (exit status 1) if the median of either query is over the budget.
+
+Usage
+-----
+python -m tools.bench_fare_history [rows] [budget ms]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from traintracks.history import FareHistory
+
+ROWS = 2_000_000
+BUDGET_MS = 50
+STATIONS = ["CHI", "EMY", "NYP", "WAS", "BOS", "PHL", "LAX", "SEA", "NOL", "SAC", "PDX", "SAN", "DEN", "SLC", "MSP", "STL"]
+
+def fill(history: FareHistory, rows: int, perSearch: int=20) -> float:
+  """Appends `rows` results in searches of `perSearch` over the last 90 days, returns rows per second."""
+  _random = random.Random(0)
+  _now = time.time()
+  _start = time.perf_counter()
+  for _ in range(rows // perSearch):
+    _origin, _destination = _random.sample(STATIONS, 2)
+    _searched = _now - _random.uniform(0, 90*86400)
+    _travel = date.fromtimestamp(_searched) + timedelta(days=_random.randrange(1, 120))
+    _trains = [SimpleNamespace(departure=datetime.combine(_travel, datetime.min.time()) + timedelta(minutes=_random.randrange(1440)), number=_random.randrange(1, 2000), name="Bench", numberOfSegments=1, coachPrice=_random.randrange(30, 400), businessPrice=None, sleeperPrice=_random.choice([None, _random.randrange(300, 1500)]), segmentInfo={}) for _ in range(perSearch)]
+    history.record(_origin, _destination, _travel, _trains, _searched)
+  return rows / (time.perf_counter() - _start)
+
+def timeQuery(query, runs: int=20) -> tuple:
+  _times = []
+  for _ in range(runs):
+    _start = time.perf_counter()
+    _result = query()
+    _times.append((time.perf_counter() - _start) * 1000)
+  return statistics.median(_times), len(_result)
+
+if __name__ == "__main__":
+  _rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+  _budget = float(sys.argv[2]) if len(sys.argv) > 2 else BUDGET_MS
+  with tempfile.TemporaryDirectory() as folder:
+    history = FareHistory(os.path.join(folder, "history.sqlite"))
+    print(f"Appended {_rows} rows at {fill(history, _rows):,.0f} rows/s")
+    _cheapest = timeQuery(lambda: history.cheapest("CHI", "EMY", "Coach", days=30))
+    _trend = timeQuery(lambda: history.trend("CHI", "EMY", date.today() + timedelta(days=14)))
+    history.close()
+  print(f"cheapest, CHI-EMY last 30 days: {_cheapest[0]:.1f} ms ({_cheapest[1]} travel dates)")
+  print(f"trend, CHI-EMY in 14 days: {_trend[0]:.1f} ms ({_trend[1]} days)")
+  _passed = max(_cheapest[0], _trend[0]) <= _budget
+  print("OK" if _passed else "FAILED")
+  sys.exit(0 if _passed else 1)
@@ -0,0 +1,70 @@
+"""
+Import time regression check for the app, using `python -X importtime`.
+
+Imports `railpass_assistant` in a fresh interpreter `runs` times and takes the median of its cumulative import time. Fails (exit status 1) if that is over the budget, or if any of the heavy modules in `DEFERRED` was imported: those are only needed by the first search, photo or map, see `lazyimport.py`.
+
+Usage
+-----
+python -m tools.bench_importtime [budget ms] [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = "railpass_assistant"
+BUDGET_MS = 400
+DEFERRED = ["selenium", "undetected_chromedriver", "webdriver_manager", "bs4", "lxml", "PIL", "tkintermapview", "railmapview", "geocoder", "requests"]
+
+def importTimes(module: str=MODULE) -> dict:
+  """
+  Imports `module` in a new interpreter.
+
+  Returns
+  -------
+  dict
+      Module name : (self µs, cumulative µs), for every module imported.
+
+  Raises
+  ------
+  RuntimeError
+      The import failed.
+  """
+  _env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+  _out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, env=_env)
+  if _out.returncode != 0:
+    raise RuntimeError(_out.stderr.strip().splitlines()[-1])
+  _times = {}
+  for line in _out.stderr.splitlines():
+    if not line.startswith("import time:") or "imported package" in line: continue
+    _self, _cumulative, _name = line[len("import time:"):].split("|")
+    _times[_name.strip()] = (int(_self), int(_cumulative))
+  return _times
+
+def run(budget: float=BUDGET_MS, runs: int=5) -> bool:
+  _totals = []
+  for _ in range(runs):
+    _times = importTimes()
+    _totals.append(_times[MODULE][1] / 1000)
+
+  _median = statistics.median(_totals)
+  _eager = sorted({name for name in _times if name.split(".")[0] in DEFERRED})
+  print(f"{MODULE} import: median {_median:.0f} ms, first {_totals[0]:.0f} ms, budget {budget:.0f} ms ({runs} runs)")
+  print("Slowest modules (self time, last run):")
+  for name, (selfTime, cumulative) in sorted(_times.items(), key=lambda t: -t[1][0])[:10]:
+    print(f"  {name:<40}{selfTime/1000:>8.1f} ms")
+  if _eager:
+    print("Imported at startup but should be deferred:")
+    for name in _eager: print(f"  {name}")
+  return _median <= budget and not _eager
+
+if __name__ == "__main__":
+  _budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+  _runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+  try:
+    _passed = run(_budget, _runs)
+  except RuntimeError as e:
+    print(f"Could not import {MODULE}: {e}")
+    sys.exit(2)
+  print("OK" if _passed else "FAILED")
+  sys.exit(0 if _passed else 1)
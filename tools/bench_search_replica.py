@@ -0,0 +1,89 @@
+"""
+Benchmarks AmtrakSearch against a local replica of the search page.
+
+The replica (`_retrieved/searchresults_replica.html`) is served from the project directory, so a search runs through every step without touching amtrak.com. Each step's time is reported as median and maximum across runs.
+
+Usage
+-----
+python -m tools.bench_search_replica [runs] [latency ms] [fixture]
+"""
+import sys
+import statistics
+import tkinter as tk
+from tkinter import ttk
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from searcher.driver import Driver
+from searcher.amtrak_searcher import AmtrakSearch
+from views import config as cfg
+
+class QuietHandler(SimpleHTTPRequestHandler):
+  def log_message(self, format, *args) -> None:
+    pass
+
+def serveReplica() -> ThreadingHTTPServer:
+  """Serves the project directory on a free local port."""
+  server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory="."))
+  Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+def runBenchmark(runs: int=5, latency: int=800, fixture: str="searchresults_multiple") -> dict:
+  """
+  Runs the search against the replica several times.
+
+  Parameters
+  ----------
+  runs : int, optional
+      Number of searches, by default 5
+  latency : int, optional
+      Milliseconds the replica takes to answer a search, by default 800
+  fixture : str, optional
+      Results file in _retrieved/ that the replica returns, by default "searchresults_multiple"
+
+  Returns
+  -------
+  dict
+      Step name : list of durations in seconds.
+  """
+  server = serveReplica()
+  cfg.SEARCH_URL = f"http://127.0.0.1:{server.server_address[1]}/_retrieved/searchresults_replica.html?latency={latency}&results={fixture}"
+
+  root = tk.Tk()
+  root.withdraw()
+  progressbar = ttk.Progressbar(root)
+  status = tk.StringVar(root)
+  numberTrains = tk.StringVar(root)
+
+  driver = Driver(cfg.SEARCH_URL).driver
+  searcher = AmtrakSearch(root, driver, status=status)
+  timings = {}
+  try:
+    for run in range(runs):
+      driver.get(cfg.SEARCH_URL) # Fresh page, the replica has no "new search" state to reset
+      searcher.preSearchSetup("WAS", "NYP", "03/29/2022", progressbar, numberTrains)
+      progressbar['value'] = 0
+      result = searcher.oneWaySearch()
+      if not isinstance(result, dict):
+        print(f"Run {run+1} failed: {result}")
+        continue
+      for step, seconds in searcher.stepTimings.items():
+        timings.setdefault(step, []).append(seconds)
+      timings.setdefault("Total", []).append(sum(searcher.stepTimings.values()))
+  finally:
+    driver.quit()
+    root.destroy()
+    server.shutdown()
+  return timings
+
+if __name__ == "__main__":
+  _runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+  _latency = int(sys.argv[2]) if len(sys.argv) > 2 else 800
+  _fixture = sys.argv[3] if len(sys.argv) > 3 else "searchresults_multiple"
+
+  results = runBenchmark(_runs, _latency, _fixture)
+  print(f"\n{_runs} searches, {_latency} ms simulated server latency")
+  print(f"{'Step':<24}{'median':>10}{'max':>10}")
+  for step, durations in results.items():
+    print(f"{step:<24}{statistics.median(durations)*1000:>7.0f} ms{max(durations)*1000:>7.0f} ms")
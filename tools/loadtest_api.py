@@ -0,0 +1,86 @@
+"""
+Load test for the local API, using the replay backend so no browser is involved.
+
+An API server is started in this process with a replay backend that takes `latency` seconds per search. Clients then send search requests over keep-alive connections, drawn from a small set of distinct queries so identical searches overlap. Reports throughput, latency percentiles and the server's cache and coalescing counters.
+
+Usage
+-----
+python -m tools.loadtest_api [requests] [clients] [distinct queries] [latency s]
+"""
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from api.server import PlannerServer
+from searcher.backends import ReplayBackend
+
+STATIONS = ["WAS", "NYP", "BOS", "PHL", "CHI", "LAX", "SEA", "NOL", "MIA", "DEN"]
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> tuple:
+  """Sends a GET on an open connection, returns (status, payload)."""
+  writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('latin-1'))
+  await writer.drain()
+  status = int((await reader.readline()).split()[1])
+  _length = 0
+  while True:
+    _line = await reader.readline()
+    if _line in (b'\r\n', b''): break
+    name, _, value = _line.decode('latin-1').partition(':')
+    if name.lower() == 'content-length': _length = int(value)
+  return status, json.loads(await reader.readexactly(_length))
+
+async def client(port: int, targets: list, latencies: list, errors: list) -> None:
+  reader, writer = await asyncio.open_connection("127.0.0.1", port)
+  try:
+    for target in targets:
+      _start = time.perf_counter()
+      status, _ = await request(reader, writer, target)
+      latencies.append(time.perf_counter() - _start)
+      if status != 200: errors.append(status)
+  finally:
+    writer.close()
+
+async def runLoadTest(numRequests: int=500, numClients: int=50, numQueries: int=20, latency: float=0.2) -> dict:
+  server = PlannerServer(ReplayBackend("multiple", latency), port=0, concurrency=4, offline=True)
+  await server.start()
+
+  random.seed(1)
+  _queries = [f"/search?origin={o}&destination={d}&date=2022-04-{day:02d}" for o, d, day in
+              [(random.choice(STATIONS), random.choice(STATIONS), random.randint(1, 28)) for _ in range(numQueries)]]
+  _targets = [random.choice(_queries) for _ in range(numRequests)]
+
+  latencies, errors = [], []
+  _start = time.perf_counter()
+  await asyncio.gather(*[client(server.port, _targets[i::numClients], latencies, errors) for i in range(numClients)])
+  _elapsed = time.perf_counter() - _start
+
+  reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+  _, stats = await request(reader, writer, "/stats")
+  writer.close()
+  server.close()
+
+  latencies.sort()
+  return {
+    "Requests": len(latencies),
+    "Errors": len(errors),
+    "Seconds": _elapsed,
+    "Requests/s": len(latencies) / _elapsed,
+    "Median ms": statistics.median(latencies) * 1000,
+    "P95 ms": latencies[int(len(latencies)*0.95)-1] * 1000,
+    "Max ms": latencies[-1] * 1000,
+    "Server": stats}
+
+if __name__ == "__main__":
+  _args = [int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+           int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+           int(sys.argv[3]) if len(sys.argv) > 3 else 20,
+           float(sys.argv[4]) if len(sys.argv) > 4 else 0.2]
+  results = asyncio.run(runLoadTest(*_args))
+  for key, value in results.items():
+    if key == "Server":
+      for name, count in value.items(): print(f"  {name:<18}{count}")
+    else:
+      print(f"{key:<20}{value:.1f}" if isinstance(value, float) else f"{key:<20}{value}")
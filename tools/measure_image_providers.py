@@ -0,0 +1,66 @@
+"""
+Measures what each city photo provider costs: time to the first photo (including starting a browser, for Selenium), time for the next ones, and memory of the process and everything it started.
+
+Each provider runs in its own Python process so one's browser or imports do not count against another. Memory is the resident set size of the process tree, summed with psutil when it is installed and from /proc otherwise.
+
+Usage
+-----
+python -m tools.measure_image_providers [provider ...] [--cities "City, ST" ...]
+"""
+import json
+import subprocess
+import sys
+import time
+
+from searcher.procmem import treeRss
+
+DEFAULT_CITIES = ["Chicago, IL", "Seattle, WA", "New Orleans, LA"]
+
+def measure(name: str, cities: list[str]) -> dict:
+  """Runs in the child process."""
+  _start = time.perf_counter()
+  from searcher.image_providers import PROVIDERS
+  provider = PROVIDERS[name]()
+  _created = time.perf_counter()
+  _times, _found = [], 0
+  for city in cities:
+    _before = time.perf_counter()
+    try:
+      _found += provider.photo(city) != None
+    except Exception as e:
+      print(f"{name}: {city}: {e}", file=sys.stderr)
+    _times.append(time.perf_counter() - _before)
+  _rss = treeRss()
+  provider.close()
+  return {
+    "Provider": name,
+    "Startup s": _created - _start,
+    "First photo s": _times[0],
+    "Next photos s": sum(_times[1:]) / max(len(_times)-1, 1),
+    "Found": f"{_found}/{len(cities)}",
+    "RSS MB": _rss}
+
+def run(names: list[str], cities: list[str]) -> list[dict]:
+  _results = []
+  for name in names:
+    _out = subprocess.run([sys.executable, "-m", "tools.measure_image_providers", "--child", name, "--cities", *cities], capture_output=True, text=True)
+    if _out.returncode != 0:
+      _results.append({"Provider": name, "Error": (_out.stderr.strip().splitlines() or ["failed"])[-1]})
+    else:
+      _results.append(json.loads(_out.stdout.strip().splitlines()[-1]))
+  return _results
+
+if __name__ == "__main__":
+  _args = sys.argv[1:]
+  _cities = DEFAULT_CITIES
+  if "--cities" in _args:
+    _cities = _args[_args.index("--cities")+1:]
+    _args = _args[:_args.index("--cities")]
+  if _args[:1] == ["--child"]:
+    print(json.dumps(measure(_args[1], _cities)))
+    sys.exit()
+
+  for result in run(_args or ["selenium", "http", "local"], _cities):
+    print(result.pop("Provider"))
+    for key, value in result.items():
+      print(f"  {key:<16}{value:.2f}" if isinstance(value, float) else f"  {key:<16}{value}")
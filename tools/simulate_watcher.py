@@ -0,0 +1,73 @@
+"""
+Runs the fare watcher against the replay backend on a fake clock: hundreds of watches over simulated hours, in seconds.
+
+Replayed fares move at random between checks so alerts fire. Reports the searches made, the most made in any minute against the rate limit, and the alerts. Fails (exit status 1) if the watcher searched faster than its limit allows.
+
+Usage
+-----
+python -m tools.simulate_watcher [watches] [hours]
+"""
+import random
+import sys
+from collections import deque
+from datetime import date, timedelta
+
+from searcher.backends import ReplayBackend
+from searcher.watcher import FakeClock, Watcher, WatchRule
+from views import config as cfg
+
+STATIONS = ["CHI", "EMY", "NYP", "WAS", "BOS", "PHL", "LAX", "SEA", "NOL", "SAC", "PDX", "SAN", "DEN", "SLC", "MSP", "STL"]
+
+class NoisyReplayBackend(ReplayBackend):
+  """Replays saved searches with fares moved by up to `noise` dollars, and records when each search ran."""
+  def __init__(self, clock: FakeClock, noise: float=30, seed: int=0) -> None:
+    ReplayBackend.__init__(self, rebase=True)
+    self.clock = clock
+    self.noise = noise
+    self.times = []
+    self.__random = random.Random(seed)
+
+  def search(self, origin: str, destination: str, departDate: str, progress=None):
+    self.times.append(self.clock.time())
+    results = ReplayBackend.search(self, origin, destination, departDate, progress)
+    for train in results.values():
+      if isinstance(train.coachPrice, (int, float)) and self.__random.random() < 0.3:
+        train.coachPrice = max(1, train.coachPrice + self.__random.uniform(-self.noise, self.noise))
+    return results
+
+def busiestMinute(times: list[float]) -> int:
+  _window, _most = deque(), 0
+  for t in times:
+    _window.append(t)
+    while _window[0] <= t - 60: _window.popleft()
+    _most = max(_most, len(_window))
+  return _most
+
+def run(watches: int, hours: float) -> bool:
+  clock = FakeClock()
+  backend = NoisyReplayBackend(clock)
+  _alerts = []
+  watcher = Watcher(backend, onAlert=lambda query, what, changes: _alerts.append((query, what, changes)), clock=clock, seed=0)
+  _random = random.Random(1)
+  for _ in range(watches):
+    _origin, _destination = _random.sample(STATIONS, 2)
+    watcher.addRule(WatchRule(_origin, _destination, clock.today() + timedelta(days=_random.randrange(1, 60)), "Coach", _random.randrange(50, 200)))
+
+  _start = clock.time()
+  watcher.runUntil(_start + hours*3600)
+  _limit = cfg.WATCH_BURST + cfg.WATCH_SEARCHES_PER_MINUTE
+  _busiest = busiestMinute(backend.times)
+  print(f"{watches} watches on {len(watcher.routes)} routes over {hours:g} simulated hours")
+  print(f"  searches       {watcher.stats['Searches']} ({watcher.stats['Failures']} failed)")
+  print(f"  busiest minute {_busiest} searches, limit {_limit}")
+  print(f"  alerts         {watcher.stats['Alerts']}")
+  for query, what, changes in _alerts[:5]:
+    print(f"    {query[0]}-{query[1]} {query[2]}: {', '.join(changes)}")
+  return _busiest <= _limit
+
+if __name__ == "__main__":
+  _watches = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+  _hours = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+  _passed = run(_watches, _hours)
+  print("OK" if _passed else "FAILED")
+  sys.exit(0 if _passed else 1)
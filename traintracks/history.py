@@ -0,0 +1,152 @@
+"""
+Fare history, every search result ever seen in a local SQLite database, for fare trends across sessions.
+
+One row per result: when it was searched, the route and travel date, the train, the lowest fare of each class and the fewest seats left on any segment. Dates are stored as day numbers (`date.toordinal()`) and search times as Unix seconds, so rows stay small and range queries compare integers. The route index covers the fare columns, so trend queries read only the index.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from views import config as cfg
+
+VERSION = 1
+EPOCH = date(1970, 1, 1)
+FARE_CLASSES = {"Coach": "coach", "Business": "business", "Sleeper": "sleeper"}
+
+SCHEMA = [
+  "CREATE TABLE IF NOT EXISTS fares (searched INTEGER, origin TEXT, destination TEXT, travel_date INTEGER, departure TEXT, number TEXT, name TEXT, segments INTEGER, coach REAL, business REAL, sleeper REAL, seats INTEGER)",
+  "CREATE INDEX IF NOT EXISTS fares_route ON fares (origin, destination, travel_date, searched, coach, business, sleeper)",
+  "CREATE INDEX IF NOT EXISTS fares_train ON fares (number, travel_date)",
+  f"PRAGMA user_version = {VERSION}"]
+
+def _price(value) -> float:
+  """Lowest fare as a number. Older results have strings like '$1,234'."""
+  if value == None: return None
+  if isinstance(value, str):
+    value = value.replace("$", "").replace(",", "").strip()
+    if value == "": return None
+  try: return float(value)
+  except ValueError: return None
+
+def _seats(train) -> int:
+  _available = [s.get("Available Seats") for s in train.segmentInfo.values()]
+  _available = [s for s in _available if isinstance(s, int)]
+  return min(_available) if _available else None
+
+class FareHistory:
+  """
+  A class to append search results to the fare history and query it.
+
+  Attributes
+  ----------
+  path : str
+      Database file.
+
+  Methods
+  -------
+  record(origin, destination, travelDate, trains, searched=None)
+      Appends the results of one search.
+  cheapest(origin, destination, fareClass="Coach", days=30, travelFrom=None, travelTo=None)
+      Lowest fare for each travel date, from searches in the last `days` days.
+  trend(origin, destination, travelDate, fareClass="Coach")
+      Lowest fare for one travel date on each day it was searched.
+  close
+      Closes the database.
+  """
+  def __init__(self, path: str=os.path.join(cfg.DATA_DIR, "history.sqlite")) -> None:
+    self.path = path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    self.__db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    self.__lock = threading.Lock()
+    with self.__lock:
+      self.__db.execute("PRAGMA journal_mode = WAL")
+      self.__db.execute("PRAGMA synchronous = NORMAL")
+      _version = self.__db.execute("PRAGMA user_version").fetchone()[0]
+      if _version > VERSION: raise sqlite3.DatabaseError(f"Fare history version {_version} is newer than this app.")
+      for statement in SCHEMA: self.__db.execute(statement)
+
+  def record(self, origin: str, destination: str, travelDate: date, trains, searched: float=None) -> int:
+    """
+    Appends the results of one search, in one transaction.
+
+    Parameters
+    ----------
+    origin : str
+        Station code searched from.
+    destination : str
+        Station code searched to.
+    travelDate : date
+    trains : Iterable[Train]
+    searched : float, optional
+        Unix time of the search, by default now
+
+    Returns
+    -------
+    int
+        Rows added.
+    """
+    searched = int(searched if searched != None else time.time())
+    _rows = [(searched, origin, destination, travelDate.toordinal(), t.departure.isoformat(timespec='minutes'), str(t.number), t.name, t.numberOfSegments, _price(t.coachPrice), _price(t.businessPrice), _price(t.sleeperPrice), _seats(t)) for t in trains]
+    with self.__lock:
+      self.__db.execute("BEGIN")
+      try:
+        self.__db.executemany("INSERT INTO fares VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", _rows)
+        self.__db.execute("COMMIT")
+      except BaseException:
+        self.__db.execute("ROLLBACK")
+        raise
+    return len(_rows)
+
+  def __column(self, fareClass: str) -> str:
+    try: return FARE_CLASSES[fareClass]
+    except KeyError: raise ValueError(f"Unknown fare class {fareClass}, expected one of {', '.join(FARE_CLASSES)}.")
+
+  def cheapest(self, origin: str, destination: str, fareClass: str="Coach", days: int=30, travelFrom: date=None, travelTo: date=None) -> list[tuple]:
+    """
+    Lowest fare for each travel date, from searches in the last `days` days.
+
+    Parameters
+    ----------
+    origin : str
+    destination : str
+    fareClass : str, optional
+        "Coach", "Business" or "Sleeper", by default "Coach"
+    days : int, optional
+        How far back to look at searches, by default 30. None for all of them.
+    travelFrom : date, optional
+        First travel date, by default any
+    travelTo : date, optional
+        Last travel date, by default any
+
+    Returns
+    -------
+    list[tuple]
+        (travel date, lowest fare, results seen), by travel date.
+    """
+    _column = self.__column(fareClass)
+    _since = int(time.time()) - days*86400 if days != None else 0
+    _from = travelFrom.toordinal() if travelFrom != None else 0
+    _to = travelTo.toordinal() if travelTo != None else date.max.toordinal()
+    with self.__lock:
+      _rows = self.__db.execute(f"SELECT travel_date, MIN({_column}), COUNT({_column}) FROM fares WHERE origin = ? AND destination = ? AND travel_date BETWEEN ? AND ? AND searched >= ? GROUP BY travel_date ORDER BY travel_date", (origin, destination, _from, _to, _since)).fetchall()
+    return [(date.fromordinal(d), price, count) for d, price, count in _rows if price != None]
+
+  def trend(self, origin: str, destination: str, travelDate: date, fareClass: str="Coach") -> list[tuple]:
+    """
+    Lowest fare for one travel date on each day it was searched.
+
+    Returns
+    -------
+    list[tuple]
+        (day searched, lowest fare), oldest first.
+    """
+    _column = self.__column(fareClass)
+    with self.__lock:
+      _rows = self.__db.execute(f"SELECT searched / 86400, MIN({_column}) FROM fares WHERE origin = ? AND destination = ? AND travel_date = ? GROUP BY searched / 86400 ORDER BY 1", (origin, destination, travelDate.toordinal())).fetchall()
+    return [(EPOCH + timedelta(days=d), price) for d, price in _rows if price != None]
+
+  def close(self) -> None:
+    with self.__lock:
+      self.__db.close()
@@ -0,0 +1,258 @@
+"""
+Autosave for the open plan: an append-only journal of RailPass edits, folded into a plan file snapshot every so often.
+
+Each edit is one JSON line, written and synced to disk by a background thread so the interface never waits on it, and costs the size of the edit rather than the size of the plan. The thread also replays the edits on its own copy of the plan. Every `compactEvery` edits it saves that copy as the snapshot (only the searches the snapshot does not have yet are written) and empties the journal.
+
+The journal starts with the plan it applies to, a plan file or a new plan. A journal without that line applies to the snapshot. Edits are numbered, and the snapshot stores the number of the last edit it holds, so edits still in the journal after a crash between saving the snapshot and emptying the journal are not replayed twice. See `recover`.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+from traintracks import planfile
+from traintracks.train import RailPass
+from views import config as cfg
+
+JOURNAL_FILE = "autosave.journal"
+SNAPSHOT_FILE = "autosave.railplan"
+BASE_FILE = "recovered.railplan"
+BASES = ["new", "open"]
+EDITS = ["addSearch", "createSegment", "deleteSegment", "swapSegment", "updateSearch"]
+SEQUENCE_KEY = "journalSequence" # Snapshot meta, last edit the snapshot holds
+
+def _encode(entry: dict) -> str:
+  _line = dict(entry)
+  if "train" in _line: _line["train"] = _line["train"].toDict()
+  if "results" in _line: _line["results"] = {str(k): t.toDict() for k, t in _line["results"].items()}
+  if "date" in _line: _line["date"] = planfile._encodeDate(_line["date"])
+  return json.dumps(_line, separators=(',', ':')) + '\n'
+
+def _decode(line: str) -> dict:
+  entry = json.loads(line)
+  if "train" in entry: entry["train"] = planfile._decodeTrain(entry["train"])
+  if "results" in entry: entry["results"] = {int(k): planfile._decodeTrain(t) for k, t in entry["results"].items()}
+  if "date" in entry: entry["date"] = planfile._decodeDate(entry["date"])
+  return entry
+
+def _apply(railPass: RailPass, entry: dict) -> RailPass:
+  """Replays one journal entry, returns the plan after it."""
+  op = entry["op"]
+  if op == "new": return RailPass()
+  if op == "open": return planfile.loadLegacy(entry["path"]) if entry.get("legacy") else planfile.load(entry["path"])
+  if op == "addSearch": railPass.addSearch(entry["origin"], entry["destination"], entry["date"], entry["results"])
+  elif op == "createSegment": railPass.createSegment(entry["train"], entry["searchNum"])
+  elif op == "deleteSegment": railPass.deleteSegment(entry["segment"])
+  elif op == "swapSegment": railPass.swapSegment(entry["segment"], entry["direction"])
+  elif op == "updateSearch": railPass.updateSearch(entry["num"], entry["saved"])
+  return railPass
+
+def hasRecovery(directory: str=cfg.DATA_DIR) -> bool:
+  return os.path.exists(os.path.join(directory, JOURNAL_FILE)) or os.path.exists(os.path.join(directory, SNAPSHOT_FILE))
+
+def recover(directory: str=cfg.DATA_DIR) -> RailPass:
+  """
+  Rebuilds the plan of a session that did not close properly.
+
+  Parameters
+  ----------
+  directory : str, optional
+      Autosave folder, by default `cfg.DATA_DIR`.
+
+  Returns
+  -------
+  RailPass
+      `None` if that session made no edits.
+
+  Raises
+  ------
+  PlanFileError
+      The snapshot or the plan file the journal starts from cannot be read.
+  """
+  _entries = []
+  try:
+    with open(os.path.join(directory, JOURNAL_FILE), encoding='utf-8') as f:
+      for line in f:
+        try: _entries.append(_decode(line))
+        except (ValueError, KeyError): break # Last line cut off by the crash
+  except FileNotFoundError:
+    pass
+
+  if _entries and _entries[0]["op"] in BASES:
+    # Not compacted since the plan was opened, any snapshot is from an older plan
+    if not any(e["op"] in EDITS for e in _entries): return None
+    railPass = None
+  elif os.path.exists(os.path.join(directory, SNAPSHOT_FILE)):
+    railPass = planfile.load(os.path.join(directory, SNAPSHOT_FILE))
+    _covered = int(planfile.readMeta(os.path.join(directory, SNAPSHOT_FILE)).get(SEQUENCE_KEY, 0))
+    _entries = [e for e in _entries if e.get("seq", 0) > _covered] # Already in the snapshot
+  else:
+    return None
+
+  for entry in _entries:
+    railPass = _apply(railPass, entry)
+  return railPass
+
+class PlanJournal:
+  """
+  A class to autosave the open plan edit by edit, see the module notes.
+
+  Attributes
+  ----------
+  directory : str
+      Folder holding the journal and snapshot.
+  compactEvery : int
+      Edits journaled before they are folded into the snapshot.
+  stats : dict
+      {"Edits", "Compactions", "Journal Bytes", "Last Write ms", "Last Compaction ms"}
+
+  Methods
+  -------
+  start(railPass, path=None, legacy=False)
+      Journals the edits of a plan from now on.
+  record(op, **fields)
+      Queues an edit, called by RailPass.
+  flush
+      Waits until every queued edit is on disk.
+  close(discard=True)
+      Stops the writer, removing the autosave files unless told not to.
+  """
+  def __init__(self, directory: str=cfg.DATA_DIR, compactEvery: int=cfg.AUTOSAVE_COMPACT_EDITS) -> None:
+    self.directory = directory
+    self.compactEvery = compactEvery
+    self.stats = {"Edits": 0, "Compactions": 0, "Journal Bytes": 0, "Last Write ms": 0., "Last Compaction ms": 0.}
+    self.__journalPath = os.path.join(directory, JOURNAL_FILE)
+    self.__snapshotPath = os.path.join(directory, SNAPSHOT_FILE)
+    self.__railPass = None
+    self.__queue = queue.Queue()
+    self.__file = None
+    self.__shadow = None
+    self.__sinceSnapshot = 0
+    self.__sequence = 0 # Number of the last edit journaled
+    os.makedirs(directory, exist_ok=True)
+    self.__thread = threading.Thread(target=self.__run, name="PlanJournal", daemon=True)
+    self.__thread.start()
+
+  def start(self, railPass: RailPass, path: str=None, legacy: bool=False) -> None:
+    """
+    Starts a new journal for a plan, replacing the last one.
+
+    Parameters
+    ----------
+    railPass : RailPass
+    path : str, optional
+        Plan file the plan was opened from or saved to. A plan with searches and no file is first saved in the autosave folder.
+    legacy : bool, optional
+        `path` is a pickled plan, by default False
+    """
+    if self.__railPass != None: self.__railPass.journal = None
+    if path == None and (railPass.allResults or railPass.segments):
+      self.flush()
+      path = os.path.join(self.directory, BASE_FILE)
+      planfile.save(railPass, path)
+    self.__queue.put(("start", {"op": "open", "path": os.path.abspath(path), "legacy": legacy} if path != None else {"op": "new"}))
+    railPass.journal = self
+    self.__railPass = railPass
+
+  def record(self, op: str, **fields) -> None:
+    self.__queue.put(("edit", {"op": op, **fields}))
+
+  def flush(self) -> None:
+    _done = threading.Event()
+    self.__queue.put(("flush", _done))
+    _done.wait()
+
+  def close(self, discard: bool=True) -> None:
+    """Writes what is queued and stops. `discard` removes the autosave, for when the plan was saved or the user chose not to."""
+    if self.__railPass != None: self.__railPass.journal = None
+    self.__queue.put(("close", discard))
+    self.__thread.join()
+
+  def __run(self) -> None:
+    while True:
+      _batch = [self.__queue.get()]
+      while True:
+        try: _batch.append(self.__queue.get_nowait())
+        except queue.Empty: break
+
+      _start = time.perf_counter()
+      _waiting = []
+      for kind, item in _batch:
+        try:
+          if kind == "start": self.__begin(item)
+          elif kind == "edit": self.__write(item)
+          elif kind == "flush": _waiting.append(item)
+          elif kind == "close":
+            self.__finish(item)
+            for event in _waiting: event.set()
+            return
+        except Exception as e:
+          print(e)
+      try:
+        if self.__file != None:
+          self.__file.flush()
+          os.fsync(self.__file.fileno())
+          self.stats["Journal Bytes"] = self.__file.tell()
+        self.stats["Last Write ms"] = (time.perf_counter() - _start) * 1000
+        if self.__shadow != None and self.__sinceSnapshot >= self.compactEvery: self.__compact()
+      except Exception as e:
+        print(e)
+      for event in _waiting: event.set()
+
+  def __begin(self, entry: dict) -> None:
+    """New journal holding only the plan it applies to, swapped in whole so a crash leaves the old one or the new one."""
+    if self.__file != None: self.__file.close()
+    _temp = self.__journalPath + ".tmp"
+    with open(_temp, 'w', encoding='utf-8') as f:
+      f.write(_encode(entry))
+      f.flush()
+      os.fsync(f.fileno())
+    os.replace(_temp, self.__journalPath)
+    if os.path.exists(self.__snapshotPath): os.remove(self.__snapshotPath)
+    self.__file = open(self.__journalPath, 'a', encoding='utf-8')
+    self.__sinceSnapshot = 0
+    self.__sequence = 0
+    try:
+      self.__shadow = _apply(None, entry)
+    except planfile.PlanFileError as e:
+      # Edits are still journaled, they just are not compacted
+      print(e)
+      self.__shadow = None
+
+  def __write(self, entry: dict) -> None:
+    self.__sequence += 1
+    entry["seq"] = self.__sequence
+    self.__file.write(_encode(entry))
+    self.stats["Edits"] += 1
+    self.__sinceSnapshot += 1
+    if self.__shadow != None:
+      try:
+        self.__shadow = _apply(self.__shadow, entry)
+      except Exception as e:
+        print(e)
+        self.__shadow = None
+
+  def __compact(self) -> None:
+    """Saves the replayed plan as the snapshot, then empties the journal. After a crash in between, `recover` skips the edits the snapshot already holds, or replays the full journal if it still starts with its plan."""
+    _start = time.perf_counter()
+    planfile.save(self.__shadow, self.__snapshotPath, keepResults=False, meta={SEQUENCE_KEY: self.__sequence})
+    self.__file.close()
+    self.__file = open(self.__journalPath, 'w', encoding='utf-8')
+    os.fsync(self.__file.fileno())
+    self.__sinceSnapshot = 0
+    self.stats["Compactions"] += 1
+    self.stats["Journal Bytes"] = 0
+    self.stats["Last Compaction ms"] = (time.perf_counter() - _start) * 1000
+
+  def __finish(self, discard: bool) -> None:
+    if self.__file != None:
+      self.__file.flush()
+      os.fsync(self.__file.fileno())
+      self.__file.close()
+      self.__file = None
+    self.__shadow = None
+    if discard:
+      for name in [JOURNAL_FILE, SNAPSHOT_FILE, BASE_FILE]:
+        try: os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError: pass
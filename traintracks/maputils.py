@@ -1,12 +1,14 @@
-import requests
 import json
-from bs4 import BeautifulSoup
-from lxml import etree
 import os
-from tkintermapview import convert_address_to_coordinates
 
+from lazyimport import lazy
 from traintracks.route import Route
 
+requests = lazy("requests")
+bs4 = lazy("bs4")
+etree = lazy("lxml.etree")
+tkintermapview = lazy("tkintermapview")
+
 def amtrakAddressRequest(stationCode: str) -> list[str]:
   """
   Given a station code, returns address of the station from a web request to Amtrak.
@@ -25,7 +27,7 @@ def amtrakAddressRequest(stationCode: str) -> list[str]:
   # Parse for address
   try:
     webinfo = requests.get(f"https://www.amtrak.com/stations/{stationCode.lower()}")
-    soup = BeautifulSoup(webinfo.content, "html.parser")
+    soup = bs4.BeautifulSoup(webinfo.content, "html.parser")
     dom = etree.HTML(str(soup))
     try:
       addr1 = dom.xpath("//*[@class='hero-banner-and-info__card_block-address']")[-2].text
@@ -52,7 +54,7 @@ def getCoords(code: str) -> list[float]:
       [Latitude, Longitude] or None.
   """
   address = amtrakAddressRequest(code)
-  try: coords = convert_address_to_coordinates(f"{address[0].strip()}, {address[1].strip()}")
+  try: coords = tkintermapview.convert_address_to_coordinates(f"{address[0].strip()}, {address[1].strip()}")
   except (TypeError, IndexError):
     coords = None
     print(f"Could not find coordinates for station {code}: {address}")
@@ -67,9 +69,9 @@ def getCoords(code: str) -> list[float]:
 
       if _isCA != None:
         address[1] = address[1].split(_isCA)[0]+_isCA
-        coords = convert_address_to_coordinates(f"{address[0]}, {address[1]}, Canada")
+        coords = tkintermapview.convert_address_to_coordinates(f"{address[0]}, {address[1]}, Canada")
       else:
-        coords = convert_address_to_coordinates(f"{address[1]}, United States")
+        coords = tkintermapview.convert_address_to_coordinates(f"{address[1]}, United States")
     except (IndexError, TypeError):
       coords = None
       print(f"Could not find coordinates for station {code}: {address}")
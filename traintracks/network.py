@@ -0,0 +1,202 @@
+import heapq
+from collections import deque
+from math import asin, cos, radians, sin, sqrt
+
+from traintracks.route import Route
+
+EARTH_RADIUS_KM = 6371.
+
+class RailNetwork:
+  """
+  A class to find which routes connect two stations, offline, from the stops in the route geojson files.
+
+  The network is a station/route multigraph: every route serves a set of stations (the geojson stops are not in travel order, so a route is treated as connecting all of its stops). Stations served by two or more routes are transfer hubs, and the routes that share hubs are linked ahead of time so a query only walks the route graph.
+
+  Attributes
+  ----------
+  routeStops : dict
+      Route name : set of station codes.
+  stationRoutes : dict
+      Station code : set of route names.
+  coords : dict
+      Station code : (Latitude, Longitude), for stations that appear in a geojson file.
+  hubs : dict
+      Station code : set of route names, for stations served by two or more routes.
+  routeLinks : dict
+      Route name : {route name : list of hub codes shared by both routes}.
+  transferPenalty : float
+      Kilometres a transfer is worth when ranking connections.
+
+  Methods
+  -------
+  routesServing(code)
+      Returns the routes that stop at a station.
+  distance(a, b)
+      Returns the great-circle distance between two stations.
+  connections(origin, destination, maxTransfers=2, limit=5)
+      Returns the best route sequences from one station to another.
+  legSearches(connection)
+      Returns the (origin, destination) one-way searches that cover a connection.
+  """
+  def __init__(self, routes: dict[Route], stations: dict=None, transferPenalty: float=250.) -> None:
+    """
+    Builds the network.
+
+    Parameters
+    ----------
+    routes : dict[Route]
+        Route name : Route, from `_loadAllRoutes`.
+    stations : dict, optional
+        Station information with "Code" and "Served By" (see `Stations.stations`). Routes in "Served By" add the station to that route, by default only the geojson stops are used.
+    transferPenalty : float, optional
+        Kilometres added per transfer when ranking, by default 250.
+    """
+    self.transferPenalty = transferPenalty
+    self.routeStops = {}
+    self.stationRoutes = {}
+    self.coords = {}
+    self.__hopCache = {}
+
+    for name, route in routes.items():
+      self.routeStops[name] = set(route.stops)
+      for code, stop in route.stops.items():
+        self.coords.setdefault(code, (stop["Lat"], stop["Long"]))
+
+    if stations != None:
+      _byName = {name.lower(): name for name in self.routeStops}
+      for station in stations.values():
+        for served in station.get("Served By", []):
+          _route = _byName.get(served.strip().lower())
+          if _route != None: self.routeStops[_route].add(station["Code"])
+
+    for name, stops in self.routeStops.items():
+      for code in stops:
+        self.stationRoutes.setdefault(code, set()).add(name)
+
+    self.hubs = {code: served for code, served in self.stationRoutes.items() if len(served) > 1}
+    self.routeLinks = {name: {} for name in self.routeStops}
+    for code, served in self.hubs.items():
+      for a in served:
+        for b in served:
+          if a != b: self.routeLinks[a].setdefault(b, []).append(code)
+
+  def routesServing(self, code: str) -> set:
+    return self.stationRoutes.get(code.upper(), set())
+
+  def distance(self, a: str, b: str) -> float:
+    """Great-circle distance in kilometres, a transfer penalty when either station has no coordinates."""
+    try:
+      lat1, lon1 = map(radians, self.coords[a])
+      lat2, lon2 = map(radians, self.coords[b])
+    except KeyError:
+      return self.transferPenalty
+    _h = sin((lat2-lat1)/2)**2 + cos(lat1)*cos(lat2)*sin((lon2-lon1)/2)**2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(_h))
+
+  def __hopsTo(self, destination: str) -> dict:
+    """BFS over the route graph from the routes serving `destination`, returns route name : fewest transfers to reach it."""
+    if destination not in self.__hopCache:
+      _hops = {name: 0 for name in self.routesServing(destination)}
+      _queue = deque(_hops)
+      while _queue:
+        _route = _queue.popleft()
+        for _next in self.routeLinks[_route]:
+          if _next not in _hops:
+            _hops[_next] = _hops[_route] + 1
+            _queue.append(_next)
+      self.__hopCache[destination] = _hops
+    return self.__hopCache[destination]
+
+  def __routeSequences(self, origin: str, destination: str, transfers: int):
+    """
+    Yields the sequences of routes from origin to destination with exactly `transfers` transfers and no shortcut: only the first route serves the origin, only the last serves the destination, and no route links to any but its neighbours in the sequence.
+    """
+    _hops = self.__hopsTo(destination)
+    _starts = self.routesServing(origin)
+    _targets = self.routesServing(destination)
+
+    def _extend(sequence: list, transfersLeft: int):
+      if transfersLeft == 0:
+        yield list(sequence)
+        return
+      for _next in self.routeLinks[sequence[-1]]:
+        if _hops.get(_next, transfers+1) > transfersLeft-1 or _next in _starts: continue
+        if (_next in _targets) != (transfersLeft == 1): continue
+        if any(_next in self.routeLinks[r] for r in sequence[:-1]): continue
+        sequence.append(_next)
+        yield from _extend(sequence, transfersLeft-1)
+        sequence.pop()
+
+    for _first in _starts:
+      if _hops.get(_first) == 0 if transfers == 0 else (_hops.get(_first, transfers+1) <= transfers and _first not in _targets):
+        yield from _extend([_first], transfers)
+
+  def __bestTransfers(self, sequence: list, origin: str, destination: str):
+    """
+    Dijkstra over the layers origin, hubs between each pair of routes, destination. Returns (distance, [hub codes]) or None when the only hubs are the ends of the trip or repeat the previous transfer.
+    """
+    _layers = [[origin]] + [[h for h in self.routeLinks[a][b] if h not in (origin, destination)] for a, b in zip(sequence, sequence[1:])] + [[destination]]
+    _heap = [(0., 0, origin, ())]
+    _settled = set()
+    while _heap:
+      cost, layer, code, path = heapq.heappop(_heap)
+      if layer == len(_layers)-1: return cost, list(path)
+      if (layer, code) in _settled: continue
+      _settled.add((layer, code))
+      for _next in _layers[layer+1]:
+        if _next != code and (layer+1, _next) not in _settled:
+          _path = path + (_next,) if layer+1 < len(_layers)-1 else path
+          heapq.heappush(_heap, (cost + self.distance(code, _next), layer+1, _next, _path))
+    return None
+
+  def connections(self, origin: str, destination: str, maxTransfers: int=2, limit: int=5) -> list[dict]:
+    """
+    Finds the route sequences that connect two stations.
+
+    Parameters
+    ----------
+    origin : str
+        Station code.
+    destination : str
+        Station code.
+    maxTransfers : int, optional
+        Most changes of route, by default 2
+    limit : int, optional
+        Most connections returned, by default 5
+
+    Returns
+    -------
+    list[dict]
+        Best first, each {"Origin", "Destination", "Routes": [route names], "Transfers": [hub codes], "Distance": km as the crow flies between stops, "Cost": Distance plus transfer penalties}. Empty if the stations are unknown or not connected.
+    """
+    origin, destination = origin.upper(), destination.upper()
+    if origin == destination: return []
+    _direct = self.distance(origin, destination)
+    _results = []
+    for level in range(maxTransfers+1):
+      # No trip with `level` transfers can cost less than the direct distance plus its penalties
+      if len(_results) >= limit and _results[limit-1]["Cost"] <= _direct + self.transferPenalty*level: break
+      for sequence in self.__routeSequences(origin, destination, level):
+        _best = self.__bestTransfers(sequence, origin, destination)
+        if _best == None: continue
+        distance, transfers = _best
+        _results.append({
+          "Origin": origin,
+          "Destination": destination,
+          "Routes": sequence,
+          "Transfers": transfers,
+          "Distance": round(distance, 1),
+          "Cost": round(distance + self.transferPenalty*len(transfers), 1)})
+      _results.sort(key=lambda c: (c["Cost"], c["Routes"]))
+    return _results[:limit]
+
+  def legSearches(self, connection: dict) -> list[tuple]:
+    """Returns the one-way searches, [(origin, destination)], needed to price each leg of a connection from `connections`."""
+    _stops = [connection["Origin"]] + connection["Transfers"] + [connection["Destination"]]
+    return list(zip(_stops, _stops[1:]))
+
+if __name__ == "__main__":
+  from traintracks.maputils import _loadAllRoutes
+  network = RailNetwork(_loadAllRoutes())
+  for connection in network.connections("BOS", "LAX"):
+    print(" > ".join(connection["Routes"]), connection["Transfers"], connection["Cost"])
@@ -0,0 +1,257 @@
+"""
+Rail Planner files (.railplan), a SQLite database with one compressed JSON blob per search.
+
+The itinerary and the list of searches load right away, the trains of each search only when they are looked at. Saving over the file a plan was opened from only writes the searches it does not have yet.
+
+Files saved before version 2 are pickled RailPass objects, see `loadLegacy`.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import uuid
+import zlib
+from contextlib import contextmanager
+from copy import deepcopy
+from pathlib import Path
+from datetime import date, datetime
+
+from traintracks.train import RailPass, Train
+
+FORMAT = "railplan"
+VERSION = 2
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+TABLES = {
+  "meta": "key TEXT PRIMARY KEY, value TEXT",
+  "searches": "num INTEGER PRIMARY KEY, origin TEXT, destination TEXT, date TEXT, has_saved INTEGER, saved_index TEXT, count INTEGER, results BLOB",
+  "segments": "number INTEGER PRIMARY KEY, search_num INTEGER, train TEXT"}
+
+class PlanFileError(Exception):
+  """The file is not a Rail Planner file, is damaged, or was made by a newer version."""
+
+class LegacyPlanFile(PlanFileError):
+  """The file is a pickled plan from before version 2. Opening it runs whatever code it contains, so only do it after asking."""
+
+class LazySearch(dict):
+  """
+  A search in `RailPass.allResults` whose "Results" are read from the plan file the first time they are used.
+
+  Attributes
+  ----------
+  source : tuple
+      (path, file id, search number) the results are stored at. The id changes when another plan is saved over the file.
+  """
+  def __init__(self, source: tuple, *args, **kwargs) -> None:
+    dict.__init__(self, *args, **kwargs)
+    self.source = source
+
+  def __missing__(self, key):
+    if key != "Results": raise KeyError(key)
+    self["Results"] = _decodeResults(_readBlob(*self.source)[0])
+    return self["Results"]
+
+  def isLoaded(self) -> bool:
+    return dict.__contains__(self, "Results")
+
+  def __deepcopy__(self, memo):
+    self["Results"]
+    return deepcopy(dict(self), memo)
+
+  def __reduce__(self):
+    self["Results"]
+    return (dict, (dict(self),))
+
+@contextmanager
+def _database(path: str, readOnly: bool=False):
+  """Opens a plan file for one transaction, committed if the block succeeds and rolled back if not. Read only connections do not create missing files."""
+  try:
+    db = sqlite3.connect(Path(path).as_uri() + "?mode=ro", uri=True, isolation_level=None) if readOnly else sqlite3.connect(path, isolation_level=None)
+    db.execute("BEGIN" if readOnly else "BEGIN IMMEDIATE")
+  except sqlite3.Error as e:
+    raise PlanFileError(f"Could not open {os.path.basename(path)}: {e}")
+  try:
+    yield db
+    db.execute("COMMIT")
+  except BaseException:
+    db.execute("ROLLBACK")
+    raise
+  finally:
+    db.close()
+
+def _fileId(db: sqlite3.Connection) -> str:
+  try:
+    _row = db.execute("SELECT value FROM meta WHERE key = 'id'").fetchone()
+  except sqlite3.OperationalError: # New file, no tables yet
+    return None
+  return _row[0] if _row != None else None
+
+def _readBlob(path: str, fileId: str, num: int) -> tuple:
+  """Returns (results blob, count) of a search in a plan file."""
+  try:
+    with _database(path, readOnly=True) as db:
+      if _fileId(db) != fileId: raise PlanFileError(f"{os.path.basename(path)} was replaced by another plan, search {num} is no longer in it.")
+      _row = db.execute("SELECT results, count FROM searches WHERE num = ?", (num,)).fetchone()
+  except sqlite3.Error as e:
+    raise PlanFileError(f"Could not read search {num} from {os.path.basename(path)}: {e}")
+  if _row == None: raise PlanFileError(f"Search {num} is missing from {os.path.basename(path)}.")
+  return _row
+
+def _encodeResults(results: dict) -> bytes:
+  return zlib.compress(json.dumps({str(k): t.toDict() for k, t in results.items()}, separators=(',', ':')).encode('utf-8'))
+
+def _decodeTrain(data: dict) -> Train:
+  # JSON object keys are strings, segment info is keyed by leg number
+  data["Segment Info"] = {int(k) if k.isdigit() else k: v for k, v in data.get("Segment Info", {}).items()}
+  return Train(data)
+
+def _decodeResults(blob: bytes) -> dict:
+  try:
+    return {int(k): _decodeTrain(t) for k, t in json.loads(zlib.decompress(blob)).items()}
+  except (zlib.error, ValueError, KeyError) as e:
+    raise PlanFileError(f"Saved search results are damaged: {e}")
+
+def _encodeDate(d) -> str:
+  return d.isoformat() if isinstance(d, (date, datetime)) else str(d)
+
+def _decodeDate(text: str):
+  try:
+    return date.fromisoformat(text)
+  except ValueError:
+    return text
+
+def isLegacy(path: str) -> bool:
+  with open(path, 'rb') as f:
+    return f.read(len(SQLITE_HEADER)) != SQLITE_HEADER
+
+def readMeta(path: str) -> dict:
+  """Key : value strings stored in a plan file, including those given to `save`."""
+  try:
+    with _database(os.path.abspath(path), readOnly=True) as db:
+      return dict(db.execute("SELECT key, value FROM meta").fetchall())
+  except sqlite3.Error as e:
+    raise PlanFileError(f"{os.path.basename(path)} is damaged: {e}")
+
+def load(path: str) -> RailPass:
+  """
+  Opens a plan file. Search results stay in the file until they are used.
+
+  Parameters
+  ----------
+  path : str
+
+  Returns
+  -------
+  RailPass
+
+  Raises
+  ------
+  LegacyPlanFile
+      The file is an older pickled plan, see `loadLegacy`.
+  PlanFileError
+      The file cannot be read.
+  """
+  if isLegacy(path): raise LegacyPlanFile(f"{os.path.basename(path)} was saved by an older version.")
+  path = os.path.abspath(path)
+  try:
+    with _database(path, readOnly=True) as db:
+      meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+      if meta.get("format") != FORMAT: raise PlanFileError(f"{os.path.basename(path)} is not a Rail Planner file.")
+      if int(meta.get("version", 0)) > VERSION: raise PlanFileError(f"{os.path.basename(path)} was made by a newer version of the planner.")
+
+      _id = meta.get("id")
+      railPass = RailPass()
+      for num, origin, destination, _date, hasSaved, savedIndex in db.execute("SELECT num, origin, destination, date, has_saved, saved_index FROM searches ORDER BY num"):
+        railPass.allResults[num] = LazySearch((path, _id, num), {"Origin": origin, "Destination": destination, "Date": _decodeDate(_date), "Has Segment Saved": bool(hasSaved), "Saved Index": json.loads(savedIndex)})
+      for number, searchNum, train in db.execute("SELECT number, search_num, train FROM segments ORDER BY number"):
+        railPass.segments[number] = _decodeTrain(json.loads(train))
+        railPass.segmentResults[number] = searchNum
+  except sqlite3.Error as e:
+    raise PlanFileError(f"{os.path.basename(path)} is damaged: {e}")
+
+  railPass.numSearches = int(meta.get("numSearches", len(railPass.allResults)))
+  railPass.numSegments = int(meta.get("numSegments", 1))
+  railPass.validator = None # Rebuilt from the segments when first needed
+  return railPass
+
+def loadLegacy(path: str) -> RailPass:
+  """Opens a pickled plan from before version 2. Only call this for files the user trusts."""
+  try:
+    with open(path, 'rb') as f:
+      railPass = pickle.load(f)
+  except Exception as e: # Anything can go wrong unpickling a damaged file
+    raise PlanFileError(f"{os.path.basename(path)} is damaged: {e}")
+  if not isinstance(railPass, RailPass): raise PlanFileError(f"{os.path.basename(path)} is not a Rail Planner file.")
+  return railPass
+
+def save(railPass: RailPass, path: str, keepResults: bool=True, meta: dict=None) -> dict:
+  """
+  Saves a plan. Searches already in the file at `path` are not written again, searches that are still in another plan file are copied without being read. Saving over a file that holds a different plan replaces it.
+
+  Parameters
+  ----------
+  railPass : RailPass
+  path : str
+  keepResults : bool, optional
+      Keep search results that were loaded in memory, by default True. When False they are read from the file again if needed.
+  meta : dict, optional
+      Extra values to store in the file, written in the same transaction as the plan, see `readMeta`.
+
+  Returns
+  -------
+  dict
+      {"Written": searches compressed and written, "Copied": copied from another file, "Kept": already in this file}
+  """
+  path = os.path.abspath(path)
+  _target = path + ".tmp" if os.path.exists(path) and isLegacy(path) else path # A legacy file is only replaced once the new one is written
+  if _target != path and os.path.exists(_target): os.remove(_target) # Left by a failed save
+  _counts = {"Written": 0, "Copied": 0, "Kept": 0}
+
+  try:
+    with _database(_target) as db:
+      _id = _fileId(db)
+      _sources = [s.source for s in railPass.allResults.values() if isinstance(s, LazySearch)]
+      if _id == None or not any(s[:2] == (path, _id) for s in _sources):
+        # A new file, or one holding another plan
+        _id = uuid.uuid4().hex
+        for table in TABLES: db.execute(f"DROP TABLE IF EXISTS {table}")
+      for table, columns in TABLES.items(): db.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+      _inFile = {num for (num,) in db.execute("SELECT num FROM searches")}
+      db.execute("DELETE FROM searches WHERE num NOT IN (%s)" % ','.join('?'*len(railPass.allResults)), list(railPass.allResults))
+
+      for num, search in railPass.allResults.items():
+        _row = (search["Origin"], search["Destination"], _encodeDate(search["Date"]), int(search["Has Segment Saved"]), json.dumps(search["Saved Index"]))
+        _source = search.source if isinstance(search, LazySearch) else None
+        if _source == (path, _id, num) and num in _inFile:
+          db.execute("UPDATE searches SET origin = ?, destination = ?, date = ?, has_saved = ?, saved_index = ? WHERE num = ?", _row + (num,))
+          _counts["Kept"] += 1
+          continue
+
+        if _source != None and not search.isLoaded():
+          blob, count = _readBlob(*_source)
+          _counts["Copied"] += 1
+        else:
+          blob, count = _encodeResults(search["Results"]), len(search["Results"])
+          _counts["Written"] += 1
+        db.execute("INSERT OR REPLACE INTO searches (num, origin, destination, date, has_saved, saved_index, count, results) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (num,) + _row + (count, blob))
+
+      db.execute("DELETE FROM segments")
+      db.executemany("INSERT INTO segments (number, search_num, train) VALUES (?, ?, ?)",
+                     [(n, railPass.segmentResults.get(n), json.dumps(t.toDict())) for n, t in railPass.segments.items()])
+      db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+        ("format", FORMAT), ("version", str(VERSION)), ("id", _id), ("saved", datetime.now().isoformat(timespec='seconds')),
+        ("numSearches", str(railPass.numSearches)), ("numSegments", str(railPass.numSegments))] + [(k, str(v)) for k, v in (meta or {}).items()])
+  except BaseException as e:
+    if _target != path and os.path.exists(_target): os.remove(_target)
+    if isinstance(e, sqlite3.Error): raise PlanFileError(f"Could not save {os.path.basename(path)}: {e}")
+    raise
+  if _target != path:
+    try: os.replace(_target, path)
+    except OSError as e: raise PlanFileError(f"Could not save {os.path.basename(path)}: {e}")
+
+  # Everything now lives in this file, later saves to it skip these searches
+  for num, search in list(railPass.allResults.items()):
+    _loaded = search if not isinstance(search, LazySearch) or search.isLoaded() else None
+    railPass.allResults[num] = LazySearch((path, _id, num), {k: v for k, v in dict.items(search) if k != "Results"})
+    if _loaded != None and keepResults: railPass.allResults[num]["Results"] = _loaded["Results"]
+  return _counts
@@ -1,9 +1,11 @@
-import requests
 import json
-from bs4 import BeautifulSoup
 
+from lazyimport import lazy
 from traintracks.maputils import amtrakAddressRequest
 
+requests = lazy("requests")
+bs4 = lazy("bs4")
+
 class Stations:
   """
   A class to represent all Amtrak stations.
@@ -32,7 +34,17 @@ class Stations:
   """
   def __init__(self) -> None:
     self.stations = dict()
-    self.__getAmtrakStations()
+    try:
+      self.__getAmtrakStations()
+    except Exception as e: # No network, or the Wikipedia table changed
+      print("Could not load stations from Wikipedia, using the saved list.", e)
+      self.__getSavedStations()
+
+  def __getSavedStations(self) -> None:
+    """Populates the station dictionary from the copy saved with the app, which has no route or local transfer information."""
+    with open("_retrieved/Stations.json", "r") as f:
+      for code, station in json.load(f).items():
+        self.stations[f"{station['Name']}, {station['State']} ({code})"] = {"Code":code, "Name":station["Name"], "City":station["City"], "State":station["State"], "Served By":[], "Local Transfers":[]}
   
   def __getAmtrakStations(self) -> None:
     """
@@ -43,7 +55,7 @@ class Stations:
     Pulled from `Wikipedia <https://en.wikipedia.org/wiki/List_of_Amtrak_stations>`.
     """
     wiki = requests.get("https://en.wikipedia.org/wiki/List_of_Amtrak_stations").text
-    soup = BeautifulSoup(wiki, 'xml')
+    soup = bs4.BeautifulSoup(wiki, 'xml')
     table = soup.find('table', {'class': 'wikitable collapsible sortable'})
     table_rows = table.find_all('tr')
 
@@ -0,0 +1,233 @@
+"""
+Offline train schedules, built up from search results so stop times can be shown without searching again.
+
+Every train segment of a search result gives the scheduled departure of a train at one station and its arrival at another. The store keeps those per train number and station, as minutes after midnight and the day of the run, and indexes them by (train, station) and by station and time of day. Route files add the stations a train serves that no search has covered yet. Search results do not include intermediate stops, so a train's timetable fills in as more of its segments are searched.
+"""
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, time
+
+from views import config as cfg
+
+VERSION = 1
+
+StopTime = namedtuple("StopTime", ["number", "station", "day", "arrive", "depart"])
+StopTime.__doc__ = "A scheduled stop. `arrive` and `depart` are minutes after midnight, or None if not known. `day` counts from the train's first known stop, so stops sort in order of `(day, time)`."
+
+def _minutes(t) -> int:
+  """Minutes after midnight of a time, datetime or 'HH:MM' string."""
+  if isinstance(t, str): t = time.fromisoformat(t)
+  return t.hour * 60 + t.minute
+
+def formatMinutes(m: int) -> str:
+  return "--:--" if m == None else f"{m // 60:02d}:{m % 60:02d}"
+
+class ScheduleStore:
+  """
+  A class to hold the stop times of every train seen in a search.
+
+  Attributes
+  ----------
+  path : str
+      Where the store is saved.
+  names : dict
+      Train number : train name.
+  routeStops : dict
+      Train name : station codes the route serves, from the route files.
+
+  Methods
+  -------
+  addLeg(number, name, origin, departure, destination, arrival)
+      Records a train leaving one station and arriving at another.
+  addTrains(trains)
+      Records the train segments of search results.
+  addRoutes(routes)
+      Records the stations each route serves.
+  stopTime(number, station)
+      Returns a train's stop at a station.
+  stops(number)
+      Returns a train's known stops in order.
+  departures(station, start, end) / arrivals(station, start, end)
+      Returns the trains leaving / reaching a station in a time window.
+  save / load(path)
+      Writes / reads the store.
+  saveLater(delay)
+      Saves in the background once no new stop times have come in for a while.
+  """
+  def __init__(self, path: str=os.path.join(cfg.DATA_DIR, "schedules.json")) -> None:
+    self.path = path
+    self.names = {}
+    self.routeStops = {}
+    self.__stops = {} # (number, station) : StopTime
+    self.__byTrain = {} # number : {station}
+    self.__departures = {} # station : sorted [(minute, number)]
+    self.__arrivals = {}
+    self.__lock = threading.RLock()
+    self.__changed = False
+    self.__saveTimer = None
+
+  def __len__(self) -> int:
+    return len(self.__stops)
+
+  def __index(self, events: dict, station: str, minute: int, number: str, add: bool) -> None:
+    if minute == None: return
+    _list = events.setdefault(station, [])
+    if add: insort(_list, (minute, number))
+    else: del _list[bisect_left(_list, (minute, number))]
+
+  def __put(self, stop: StopTime) -> None:
+    _key = (stop.number, stop.station)
+    _old = self.__stops.get(_key)
+    if _old == stop: return
+    if _old != None:
+      self.__index(self.__departures, _old.station, _old.depart, _old.number, False)
+      self.__index(self.__arrivals, _old.station, _old.arrive, _old.number, False)
+    self.__stops[_key] = stop
+    self.__byTrain.setdefault(stop.number, set()).add(stop.station)
+    self.__index(self.__departures, stop.station, stop.depart, stop.number, True)
+    self.__index(self.__arrivals, stop.station, stop.arrive, stop.number, True)
+    self.__changed = True
+
+  def addLeg(self, number, name: str, origin: str, departure: datetime, destination: str, arrival: datetime) -> None:
+    """
+    Records a train leaving `origin` at `departure` and reaching `destination` at `arrival`.
+
+    The run day of a new stop comes from a stop of the same train already known at the other end of the leg, otherwise the origin is taken as the first day.
+    """
+    number = str(number)
+    _days = (arrival.date() - departure.date()).days
+    with self.__lock:
+      if name: self.names[number] = name
+      _origin = self.__stops.get((number, origin))
+      _destination = self.__stops.get((number, destination))
+      if _origin != None: _originDay = _origin.day
+      elif _destination != None: _originDay = _destination.day - _days
+      else: _originDay = 0
+      self.__put(StopTime(number, origin, _originDay, _origin.arrive if _origin else None, _minutes(departure)))
+      self.__put(StopTime(number, destination, _originDay + _days, _minutes(arrival), _destination.depart if _destination else None))
+
+  def addTrains(self, trains) -> None:
+    """
+    Records every train segment of search results.
+
+    Parameters
+    ----------
+    trains : Iterable[Train]
+    """
+    for train in trains:
+      if train.segmentInfo:
+        for segment in train.segmentInfo.values():
+          if segment["Type"].upper() != "TRAIN": continue
+          try: self.addLeg(segment["Number"], segment["Name"], segment["Origin"], datetime.fromisoformat(segment["Departure"]), segment["Destination"], datetime.fromisoformat(segment["Arrival"]))
+          except (KeyError, ValueError) as e: print(e)
+      elif train.numberOfSegments == 1 and isinstance(train.number, int):
+        self.addLeg(train.number, train.name, train.origin, train.departure, train.destination, train.arrival)
+
+  def addRoutes(self, routes: dict) -> None:
+    """
+    Parameters
+    ----------
+    routes : dict
+        Route name : Route, see `traintracks.maputils._loadAllRoutes`.
+    """
+    with self.__lock:
+      for name, route in routes.items():
+        self.routeStops[name] = list(route.stops)
+
+  def stopTime(self, number, station: str) -> StopTime:
+    return self.__stops.get((str(number), station))
+
+  def stops(self, number) -> list[StopTime]:
+    """A train's known stops, in the order it calls at them."""
+    number = str(number)
+    with self.__lock:
+      _stops = [self.__stops[(number, s)] for s in self.__byTrain.get(number, [])]
+    return sorted(_stops, key=lambda s: (s.day, s.arrive if s.arrive != None else s.depart))
+
+  def unscheduled(self, number) -> list[str]:
+    """Stations on a train's route that no search has given a time for."""
+    _route = self.routeStops.get(self.names.get(str(number)), [])
+    return [s for s in _route if (str(number), s) not in self.__stops]
+
+  def __window(self, events: dict, station: str, start, end) -> list[tuple]:
+    _list = events.get(station, [])
+    _start, _end = _minutes(start), _minutes(end)
+    with self.__lock:
+      if _start <= _end:
+        return _list[bisect_left(_list, (_start, "")):bisect_right(_list, (_end, "\uffff"))]
+      # Window past midnight
+      return _list[bisect_left(_list, (_start, "")):] + _list[:bisect_right(_list, (_end, "\uffff"))]
+
+  def departures(self, station: str, start, end) -> list[tuple]:
+    """
+    Trains leaving a station between two times of day.
+
+    Parameters
+    ----------
+    station : str
+        Station code.
+    start, end : time | datetime | str
+        Window, inclusive. 'HH:MM' strings work. If `end` is before `start`, the window runs past midnight.
+
+    Returns
+    -------
+    list[tuple]
+        (minutes after midnight, train number), by time.
+    """
+    return self.__window(self.__departures, station, start, end)
+
+  def arrivals(self, station: str, start, end) -> list[tuple]:
+    """Trains reaching a station between two times of day, see `departures`."""
+    return self.__window(self.__arrivals, station, start, end)
+
+  def save(self) -> None:
+    """Writes the store if it changed, replacing the file in one step."""
+    with self.__lock:
+      if not self.__changed: return
+      _data = {"Version": VERSION, "Names": self.names, "Stops": [list(s) for s in self.__stops.values()]}
+      self.__changed = False
+    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+    with open(self.path + ".tmp", 'w') as f:
+      json.dump(_data, f, separators=(',', ':'))
+    os.replace(self.path + ".tmp", self.path)
+
+  def saveLater(self, delay: float=cfg.SCHEDULE_SAVE_DELAY) -> None:
+    """
+    Saves on a background thread `delay` seconds from now. Calling again before then pushes the save back, so a run of searches rewrites the file once.
+
+    Parameters
+    ----------
+    delay : float, optional
+        Seconds, by default cfg.SCHEDULE_SAVE_DELAY
+    """
+    with self.__lock:
+      if self.__saveTimer != None: self.__saveTimer.cancel()
+      self.__saveTimer = threading.Timer(delay, self.__backgroundSave)
+      self.__saveTimer.daemon = True
+      self.__saveTimer.start()
+
+  def __backgroundSave(self) -> None:
+    try: self.save()
+    except OSError as e: print(e)
+
+  @classmethod
+  def load(cls, path: str=None) -> "ScheduleStore":
+    """Reads a saved store. An unreadable or missing file gives an empty one."""
+    store = cls(path) if path != None else cls()
+    try:
+      with open(store.path, 'r') as f:
+        _data = json.load(f)
+      if _data["Version"] > VERSION: raise ValueError(f"Schedule store version {_data['Version']} is newer than this app.")
+    except FileNotFoundError:
+      return store
+    except (OSError, ValueError, KeyError) as e:
+      print(e)
+      return store
+    store.names = _data["Names"]
+    for stop in _data["Stops"]:
+      store.__put(StopTime(*stop))
+    store.__changed = False
+    return store
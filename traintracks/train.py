@@ -4,6 +4,8 @@ from copy import deepcopy
 
 from tkinter import messagebox
 
+from traintracks.validator import ItineraryValidator
+
 class RailPass:
   """
   A class to hold each user-selected segment of their journey.
@@ -20,6 +22,10 @@ class RailPass:
       Holds mapping from segment number to `allResults` index.
   allResults : dict
       Stores every search performed.
+  validator : ItineraryValidator
+      Checks the saved segments as they are added, deleted and moved.
+  journal : PlanJournal
+      Autosave the edits are recorded to, `None` if the plan is not autosaved.
   
   Methods
   -------
@@ -43,6 +49,8 @@ class RailPass:
       Moves a segment "up" or "down" in the ordering.
   getMostRecentSegment
       Returns the most recent segment.
+  getValidator
+      Returns the validator for the saved segments.
   """
   def __init__(self) -> None:
     self.numSegments = 1
@@ -50,6 +58,32 @@ class RailPass:
     self.segments = dict()
     self.segmentResults = dict()
     self.allResults = dict()
+    self.validator = ItineraryValidator()
+    self.journal = None
+
+  def __getstate__(self) -> dict:
+    # The validator keys segments by object id, which does not survive pickling or copying
+    _state = self.__dict__.copy()
+    _state["validator"] = None
+    _state["journal"] = None
+    return _state
+
+  def __record(self, op: str, **fields) -> None:
+    """Passes an edit on to the autosave journal, if there is one."""
+    if self.__dict__.get("journal") != None: self.journal.record(op, **fields)
+
+  def getValidator(self) -> ItineraryValidator:
+    """
+    Returns the validator for the saved segments, rebuilding it after loading or copying.
+
+    Returns
+    -------
+    ItineraryValidator
+    """
+    if self.__dict__.get("validator") == None:
+      self.validator = ItineraryValidator()
+      self.validator.rebuild(list(self.segments.values()))
+    return self.validator
   
   def updateSearch(self, num: int, saved: list) -> None:
     """
@@ -65,6 +99,7 @@ class RailPass:
     if saved == []: self.allResults[num]["Has Segment Saved"] = False
     else: self.allResults[num]["Has Segment Saved"] = True
     self.allResults[num]["Saved Index"] = saved
+    self.__record("updateSearch", num=num, saved=list(saved))
 
   def addSearch(self, origin: str, destination: str, date: datetime.date, s: dict) -> None:
     """
@@ -83,6 +118,7 @@ class RailPass:
     """
     self.numSearches += 1
     self.allResults[self.numSearches] = {"Origin": origin, "Destination": destination, "Date": date, "Has Segment Saved": False, "Results": s, "Saved Index": []}
+    self.__record("addSearch", origin=origin, destination=destination, date=date, results=s)
   
   def getSearch(self, num: int) -> dict[dict]:
     """
@@ -221,6 +257,8 @@ class RailPass:
     self.allResults[self.numSearches]["Has Segment Saved"] = True
     self.segmentResults[self.numSegments] = searchNum
     self.numSegments += segment.numberOfSegments
+    self.getValidator().append(segment)
+    self.__record("createSegment", train=segment, searchNum=searchNum)
   
   def __adjust(self, segment: int) -> list:
     """Finds segments around (left or right) a given segment number."""
@@ -266,6 +304,7 @@ class RailPass:
         if doBreak: break
 
     cutBy = self.segments[segment].numberOfSegments
+    self.getValidator().remove(self.segments[segment])
 
     self.segmentResults.pop(segment)
     self.segments.pop(segment)
@@ -278,6 +317,7 @@ class RailPass:
       if index > segment:
         self.segmentResults[index-cutBy] = self.segmentResults.pop(index)
     self.numSegments -= cutBy
+    self.__record("deleteSegment", segment=segment)
     return affectedSearch
 
   def swapSegment(self, segment: int, direction: str) -> None:
@@ -306,15 +346,18 @@ class RailPass:
     _prev,_curr,_next = self.__adjust(segment)
 
     if direction == 'down': #Affect itself and after
+      self.getValidator().swap(self.segments[segment], self.segments[segment+_curr])
       moveDown(self.segments)
       moveDown(self.segmentResults)
 
     elif direction == 'up': #Affect itself and before
+      self.getValidator().swap(self.segments[segment], self.segments[segment-_prev])
       moveUp(self.segments)
       moveUp(self.segmentResults)
 
     self.segments = {key: value for key, value in sorted(self.segments.items())}
     self.segmentResults = {key: value for key, value in sorted(self.segmentResults.items())}
+    self.__record("swapSegment", segment=segment, direction=direction)
 
   def getMostRecentSegment(self):
     """
@@ -378,6 +421,8 @@ class Train:
   -------
   returnSelectedElements(cols)
       Gets a list of elements that match certain attributes in the `organizationalUnit`.
+  toDict
+      Returns the information needed to create this Train again.
   """
   def __init__(self, key: dict) -> None:
     """
@@ -442,6 +487,30 @@ class Train:
 
   def __str__(self) -> str:
     return f"{json.dumps(self.organizationalUnit, indent=2)}"
+
+  def toDict(self) -> dict:
+    """
+    Returns the information needed to create this Train again, `Train(train.toDict())`. Safe to store as JSON.
+
+    Returns
+    -------
+    dict
+    """
+    return {
+      "Origin":self.origin,
+      "Destination":self.destination,
+      "Number":self.number,
+      "Name":self.name,
+      "Departure":self.departure.isoformat(),
+      "Arrival":self.arrival.isoformat(),
+      "Travel Time":self.travelTime,
+      "Coach Price":self.coachPrice,
+      "Business Price":self.businessPrice,
+      "Sleeper Price":self.sleeperPrice,
+      "Segments":self.numberOfSegments,
+      "Segment Info":self.segmentInfo,
+      "City Segments":self.citySegments
+    }
   
   def __eq__(self, other) -> bool:
     if other != None:
@@ -0,0 +1,163 @@
+"""
+Train number, train name and route index, bundled with the app so the timetables menu does not wait for the search page.
+
+The bundled index (`_retrieved/trainindex.json`) is built from a saved copy of the search page's "traincodes" session storage item. When the live item differs, a refreshed index is saved in the data folder and used from then on, until a newer bundled one ships. Rebuild the bundled index with `python -m traintracks.traincodes [traincodes.json]`.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from urllib.parse import quote
+
+from views import config as cfg
+
+FORMAT = "trainindex"
+VERSION = 1
+BUNDLED_PATH = os.path.join("_retrieved", "trainindex.json")
+SAVED_CODES_PATH = os.path.join("_retrieved", "traincodes.json")
+ROUTES_DIR = "routes"
+
+# Services in the train codes that do not have a timetable of their own
+EXCLUDED_SERVICES = ['Connecting Bus', 'Acela Nonstop', 'Self Transfer', 'Coast Starlight Bus', 'ACE Commuter Train', 'Winter Park Express Shuttle', 'Connecting Van', 'Seastreak Ferry', 'Victoria Clipper Ferry', 'Connecting Taxi', 'NJ Transit Train', 'Grand Canyon Railway', 'Lincoln Service Missouri River Runner']
+
+def timetableUrl(name: str) -> str:
+  """Link to the first search result for a train's timetable PDF."""
+  return "https://duckduckgo.com/?q=!ducky+" + quote(name + " train timetable schedule Amtrak filetype:pdf")
+
+def routeNames(folder: str=ROUTES_DIR) -> list[str]:
+  """Names of the route geojson files, without reading them."""
+  try:
+    return sorted(f.replace("Amtrak - ", "").replace(".geojson", "") for f in os.listdir(folder) if f.endswith(".geojson"))
+  except OSError:
+    return []
+
+def _digest(traincodes: dict) -> str:
+  return hashlib.sha1(json.dumps(traincodes, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def buildIndex(traincodes: dict, routes: list[str]=None, source: str="bundled") -> dict:
+  """
+  Builds an index from the search page's train codes.
+
+  Parameters
+  ----------
+  traincodes : dict
+      Train number (str) : train name.
+  routes : list[str], optional
+      Route names to match trains to, by default those in the routes folder.
+  source : str, optional
+      Where the codes came from, by default "bundled"
+
+  Returns
+  -------
+  dict
+      {"Format", "Version", "Data Version", "Generated", "Source", "Trains": {number: name}, "Timetables": [names], "Routes": {name: route name}}
+  """
+  routes = routes if routes != None else routeNames()
+  _routesByName = {r.lower(): r for r in routes}
+  _names = list(dict.fromkeys(traincodes.values())) # Unique, in order
+  return {
+    "Format": FORMAT,
+    "Version": VERSION,
+    "Data Version": _digest(traincodes),
+    "Generated": datetime.now().isoformat(timespec='seconds'),
+    "Source": source,
+    "Trains": traincodes,
+    "Timetables": sorted(n for n in _names if n not in EXCLUDED_SERVICES),
+    "Routes": {n: _routesByName[n.lower()] for n in _names if n.lower() in _routesByName}}
+
+class TrainIndex:
+  """
+  A class to look up trains by number or name.
+
+  Attributes
+  ----------
+  data : dict
+      See `buildIndex`.
+  path : str
+      File the index was read from.
+
+  Methods
+  -------
+  name(number)
+      Returns the name of a train number.
+  timetables
+      Returns {train name: timetable link} for every train with a timetable.
+  route(name)
+      Returns the route geojson name for a train name.
+  refresh(traincodes)
+      Replaces the index with live train codes if they changed.
+  """
+  def __init__(self, data: dict, path: str=None) -> None:
+    self.data = data
+    self.path = path
+
+  @property
+  def dataVersion(self) -> str:
+    return self.data["Data Version"]
+
+  def name(self, number) -> str:
+    return self.data["Trains"].get(str(number))
+
+  def timetables(self) -> dict:
+    return {name: timetableUrl(name) for name in self.data["Timetables"]}
+
+  def route(self, name: str) -> str:
+    return self.data["Routes"].get(name)
+
+  def refresh(self, traincodes: dict, directory: str=cfg.DATA_DIR) -> bool:
+    """
+    Rebuilds the index from live train codes and saves it in the data folder, if they differ from the ones it was built from.
+
+    Parameters
+    ----------
+    traincodes : dict
+        Train number : train name, from the search page.
+    directory : str, optional
+        Where the refreshed index is saved, by default `cfg.DATA_DIR`
+
+    Returns
+    -------
+    bool
+        True if the index changed.
+    """
+    if _digest(traincodes) == self.dataVersion: return False
+    self.data = buildIndex(traincodes, source="live")
+    self.path = os.path.join(directory, "trainindex.json")
+    os.makedirs(directory, exist_ok=True)
+    with open(self.path + ".tmp", 'w') as f:
+      json.dump(self.data, f, separators=(',', ':'))
+    os.replace(self.path + ".tmp", self.path)
+    return True
+
+def _read(path: str) -> dict:
+  try:
+    with open(path, 'r') as f:
+      data = json.load(f)
+  except (OSError, ValueError):
+    return None
+  if data.get("Format") != FORMAT or data.get("Version", 0) > VERSION: return None
+  return data
+
+def loadIndex(directory: str=cfg.DATA_DIR) -> TrainIndex:
+  """
+  Loads the newest readable index: the refreshed one in `directory` or the bundled one, built from the saved train codes if neither exists.
+
+  Returns
+  -------
+  TrainIndex
+  """
+  _saved = os.path.join(directory, "trainindex.json")
+  _candidates = [(data, path) for path in [_saved, BUNDLED_PATH] for data in [_read(path)] if data != None]
+  if _candidates:
+    return TrainIndex(*max(_candidates, key=lambda c: c[0]["Generated"]))
+  with open(SAVED_CODES_PATH, 'r') as f:
+    return TrainIndex(buildIndex(json.load(f)["traincodes"]), SAVED_CODES_PATH)
+
+if __name__ == "__main__":
+  import sys
+  with open(sys.argv[1] if len(sys.argv) > 1 else SAVED_CODES_PATH, 'r') as f:
+    _codes = json.load(f)
+  index = buildIndex(_codes.get("traincodes", _codes))
+  with open(BUNDLED_PATH, 'w') as f:
+    json.dump(index, f, indent=1)
+  print(f"{len(index['Trains'])} trains, {len(index['Timetables'])} timetables, {len(index['Routes'])} matched to routes, data version {index['Data Version']}")
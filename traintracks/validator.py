@@ -0,0 +1,240 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+from views import config as cfg
+
+ERROR = "Error"
+WARNING = "Warning"
+
+class ItineraryValidator:
+  """
+  A class to check that the saved segments of a Rail Pass can be travelled in order, updated edit by edit.
+
+  Segments are kept twice: in plan order as a linked list, and by departure time in a sorted list. In departure order each segment also remembers the latest-arriving segment that leaves before it. An edit only changes a few neighbours in the plan, and in departure order only the segments after it whose latest-arriving predecessor changes, so only those pairs are checked again.
+
+  Checked
+  -------
+  Overlap (error)
+      Two segments are on trains at the same time. Each segment is compared with the latest-arriving segment that leaves before it, so a long segment is caught overlapping every later one it spans, not only the next.
+  Connection (error)
+      A segment leaves before the one before it in the plan arrives.
+  Transfer (warning)
+      A segment leaves the station it arrived at sooner than the minimum transfer time for that station.
+  Gap (warning)
+      A segment does not leave from where the one before it arrived.
+
+  Attributes
+  ----------
+  minTransfer : datetime.timedelta
+      Minimum transfer time at stations without their own.
+  stationMinimums : dict
+      Station code : minimum transfer time in minutes.
+  issues : dict
+      (kind, first segment id, second segment id) : {"Kind", "Severity", "Station", "Message"}.
+
+  Methods
+  -------
+  rebuild(trains)
+      Checks a whole plan from scratch.
+  append(train)
+      Adds a segment to the end of the plan.
+  remove(train)
+      Removes a segment from the plan.
+  swap(train, other)
+      Swaps two neighbouring segments in the plan.
+  issuesFor(train)
+      Returns the issues a segment is part of.
+  """
+  def __init__(self, minTransfer: int=cfg.MIN_TRANSFER_MINUTES, stationMinimums: dict=cfg.MIN_TRANSFER_BY_STATION) -> None:
+    self.minTransfer = timedelta(minutes=minTransfer)
+    self.stationMinimums = stationMinimums
+    self.__reset()
+
+  def __reset(self) -> None:
+    self.issues = {}
+    self.__trains = {}
+    self.__byTrain = {}
+    self.__previous = {}
+    self.__next = {}
+    self.__first = None
+    self.__last = None
+    self.__byDeparture = []
+    self.__cover = {}
+
+  # Bookkeeping
+
+  def __key(self, train: "Train") -> tuple:
+    return (train.departure, id(train))
+
+  def __setIssue(self, kind: str, a: int, b: int, severity: str=None, station: str=None, message: str=None) -> None:
+    """Records an issue between segments a and b, or clears it when `message` is None."""
+    _key = (kind, a, b)
+    if message == None:
+      if self.issues.pop(_key, None) != None:
+        self.__byTrain[a].discard(_key)
+        self.__byTrain[b].discard(_key)
+    else:
+      self.issues[_key] = {"Kind": kind, "Severity": severity, "Station": station, "Message": message}
+      self.__byTrain[a].add(_key)
+      self.__byTrain[b].add(_key)
+
+  def __clearAll(self, a: int) -> None:
+    for _key in list(self.__byTrain.get(a, ())):
+      self.__setIssue(*_key)
+
+  # Checks
+
+  def __checkOverlap(self, a: int, b: int) -> None:
+    """a departs no later than b."""
+    _first, _second = self.__trains[a], self.__trains[b]
+    if _first.arrival > _second.departure:
+      self.__setIssue("Overlap", a, b, ERROR, None, f"{_first.name} ({_first.origin}-{_first.destination}) is still travelling when {_second.name} ({_second.origin}-{_second.destination}) leaves.")
+    else:
+      self.__setIssue("Overlap", a, b)
+
+  def __checkConnection(self, a: int, b: int) -> None:
+    """a comes right before b in the plan."""
+    _first, _second = self.__trains[a], self.__trains[b]
+    _station = _second.origin
+    _wait = _second.departure - _first.arrival
+    _minimum = timedelta(minutes=self.stationMinimums[_station]) if _station in self.stationMinimums else self.minTransfer
+
+    if _wait < timedelta(0):
+      self.__setIssue("Connection", a, b, ERROR, _station, f"{_second.name} leaves {_second.origin} before {_first.name} arrives at {_first.destination}.")
+    else:
+      self.__setIssue("Connection", a, b)
+
+    if _first.destination == _second.origin and timedelta(0) <= _wait < _minimum:
+      self.__setIssue("Transfer", a, b, WARNING, _station, f"Only {int(_wait.total_seconds()//60)} minutes to change trains at {_station}, at least {int(_minimum.total_seconds()//60)} are recommended.")
+    else:
+      self.__setIssue("Transfer", a, b)
+
+    if _first.destination != _second.origin:
+      self.__setIssue("Gap", a, b, WARNING, _second.origin, f"Arrives at {_first.destination}, but the next segment leaves from {_second.origin}.")
+    else:
+      self.__setIssue("Gap", a, b)
+
+  def __clearConnection(self, a: int, b: int) -> None:
+    for kind in ["Connection", "Transfer", "Gap"]:
+      self.__setIssue(kind, a, b)
+
+  def __later(self, a: int, b: int) -> int:
+    """Whichever of segments a and b arrives last, the first one on a tie. Either may be None."""
+    if a == None or (b != None and self.__trains[b].arrival > self.__trains[a].arrival): return b
+    return a
+
+  def __checkOverlapsFrom(self, index: int) -> None:
+    """
+    Checks segments from position `index` in the departure order against the latest-arriving segment before each, after an edit at that position.
+
+    Stops at the first segment whose latest-arriving predecessor did not change, the ones after it cannot have changed either.
+    """
+    _latest = None
+    if index > 0:
+      _before = self.__byDeparture[index-1][1]
+      _latest = self.__later(self.__cover[_before], _before)
+    for _, _id in self.__byDeparture[index:]:
+      _old = self.__cover.get(_id, _id) # New segments have no entry, never equal to a predecessor
+      if _old == _latest: break
+      if _old != None and _old != _id: self.__setIssue("Overlap", _old, _id)
+      self.__cover[_id] = _latest
+      if _latest != None: self.__checkOverlap(_latest, _id)
+      _latest = self.__later(_latest, _id)
+
+  # Edits
+
+  def rebuild(self, trains: list) -> None:
+    """
+    Checks a whole plan from scratch.
+
+    Parameters
+    ----------
+    trains : list[Train]
+        Segments in plan order.
+    """
+    self.__reset()
+    for train in trains:
+      self.append(train)
+
+  def append(self, train: "Train") -> None:
+    """Adds a segment to the end of the plan."""
+    _id = id(train)
+    if _id in self.__trains: return
+    self.__trains[_id] = train
+    self.__byTrain[_id] = set()
+
+    # Plan order
+    self.__previous[_id], self.__next[_id] = self.__last, None
+    if self.__last != None:
+      self.__next[self.__last] = _id
+      self.__checkConnection(self.__last, _id)
+    else:
+      self.__first = _id
+    self.__last = _id
+
+    # Departure order
+    _index = bisect_left(self.__byDeparture, self.__key(train))
+    self.__byDeparture.insert(_index, self.__key(train))
+    self.__checkOverlapsFrom(_index)
+
+  def remove(self, train: "Train") -> None:
+    """Removes a segment from the plan, then checks its old neighbours against each other."""
+    _id = id(train)
+    if _id not in self.__trains: return
+    self.__clearAll(_id)
+
+    _previous, _next = self.__previous.pop(_id), self.__next.pop(_id)
+    if _previous != None: self.__next[_previous] = _next
+    else: self.__first = _next
+    if _next != None: self.__previous[_next] = _previous
+    else: self.__last = _previous
+    if _previous != None and _next != None: self.__checkConnection(_previous, _next)
+
+    _index = bisect_left(self.__byDeparture, self.__key(train))
+    self.__byDeparture.pop(_index)
+    self.__cover.pop(_id)
+    self.__checkOverlapsFrom(_index)
+
+    self.__trains.pop(_id)
+    self.__byTrain.pop(_id)
+
+  def swap(self, train: "Train", other: "Train") -> None:
+    """Swaps two segments that are next to each other in the plan. Departure order does not change."""
+    a, b = id(train), id(other)
+    if self.__next.get(b) == a: a, b = b, a
+    if self.__next.get(a) != b: return
+    _before, _after = self.__previous[a], self.__next[b]
+
+    if _before != None: self.__clearConnection(_before, a)
+    self.__clearConnection(a, b)
+    if _after != None: self.__clearConnection(b, _after)
+
+    # _before, a, b, _after -> _before, b, a, _after
+    self.__previous[b], self.__next[b] = _before, a
+    self.__previous[a], self.__next[a] = b, _after
+    if _before != None: self.__next[_before] = b
+    else: self.__first = b
+    if _after != None: self.__previous[_after] = a
+    else: self.__last = a
+
+    if _before != None: self.__checkConnection(_before, b)
+    self.__checkConnection(b, a)
+    if _after != None: self.__checkConnection(a, _after)
+
+  # Queries
+
+  def issuesFor(self, train: "Train") -> list[dict]:
+    """Returns the issues a segment is part of, errors first."""
+    _issues = [self.issues[k] for k in self.__byTrain.get(id(train), ())]
+    return sorted(_issues, key=lambda i: (i["Severity"] != ERROR, i["Kind"]))
+
+  def hasErrors(self) -> bool:
+    return any(i["Severity"] == ERROR for i in self.issues.values())
+
+  def planOrder(self) -> list:
+    """Segments in plan order, as the validator sees them."""
+    _order, _id = [], self.__first
+    while _id != None:
+      _order.append(self.__trains[_id])
+      _id = self.__next[_id]
+    return _order
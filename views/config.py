@@ -5,6 +5,36 @@ APP_VERSION = "0.9.5"
 SEARCH_URL = "https://www.amtrak.com/tickets/departure.html"
 IMAGE_DIMENSIONS = [300,225]
 DEV_MODE = True
+DRIVER_POOL_SIZE = 2 # Browser sessions kept on SEARCH_URL
+DRIVER_POOL_MAX_MEMORY = 2048 # MB of resident memory across all pooled browsers and their renderers
+SEARCH_LATENCY_BUDGET = 45 # Seconds a whole search may take before its waits give up
+SEARCH_RESULTS_TIMEOUT = 20 # Seconds to wait for the results page after clicking "Find Trains"
+SEARCH_STORAGE_TIMEOUT = 5 # Seconds to wait for a session storage item
+SEARCH_POLL_INTERVAL = [0.05, 0.5] # First and longest delay in seconds between condition checks
+OPTIMIZER_MAX_ORDERINGS = 24 # Visit orders the itinerary optimizer searches trains for
+OPTIMIZER_DATES_PER_LEG = 3 # Departure dates searched for every leg of an order
+MIN_TRANSFER_MINUTES = 30 # Shortest change of trains the itinerary accepts without a warning
+MIN_TRANSFER_BY_STATION = {"CHI": 60, "LAX": 60, "NOL": 60, "NYP": 45, "WAS": 45} # Large stations that need longer
+AUTOSAVE_COMPACT_EDITS = 50 # Journaled edits before they are folded into the autosave snapshot
+IMAGE_CACHE_MAX_FILES = 500 # City photos kept on disk, least recently shown removed first
+IMAGE_PREFETCH_PAUSE = 1 # Seconds the photo prefetcher leaves the image browser free between photos
+IMAGE_PROVIDERS = ["local", "http", "selenium"] # City photo sources, tried in order, see searcher/image_providers.py
+IMAGE_PACK_DIR = "city_images" # Bundled city photos, named like 'portland-or.jpg'
+IMAGE_HTTP_TIMEOUT = 5 # Seconds for each request of the HTTP photo provider
+STARTUP_WORKERS = 4 # Threads running independent startup tasks
+UI_FRAME_MS = 16 # How often the window applies updates posted by background threads
+UI_FRAME_BUDGET_MS = 8 # Time each frame may spend on those updates, the rest wait for the next frame
+SCHEDULE_SAVE_DELAY = 30 # Seconds to wait after new stop times before saving them, more searches in that time share one save
+WATCH_ENABLED = True # Re-check saved segments in the background, see searcher/watcher.py
+WATCH_INTERVAL = 3600 # Seconds between checks of one route
+WATCH_JITTER = 0.2 # Check intervals vary by up to this fraction so routes do not stay in step
+WATCH_SEARCHES_PER_MINUTE = 1 # Steady rate of watcher searches, across all routes
+WATCH_BURST = 2 # Watcher searches allowed back to back
+WATCH_MAX_BACKOFF = 8 # Most a route's interval is multiplied by after failed checks
+WATCH_IDLE_POLL = 60 # Seconds between looks for new saved segments when nothing is due
+WATCH_MIN_PRICE_CHANGE = 5 # Dollars a fare must move to alert
+WATCH_LOW_SEATS = 4 # Alert when seats left falls to this
+POPULAR_STATIONS = ["NYP", "WAS", "CHI", "BOS", "PHL", "LAX", "SEA", "NOL", "SAC", "PDX", "SAN", "MIA"] # Photos prefetched at startup
 if os.name == 'nt':
   SYSTEM_FONT = "Segoe UI"
   GEOMETRY = "700x875+50+50"
@@ -12,10 +42,12 @@ if os.name == 'nt':
   BACKGROUND = "SystemButtonFace"
   WIDTH_DIV = 1
   ICON = "tracks.ico"
+  DATA_DIR = os.path.join(os.environ.get("APPDATA", os.path.expanduser('~')), APP_NAME)
 elif os.name == 'posix':
   SYSTEM_FONT = "TkDefaultFont"
   GEOMETRY = "750x680+0+0"
   MINSIZE = [795, 680]
   BACKGROUND = "gray93"
   WIDTH_DIV = 1.5
-  ICON = "tracks.icns"
\ No newline at end of file
+  ICON = "tracks.icns"
+  DATA_DIR = os.path.join(os.path.expanduser('~'), ".railplanner")
\ No newline at end of file
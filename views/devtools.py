@@ -1,14 +1,117 @@
 import tkinter as tk
-from tkinter import font
+from tkinter import font, ttk, messagebox
+from easygui import filesavebox
+
+import os
+
+from searcher.instrumentation import tracer
+from . import config as cfg
 
 class DevTools(tk.Toplevel):
+  """
+  A class to make a diagnostics window, showing how long each search phase takes across all searches, and how the UI dispatcher is keeping up.
+
+  Parameters
+  ----------
+  tk : Toplevel
+
+  Attributes
+  ----------
+  phaseTable : ttk.Treeview
+      One row per phase with count and durations.
+  searchCount : StringVar
+  lastSearch : StringVar
+      Time spent in each phase of the latest search.
+  uiStats : StringVar
+      Queue depth and apply latency of the UI dispatcher.
+
+  Methods
+  -------
+  refresh
+      Reloads the phase table and dispatcher figures, repeats every two seconds while the window is open.
+  exportJson
+      Saves all spans and the summary as JSON.
+  exportChromeTrace
+      Saves all spans for chrome://tracing or Perfetto.
+  """
+  COLUMNS = ["Count", "Mean", "Median", "P95", "Max", "Total"]
+
   def __init__(self, parent, *args, **kwargs):
     tk.Toplevel.__init__(self, parent, *args, **kwargs)
     self.parent = parent
     self.title("Dev Tools")
-    tk.Label(self, text="Development Tools", font=('', 16, font.NORMAL)).pack()
-    tk.Button(self, text="Print Geometry", command=self.parent._test_getGeometry).pack()
-    tk.Button(self, text="Print Column Info", command=self.parent.trainResultsArea._test_getColInfo).pack()
-    tk.Button(self, text="Print Selection", command=self.parent.trainResultsArea.getSelection).pack()
-    tk.Button(self, text="Print Widget Background", command=self.parent._test_getBackground).pack()
-    tk.Button(self, text="Print Rail Pass", command=self.parent.us.userSelections._printRailPass).pack()
\ No newline at end of file
+    if os.name == 'nt': self.iconbitmap(cfg.ICON)
+    tk.Label(self, text="Search Diagnostics", font=('', 16, font.NORMAL)).pack()
+
+    self.searchCount = tk.StringVar(self)
+    tk.Label(self, textvariable=self.searchCount).pack()
+
+    self.phaseTable = ttk.Treeview(self, columns=self.COLUMNS, height=12)
+    self.phaseTable.heading('#0', text="Phase")
+    self.phaseTable.column('#0', width=180)
+    for col in self.COLUMNS:
+      self.phaseTable.heading(col, text=col if col == "Count" else f"{col} (ms)")
+      self.phaseTable.column(col, width=80, anchor=tk.E)
+    self.phaseTable.pack(fill=tk.BOTH, expand=True, padx=8, pady=4)
+
+    self.lastSearch = tk.StringVar(self)
+    tk.Label(self, textvariable=self.lastSearch, justify=tk.LEFT, font=('Courier', 12, font.NORMAL)).pack(pady=4)
+
+    exportArea = tk.Frame(self)
+    ttk.Button(exportArea, text="Export JSON", command=self.exportJson).grid(row=0, column=0, padx=2)
+    ttk.Button(exportArea, text="Export Chrome Trace", command=self.exportChromeTrace).grid(row=0, column=1, padx=2)
+    ttk.Button(exportArea, text="Clear", command=self.__clear).grid(row=0, column=2, padx=2)
+    exportArea.pack(pady=4)
+
+    self.uiStats = tk.StringVar(self)
+    tk.Label(self, text="UI Dispatcher", font=('', 14, font.NORMAL)).pack()
+    tk.Label(self, textvariable=self.uiStats, justify=tk.LEFT).pack(pady=4)
+
+    if cfg.DEV_MODE:
+      testArea = tk.Frame(self)
+      tk.Button(testArea, text="Print Geometry", command=self.parent._test_getGeometry).pack()
+      tk.Button(testArea, text="Print Column Info", command=self.parent.trainResultsArea._test_getColInfo).pack()
+      tk.Button(testArea, text="Print Selection", command=self.parent.trainResultsArea.getSelection).pack()
+      tk.Button(testArea, text="Print Widget Background", command=self.parent._test_getBackground).pack()
+      tk.Button(testArea, text="Print Rail Pass", command=self.parent.us.userSelections._printRailPass).pack()
+      testArea.pack(pady=4)
+
+    self.refresh()
+    self.wm_protocol("WM_DELETE_WINDOW", self.__onClose)
+
+  def __onClose(self) -> None:
+    self.after_cancel(self.__refreshJob)
+    self.parent.closeDevTools()
+    self.destroy()
+
+  def refresh(self) -> None:
+    self.phaseTable.delete(*self.phaseTable.get_children())
+    for phase, stats in tracer.summary().items():
+      self.phaseTable.insert('', tk.END, text=phase, values=[stats["Count"]] + [f"{stats[col]:.1f}" for col in self.COLUMNS[1:]])
+    self.searchCount.set(f"{len(tracer.searches)} searches recorded")
+    self.lastSearch.set(tracer.searchReport())
+    _ui = self.parent.ui.metrics()
+    self.uiStats.set(f"Queue {_ui['Queue Depth']} (max {_ui['Max Depth']}), {_ui['Applied']} applied, {_ui['Replaced']} replaced, {_ui['Errors']} failed\n"
+      f"Latency P50 {_ui['Latency P50']:.1f} ms, P95 {_ui['Latency P95']:.1f} ms, max {_ui['Latency Max']:.1f} ms\n"
+      f"{_ui['Frames Over Budget']} of {_ui['Frames']} frames over budget")
+    self.__refreshJob = self.after(2000, self.refresh)
+
+  def __clear(self) -> None:
+    tracer.clear()
+    self.phaseTable.delete(*self.phaseTable.get_children())
+
+  def __export(self, title: str, default: str, function) -> None:
+    _outpath = filesavebox(title=title, default=os.path.join(os.path.expanduser('~/'), default), filetypes=['*.json', 'JSON Files'])
+    if _outpath != None:
+      if not _outpath.endswith('.json'):
+        _outpath += ".json"
+      try:
+        function(_outpath)
+      except OSError:
+        messagebox.showerror(title, "There was an issue writing the file.")
+
+  def exportJson(self) -> None:
+    self.__export("Export Search Timings", "Search Timings.json", tracer.exportJson)
+
+  def exportChromeTrace(self) -> None:
+    self.__export("Export Chrome Trace", "Search Trace.json", tracer.exportChromeTrace)
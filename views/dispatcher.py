@@ -0,0 +1,113 @@
+import threading
+import time
+import tkinter as tk
+from collections import deque, namedtuple
+
+from . import config as cfg
+
+Update = namedtuple("Update", ["function", "args", "key", "posted"])
+Update.__doc__ = "A change to the window posted by a worker: `function(*args)`, run on the Tk thread. Updates with the same `key` replace each other."
+
+class UIDispatcher:
+  """
+  A class for background threads to update the window without touching Tk themselves.
+
+  Workers `post` updates to a queue. Once a frame, the Tk thread applies them in order until the queue is empty or the frame's time budget is spent, leaving the rest for the next frame. Updates with a key (a status line, a progress label) replace older ones with that key that have not been applied yet, so a busy worker costs one update per frame.
+
+  Attributes
+  ----------
+  root : tk.Tk
+  interval : int
+      Milliseconds between frames.
+  budget : float
+      Milliseconds a frame may spend applying updates.
+
+  Methods
+  -------
+  post(function, *args, key=None)
+      Queues `function(*args)` to run on the Tk thread. Safe from any thread.
+  setVar(variable, value)
+      Queues setting a Tk variable, keeping only the newest value.
+  isMainThread
+      Checks if the caller is the Tk thread.
+  run
+      Starts applying updates every frame.
+  metrics
+      Returns queue depth, apply latency and frame statistics.
+  """
+  def __init__(self, root: tk.Tk, interval: int=cfg.UI_FRAME_MS, budget: float=cfg.UI_FRAME_BUDGET_MS) -> None:
+    self.root = root
+    self.interval = interval
+    self.budget = budget
+    self.__thread = threading.get_ident()
+    self.__queue = deque()
+    self.__latest = {} # Key : newest Update with it
+    self.__lock = threading.Lock()
+    self.__latencies = deque(maxlen=1000) # Milliseconds from post to applied
+    self.__counts = {"Posted": 0, "Applied": 0, "Replaced": 0, "Errors": 0, "Frames": 0, "Frames Over Budget": 0, "Max Depth": 0}
+
+  def isMainThread(self) -> bool:
+    return threading.get_ident() == self.__thread
+
+  def post(self, function, *args, key=None) -> None:
+    """
+    Parameters
+    ----------
+    function : function
+        Runs on the Tk thread with `args`.
+    key : hashable, optional
+        Drops an update with the same key that has not been applied yet, by default None
+    """
+    update = Update(function, args, key, time.perf_counter())
+    with self.__lock:
+      if key != None:
+        if key in self.__latest: self.__counts["Replaced"] += 1
+        self.__latest[key] = update
+      self.__queue.append(update)
+      self.__counts["Posted"] += 1
+      self.__counts["Max Depth"] = max(self.__counts["Max Depth"], len(self.__queue))
+
+  def setVar(self, variable: tk.Variable, value) -> None:
+    self.post(variable.set, value, key=("Variable", str(variable)))
+
+  def run(self) -> None:
+    self.root.after(self.interval, self.__frame)
+
+  def __frame(self) -> None:
+    _start = time.perf_counter()
+    _end = _start + self.budget / 1000
+    while True:
+      with self.__lock:
+        if not self.__queue: break
+        update = self.__queue.popleft()
+        if update.key != None:
+          if self.__latest.get(update.key) is not update: continue # Replaced by a newer one further back
+          del self.__latest[update.key]
+      try:
+        update.function(*update.args)
+      except Exception as e:
+        self.__counts["Errors"] += 1
+        print(f"UI update {getattr(update.function, '__qualname__', update.function)} failed: {e}")
+      _now = time.perf_counter()
+      self.__latencies.append((_now - update.posted) * 1000)
+      self.__counts["Applied"] += 1
+      if _now >= _end:
+        if self.__queue: self.__counts["Frames Over Budget"] += 1
+        break
+    self.__counts["Frames"] += 1
+    try: self.root.after(self.interval, self.__frame)
+    except tk.TclError: pass # Window closed
+
+  def metrics(self) -> dict:
+    """
+    Returns
+    -------
+    dict
+        {"Queue Depth", "Max Depth", "Posted", "Applied", "Replaced", "Errors", "Frames", "Frames Over Budget", "Latency P50", "Latency P95", "Latency Max"}, latencies in milliseconds over the last 1000 updates.
+    """
+    with self.__lock:
+      _metrics = dict(self.__counts, **{"Queue Depth": len(self.__queue)})
+      _latencies = sorted(self.__latencies)
+    for name, q in [("Latency P50", 0.5), ("Latency P95", 0.95), ("Latency Max", 1.)]:
+      _metrics[name] = _latencies[min(int(q * len(_latencies)), len(_latencies)-1)] if _latencies else 0.
+    return _metrics
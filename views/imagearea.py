@@ -4,6 +4,7 @@ from threading import Lock
 import webbrowser
 from urllib.parse import quote
 
+from searcher.image_cache import ImageCache, ImagePrefetcher
 from searcher.image_searcher import ImageSearch
 from . import config as cfg
 
@@ -18,9 +19,13 @@ class ImageArea(tk.Frame):
   Attributes
   ----------
   imageCatcher : ImageSearch
-      Creates a driver for the purpose of finding images.
+      Finds images through the providers in `cfg.IMAGE_PROVIDERS`.
+  imageCache : ImageCache
+      City photos already found, kept between sessions.
   imageDriverLock : threading.Lock
-      Used to stop two requests from getting to the WebDriver at the same time.
+      Used to stop two requests from getting to the image provider at the same time, the Selenium one cannot share its WebDriver.
+  prefetcher : ImagePrefetcher
+      Finds photos of cities the user is likely to pick next while the image provider is idle.
   leftImage : tk.Label
       Origin city picture.
   rightImage : tk.Label
@@ -28,14 +33,20 @@ class ImageArea(tk.Frame):
   
   Methods
   -------
+  refresh(city, side, isSwap=False)
+      Shows the photo of a newly selected city, found in the background.
   doRefresh(city, side, isSwap=False)
       Refreshes the images in the window with new cities.
   updateImage(side)
       Refreshes the selected image Label.
+  prefetch(cities, first=False)
+      Caches photos of cities in the background.
+  prefetchSegments(trains)
+      Caches photos of every city on a list of trains.
   """
   def __init__(self, parent: tk.Tk, *args, **kwargs) -> None:
     """
-    One time initialization of an Image Searcher, should be persistent throughout app usage due to cost of launching webdriver.
+    One time initialization of an Image Searcher, should be persistent throughout app usage in case it falls back to a webdriver.
 
     Parameters
     ----------
@@ -44,8 +55,11 @@ class ImageArea(tk.Frame):
     """
     tk.Frame.__init__(self, parent, *args, **kwargs)
     self.parent = parent
-    self.imageCatcher = ImageSearch()
+    self.imageCache = ImageCache()
+    self.imageCatcher = ImageSearch(self.imageCache)
     self.imageDriverLock = Lock()
+    self.__requested = {} # Side : city last selected, photos found for other cities are dropped
+    self.prefetcher = ImagePrefetcher(self.imageCatcher, self.imageDriverLock, cfg.IMAGE_DIMENSIONS)
 
     self.leftImage = tk.Label(self, image=self.imageCatcher.getCityPhoto(1), width=cfg.IMAGE_DIMENSIONS[0], height=cfg.IMAGE_DIMENSIONS[1], cursor='hand1')
     self.leftImage.grid(row=0, column=0, padx=4, pady=4)
@@ -66,9 +80,14 @@ class ImageArea(tk.Frame):
     myCityUrlSuffix = quote((myCity + " tourism official"))
     webbrowser.open(baseUrl + myCityUrlSuffix) # "I'm Feeling Lucky" result
 
+  def refresh(self, city: str, side: int, isSwap: bool=False) -> None:
+    """Selects a city for a side, on the Tk thread so selections keep their order, and finds its photo in a background thread. See `doRefresh`."""
+    self.__requested[side] = city
+    self.parent.startThread(self.doRefresh, [city, side, isSwap])
+
   def doRefresh(self, city: str, side: int, isSwap: bool=False) -> None:
     """
-    Refreshes the ImageArea labels with new cities.
+    Refreshes the ImageArea labels with new cities. Runs in a background thread: the photo is found here, the labels are changed through the window's UI dispatcher.
 
     Parameters
     ----------
@@ -78,25 +97,23 @@ class ImageArea(tk.Frame):
         Accepts 1 (left/origin) or 2 (right/destination).
     isSwap : bool, optional
         True if the images are only being swapped, by default False
-    
-    Raises
-    ------
-    AttributeError
-        Lock failed, somehow.
     """
-    if isSwap == False:
-      if city != self.imageCatcher.getCityName(side): # Do not update anything if the same city is selected
-        self.imageCatcher.setCityPhoto(side, None) # Remove the photo to indicate something is happening
-        self.updateImage(side)
-        try:
-          with self.imageDriverLock:
-            self.imageCatcher.loadImage(city, side, cfg.IMAGE_DIMENSIONS) # Find a new image
-        except AttributeError:
-          self.imageCatcher.loadImage(city, side, cfg.IMAGE_DIMENSIONS)
-        self.updateImage(side)
-    elif isSwap == True: # Do not call search functions
-      self.updateImage(side)
-    self.update_idletasks()
+    if isSwap == True: # Do not call search functions
+      self.parent.ui.post(self.updateImage, side, key=("Photo", side))
+      return
+    if city == self.imageCatcher.getCityName(side): return # Do not update anything if the same city is selected
+
+    data = self.imageCache.get(city, cfg.IMAGE_DIMENSIONS) # Cached photos skip the provider
+    if data == None:
+      self.parent.ui.post(self.__showPhoto, city, side, None, key=("Photo", side)) # Remove the photo to indicate something is happening
+      with self.imageDriverLock:
+        data = self.imageCatcher.cacheImage(city, cfg.IMAGE_DIMENSIONS) # Find a new image
+    self.parent.ui.post(self.__showPhoto, city, side, data, key=("Photo", side))
+
+  def __showPhoto(self, city: str, side: int, data: bytes) -> None:
+    if self.__requested.get(side, city) != city: return # Another city was selected while this photo was found
+    self.imageCatcher.showImage(city, side, data)
+    self.updateImage(side)
 
   def updateImage(self, side: int) -> None:
     """
@@ -110,4 +127,32 @@ class ImageArea(tk.Frame):
     if side == 1:
       self.leftImage.configure(image=self.imageCatcher.getCityPhoto(side))
     elif side == 2:
-      self.rightImage.configure(image=self.imageCatcher.getCityPhoto(side))
\ No newline at end of file
+      self.rightImage.configure(image=self.imageCatcher.getCityPhoto(side))
+
+  def prefetch(self, cities: list[str], first: bool=False) -> None:
+    """
+    Caches photos of cities in the background, so selecting them later does not need the provider.
+
+    Parameters
+    ----------
+    cities : list[str]
+        'City, State' strings.
+    first : bool, optional
+        Fetch these before cities queued earlier, by default False
+    """
+    self.prefetcher.want(cities, first)
+
+  def prefetchSegments(self, trains: list) -> None:
+    """
+    Caches photos of every city a list of trains stops at, before any other prefetches.
+
+    Parameters
+    ----------
+    trains : list[Train]
+    """
+    _cities = []
+    for train in trains:
+      for code in train.citySegments:
+        try: _cities.append(self.parent.stationsArea.stations.returnCityStateByCode(code))
+        except (AttributeError, KeyError): pass # Unknown station, or stations not loaded yet
+    self.prefetch(_cities, first=True)
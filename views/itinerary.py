@@ -4,7 +4,6 @@ import easygui
 
 import os
 from copy import deepcopy
-from time import sleep
 import webbrowser
 
 from views.columnsettings import ColumnSettings
@@ -44,6 +43,8 @@ class Itinerary(tk.Toplevel):
   openResultsButton : ttk.Button
       Loads this segment's search results into the train results area.
   mapButton : ttk.Button
+  checkLabel : tk.Label
+      Problems found with the plan, or with the selected segment.
   trainMenu : TrainMenu
       Right-click context menu.
   
@@ -90,6 +91,9 @@ class Itinerary(tk.Toplevel):
     self.userSegments.configure(yscrollcommand=self.tvScroll.set, xscrollcommand=self.tvScrollHoriz.set)
     #self.__populateTreeview(self.parent.us.userSelections.getSegments())
     self.userSegments.bind("<Button-1>", lambda e: self.__buttonStateChanges(True))
+    self.userSegments.bind("<<TreeviewSelect>>", lambda e: self.__showIssues())
+    self.userSegments.tag_configure("Error", background="#f6d5d5")
+    self.userSegments.tag_configure("Warning", background="#fbf0c8")
     if os.name == 'nt': self.userSegments.bind("<Button-3>", self.__trainContextMenu)
     elif os.name == 'posix': self.userSegments.bind("<Button-2>", self.__trainContextMenu)
 
@@ -100,6 +104,7 @@ class Itinerary(tk.Toplevel):
     self.exportButton = ttk.Button(self.buttonsArea, text="Export Itinerary", command=self.doExport)
     self.openResultsButton = ttk.Button(self.buttonsArea, text="Search Results", command=self.__openResults)
     self.mapButton = ttk.Button(self.buttonsArea, text="Journey Map", command=self._callJourneyMap)
+    self.checkLabel = tk.Label(self, text="", background=BACKGROUND, anchor=tk.W, justify=tk.LEFT, wraplength=760)
     self.__exportButtonCheck()
     self.__buttonStateChanges()
 
@@ -117,6 +122,7 @@ class Itinerary(tk.Toplevel):
     self.moveDownButton.pack(side=tk.LEFT, fill=tk.X, anchor=tk.CENTER, padx=4)
 
     self.buttonsArea.pack(side=tk.BOTTOM, expand=False, padx=8, pady=4)
+    self.checkLabel.pack(side=tk.BOTTOM, fill=tk.X, padx=8)
 
     self.trainMenu = TrainMenu(self, self.userSegments, self.inViewSavedSegments)
     
@@ -238,6 +244,8 @@ class Itinerary(tk.Toplevel):
     self.__clearTree()
     self.inViewSavedSegments = self.parent.us.userSelections.getSegments()
     self.__populateTreeview(self.inViewSavedSegments)
+    self.parent.imageArea.prefetchSegments(self.inViewSavedSegments.values())
+    self.__showIssues()
     self.__exportButtonCheck()
     self.__buttonStateChanges()
     self.parent.isSaved = False
@@ -254,12 +262,11 @@ class Itinerary(tk.Toplevel):
       self.mapButton.configure(state='disabled')
 
   def __buttonStateChanges(self, enabled: bool=False) -> None:
-    """Enables or disables every button besides Export. For example, the topmost item cannot Move Up."""
+    """Enables or disables every button besides Export. For example, the topmost item cannot Move Up. Enabling waits a moment on the Tk event loop for the selection to settle."""
     def doChanges():
       selectionBasedButtons = [self.deleteButton, self.moveDownButton, self.moveUpButton, self.openResultsButton, self.trainInfoButton]
 
       if enabled:
-        sleep(0.05)
         mySelection = self.getSelection()
         idx = self.userSegments.index(self.userSegments.selection()[0])
         for widget in selectionBasedButtons:
@@ -273,9 +280,9 @@ class Itinerary(tk.Toplevel):
       else:
         for widget in selectionBasedButtons:
           widget.configure(state='disabled')
-      self.update_idletasks()
     
-    self.parent.startThread(doChanges)
+    if enabled: self.after(50, doChanges)
+    else: doChanges()
     
   def __makeHeadings(self) -> None:
     for index, col in enumerate(self.headerCols):
@@ -331,7 +338,22 @@ class Itinerary(tk.Toplevel):
     """
     getCols = deepcopy(self.columns)
     getCols.remove("Leg")
+    validator = self.parent.us.userSelections.getValidator()
     for train in trains: # Every element of returned train dict
       vals = [train]
       vals.extend(trains[train].returnSelectedElements(getCols)) # Need different date vals
-      self.userSegments.insert('', tk.END, text=train, values=vals)
\ No newline at end of file
+      issues = validator.issuesFor(trains[train])
+      self.userSegments.insert('', tk.END, text=train, values=vals, tags=(issues[0]["Severity"],) if issues else ())
+
+  def __showIssues(self) -> None:
+    """Shows the problems with the selected segment, or a count for the whole plan."""
+    validator = self.parent.us.userSelections.getValidator()
+    selection = self.userSegments.selection()
+    if selection != ():
+      issues = validator.issuesFor(self.inViewSavedSegments[self.userSegments.item(selection[0], "text")])
+      text = '\n'.join(f"{i['Severity']}: {i['Message']}" for i in issues)
+    else:
+      _severities = [i["Severity"] for i in validator.issues.values()]
+      _errors, _warnings = _severities.count("Error"), _severities.count("Warning")
+      text = f"{_errors} error{'s' if _errors != 1 else ''}, {_warnings} warning{'s' if _warnings != 1 else ''}. Select a leg for details." if _severities else ''
+    self.checkLabel.configure(text=text)
\ No newline at end of file
@@ -1,14 +1,17 @@
 import tkinter as tk
-import railmapview as mapview
 
 import os
 from copy import deepcopy
 
+from lazyimport import lazy
+
 from traintracks.route import RouteCollection
-from views.config import ICON
+from views.config import ICON, DEV_MODE
 from views.details import DetailWindow
 from traintracks.maputils import getCoords, amtrakAddressRequest
 
+mapview = lazy("railmapview") # Imported when the map is first opened
+
 class Map(tk.Toplevel):
   """
   A class responsible for making a Map window.
@@ -27,8 +30,8 @@ class Map(tk.Toplevel):
       Currently displayed route on the map.
   currentStops : list[str]
       Currently displayed stops on the map.
-  subsidiaryStopMarkers : list[CanvasPositionMarker]
-      Intermediate stops.
+  subsidiaryStopMarkers : list[CanvasPositionMarker, CanvasMarkerCluster]
+      Intermediate stops. Stops that are not origin/destination are grouped into one cluster per route, which merges nearby stops depending on the zoom.
   subsidiaryPaths : list[CanvasPath]
       Rail paths.
   importantStopMarkers : list[CanvasPositionMarker]
@@ -63,9 +66,9 @@ class Map(tk.Toplevel):
     self.map = mapview.TkinterMapView(self, width=700, height=500)
 
     self.map.pack(fill=tk.BOTH, expand=True)
-    self.updateOrigin()
-    self.updateDestination()
+    if DEV_MODE: self.map.add_right_click_menu_command(label="Toggle Frame Timing", command=self.map.toggle_frame_stats)
     self.map.set_zoom(4)
+    self.parent.startThread(self.updateMarker, [0]) # Finding the stations needs the network, keep the window responsive
 
     self.wm_protocol("WM_DELETE_WINDOW", self.__onClose)
 
@@ -79,27 +82,29 @@ class Map(tk.Toplevel):
     self.parent.closeMap()
     self.destroy()
 
-  def updateOrigin(self) -> None:
-    name = self.parent.us.getOrigin()
+  def __findStation(self, side: int) -> tuple:
+    """Name and coordinates of the selected origin (1) or destination (2). Looks up the address, so it can be slow."""
+    name = self.parent.us.getOrigin() if side == 1 else self.parent.us.getDestination()
     _code = self.parent.stationsArea.stations.getStationCode(name)
-    coords = getCoords(_code)
+    return name, getCoords(_code)
+
+  def __setMarker(self, side: int, name: str, coords: list[float]) -> None:
+    """Moves the origin (1) or destination (2) marker. Runs on the Tk thread."""
+    _attribute = "originMarker" if side == 1 else "destinationMarker"
     if coords != None:
-      try: self.originMarker.delete()
+      try: getattr(self, _attribute).delete()
       except AttributeError as e: print(e) # Object does not exist yet
-      self.originMarker = self.map.set_marker(coords[0], coords[1], text=name, command=lambda e: self.parent.startThread(DetailWindow, [self.parent, self.parent.stationsArea.stations.returnStationData(name)]))
+      setattr(self, _attribute, self.map.set_marker(coords[0], coords[1], text=name, command=lambda e: self.__openDetails(name)))
     self.__updatePath()
-    self.update()
+
+  def __openDetails(self, name: str) -> None:
+    self.parent.ui.post(DetailWindow, self.parent, self.parent.stationsArea.stations.returnStationData(name))
+
+  def updateOrigin(self) -> None:
+    self.__setMarker(1, *self.__findStation(1))
   
   def updateDestination(self) -> None:
-    name = self.parent.us.getDestination()
-    _code = self.parent.stationsArea.stations.getStationCode(name)
-    coords = getCoords(_code)
-    if coords != None:
-      try: self.destinationMarker.delete()
-      except AttributeError as e: print(e) # Object does not exist yet
-      self.destinationMarker = self.map.set_marker(coords[0], coords[1], text=name, command=lambda e: self.parent.startThread(DetailWindow, [self.parent, self.parent.stationsArea.stations.returnStationData(name)]))
-    self.__updatePath()
-    self.update()
+    self.__setMarker(2, *self.__findStation(2))
 
   def __updatePath(self) -> None:
     """Draws a path between the origin and destination markers."""
@@ -132,24 +137,20 @@ class Map(tk.Toplevel):
 
   def updateMarker(self, side: int) -> None:
     """
-    General update function for origin/destination markers.
+    General update function for origin/destination markers. Runs in a background thread: the coordinates are looked up here, the markers are moved through the window's UI dispatcher.
 
     Parameters
     ----------
     side : int
-        1 for origin, 2 for destination.
+        1 for origin, 2 for destination, 0 for both.
     """
-    if self.subsidiaryPaths != []:
-      self.updateOrigin()
-      self.updateDestination()
-    elif side == 1:
-      self.updateOrigin()
-    elif side == 2:
-      self.updateDestination()
+    _sides = [1, 2] if side == 0 or self.subsidiaryPaths != [] else [side]
+    for s in _sides:
+      self.parent.ui.post(self.__setMarker, s, *self.__findStation(s), key=("Marker", s))
   
   def _clickHelper(self, widget) -> None:
     name = self.parent.stationsArea.stations.returnKeyByCode(widget.data)
-    self.parent.startThread(DetailWindow, [self.parent, self.parent.stationsArea.stations.returnStationData(name)])
+    self.__openDetails(name)
 
   def drawTrainRoute(self, name, stops: list) -> None:
     """
@@ -188,18 +189,14 @@ class Map(tk.Toplevel):
 
       self.__rapidDelete(self.subsidiaryStopMarkers)
       self.importantStopMarkers.clear()
+      _intermediatePositions, _intermediateNames = [[], []]
       for item in _curr.stops:
         _this = _curr.stops[item]
 
         # Intermediate stops
         if item not in stops and areStopsShown:
-          self.subsidiaryStopMarkers.append(self.map.set_marker(
-            _this["Lat"],
-            _this["Long"],
-            text=item,
-            marker_color_outside='',
-            marker_color_circle='orange',
-            font='Tahoma 12 bold'))
+          _intermediatePositions.append((_this["Lat"], _this["Long"]))
+          _intermediateNames.append(item)
 
         # Origin/destination stops
         elif item in stops:
@@ -218,6 +215,14 @@ class Map(tk.Toplevel):
           self.subsidiaryStopMarkers.append(_newImportantMarker)
           self.importantStopMarkers.append(_newImportantMarker)
 
+      if _intermediatePositions != []:
+        self.subsidiaryStopMarkers.append(self.map.set_marker_cluster(
+          _intermediatePositions,
+          _intermediateNames,
+          marker_color_outside='',
+          marker_color_circle='orange',
+          font='Tahoma 12 bold'))
+
       # Any stations not in the route's stop list
       for item in stops:
         if item not in _curr.stops:
@@ -3,10 +3,9 @@ from tkinter import messagebox, ttk
 
 import webbrowser
 import json
-from urllib.parse import quote
-from copy import deepcopy
-from time import sleep
 
+from traintracks.timetable import formatMinutes
+from traintracks.traincodes import loadIndex, timetableUrl
 from views.columnsettings import ColumnSettings
 from views.details import DetailWindow
 from . import config as cfg
@@ -28,6 +27,8 @@ class MenuOptions(tk.Menu):
   viewmenu : Menu
   otpmenu : Menu
       On-time performance, within View menu.
+  trainIndex : TrainIndex
+      Bundled train numbers and names, see `traintracks.traincodes`.
 
   Methods
   -------
@@ -39,7 +40,9 @@ class MenuOptions(tk.Menu):
   def __init__(self, parent, *args, **kwargs):
     tk.Menu.__init__(self, parent)
     self.parent = parent
+    self.trainIndex = None
     self.timetableUrls = {}
+    self.timetablesMenu = None
 
     self.helpmenu = tk.Menu(self, tearoff=0)
     self.helpmenu.add_command(label="About", command=lambda: self.openBox(f"Amtrak Rail Pass Assistant\nv{cfg.APP_VERSION}\nCopyright 2022 Nick Alvarez\n\nRoute map data provided by Transitland."))
@@ -69,6 +72,7 @@ class MenuOptions(tk.Menu):
     self.viewmenu = tk.Menu(self, tearoff=0)
     self.viewmenu.add_command(label="Itinerary", command=lambda: self.parent.openItinerary())
     self.viewmenu.add_command(label="Map Window", command=self.parent.openMap)
+    self.viewmenu.add_command(label="Search Diagnostics", command=self.parent.openDevTools)
     self.viewmenu.add_command(label="Amtrak System Map", command=lambda: self.openLink("https://www.amtrak.com/content/dam/projects/dotcom/english/public/documents/Maps/Amtrak-System-Map-1018.pdf"))
     
     self.otpmenu = tk.Menu(self, tearoff=0)
@@ -114,40 +118,36 @@ class MenuOptions(tk.Menu):
     """
     messagebox.showinfo(cfg.APP_NAME, message=m)
   
-  def _loadTimetables(self) -> None:
-    # Get some data from session storage
-    # For each of the datas, create a menu item
-    traincodes = None
-    while(traincodes == None):
-      try:
-        traincodes = json.loads(self.parent.searcher._getSessionStorage('traincodes', True))
-      except TypeError as e:
-        print("Tried to load train codes", e)
-        sleep(5)
+  def _loadTimetables(self) -> dict:
+    """Makes a timetable link for every train in the bundled index. Does not touch widgets, so it can run off the Tk thread before `_createTimetableMenu`."""
+    self.trainIndex = loadIndex()
+    self.timetableUrls = self.trainIndex.timetables()
+    return self.timetableUrls
 
-    trainnames = list(traincodes.values())
-    trainnames_unique = []
-    [trainnames_unique.append(x) for x in trainnames if x not in trainnames_unique]
+  def _refreshTimetables(self) -> bool:
+    """
+    Compares the index with the search page's train codes, saving a new index if they changed. Runs off the Tk thread, after `_loadTimetables`.
 
-    trainnames_unique_excludes = []
-    excludes = ['Connecting Bus', 'Acela Nonstop', 'Self Transfer', 'Coast Starlight Bus', 'ACE Commuter Train', 'Winter Park Express Shuttle', 'Connecting Van', 'Seastreak Ferry', 'Victoria Clipper Ferry', 'Connecting Taxi', 'NJ Transit Train', 'Grand Canyon Railway', 'Lincoln Service Missouri River Runner']
-    [trainnames_unique_excludes.append(y) for y in trainnames_unique if y not in excludes]
+    Returns
+    -------
+    bool
+        True if the timetables changed and the menu should be rebuilt.
+    """
+    _codes = self.parent.searcher._getSessionStorage('traincodes', True)
+    if _codes == None:
+      print("Train codes did not show up on the search page, keeping the bundled timetables.")
+      return False
+    if not self.trainIndex.refresh(json.loads(_codes)): return False
+    self.timetableUrls = self.trainIndex.timetables()
+    return True
 
-    for train in sorted(trainnames_unique_excludes):
-      baseUrl = "https://duckduckgo.com/?q=!ducky+"
-      trainSuffix = quote((train + " train timetable schedule Amtrak filetype:pdf"))
-      thisUrl = baseUrl + trainSuffix
-      self.timetableUrls[train] = deepcopy(thisUrl)
-    
-    self._createTimetableMenu()
-      
   def _createTimetableMenu(self) -> None:
-    timetablesMenu = tk.Menu(self, tearoff=0)
+    if self.timetablesMenu == None:
+      self.timetablesMenu = tk.Menu(self, tearoff=0)
+      self.viewmenu.add_cascade(label="Timetables", menu=self.timetablesMenu)
+    else: self.timetablesMenu.delete(0, "end")
     for train in self.timetableUrls:
-      timetablesMenu.add_command(label=train, command=lambda url=self.timetableUrls[train]: self.openLink((url)))
-    self.viewmenu.add_cascade(label="Timetables", menu=timetablesMenu)
-    self.update()
-    self.parent.update()
+      self.timetablesMenu.add_command(label=train, command=lambda url=self.timetableUrls[train]: self.openLink((url)))
 
 class TrainMenu(tk.Menu):
   """
@@ -166,6 +166,8 @@ class TrainMenu(tk.Menu):
   Methods
   -------
   openTimetable
+  openStopTimes
+      Shows the stop times of the selected result's trains seen in earlier searches.
   openTrainLink
   openDetailView
   openResults
@@ -202,6 +204,7 @@ class TrainMenu(tk.Menu):
     if save == None: self.add_command(label="Search Results", command=self.openResults)
     self.add_command(label="Online Info", command=self.openTrainLink)
     self.add_command(label="Timetable", command=self.openTimetable)
+    self.add_command(label="Stop Times", command=self.openStopTimes)
   
   def openTimetable(self) -> None:
     """Opens a timetable(s) for the selected result."""
@@ -211,12 +214,29 @@ class TrainMenu(tk.Menu):
     segmentInfo = self.inview[item['text']].segmentInfo
     for segment in segmentInfo:
       if segmentInfo[segment]["Type"].upper() == "TRAIN":
-        baseUrl = "https://duckduckgo.com/?q=!ducky+"
-        trainSuffix = quote((segmentInfo[segment]["Name"] + " train timetable schedule Amtrak filetype:pdf"))
-        webbrowser.open((baseUrl + trainSuffix), new=1, autoraise=True)
+        webbrowser.open(timetableUrl(segmentInfo[segment]["Name"]), new=1, autoraise=True)
       elif trainName == 'NA':
         messagebox.showwarning(title=cfg.APP_NAME, message="Cannot view information about multiple segments.")
   
+  def openStopTimes(self) -> None:
+    """Lists the known stops of each train in the selected result, from the schedule store."""
+    schedules = self.parent.parent.schedules
+    if schedules == None:
+      messagebox.showinfo(title=cfg.APP_NAME, message="Schedules are still loading.")
+      return
+    item = self.tree.item(self.selectedIID)
+    _train = self.inview[item['text']]
+    _numbers = [s["Number"] for s in _train.segmentInfo.values() if s["Type"].upper() == "TRAIN"] if _train.segmentInfo else [_train.number]
+
+    _text = []
+    for number in _numbers:
+      _text.append(f"{schedules.names.get(str(number), _train.name)} {number}")
+      for stop in schedules.stops(number):
+        _text.append(f"  Day {stop.day+1}  {stop.station}  arr {formatMinutes(stop.arrive)}  dep {formatMinutes(stop.depart)}")
+      _unscheduled = schedules.unscheduled(number)
+      if _unscheduled: _text.append(f"  Not searched yet: {', '.join(_unscheduled)}")
+    messagebox.showinfo(title="Stop Times", message="\n".join(_text))
+
   def openTrainLink(self) -> None:
     """Opens Amtrak train site(s) for the selected result."""
     item = self.tree.item(self.selectedIID)
@@ -235,7 +255,7 @@ class TrainMenu(tk.Menu):
     item = self.tree.item(self.selectedIID)
     _train = self.inview[item['text']]
 
-    self.parent.parent.startThread(DetailWindow, [self.parent.parent, _train.organizationalUnit])
+    self.parent.parent.ui.post(DetailWindow, self.parent.parent, _train.organizationalUnit)
   
   def openResults(self) -> None:
     """Pulls up search results in the main window from this item's original search."""
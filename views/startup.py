@@ -0,0 +1,135 @@
+import time
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config as cfg
+from .dispatcher import UIDispatcher
+
+class Startup:
+  """
+  A class to run the application's initializers as soon as the ones they depend on have finished, and to record a timeline of when each one ran.
+
+  Initializers run on a small thread pool unless they touch widgets, in which case they run on the Tk thread. An initializer's `onDone` also runs on the Tk thread, given its result, so workers never touch widgets. Initializers that need it wait until after it. Tk is only ever used from the thread running `mainloop`: workers post their results through the window's `UIDispatcher`.
+
+  Attributes
+  ----------
+  root : tk.Tk
+  dispatcher : UIDispatcher
+  started : float
+      `time.perf_counter()` at process start, timeline times are seconds since then.
+  timeline : list[dict]
+      {"Component", "Start", "End", "Thread", "Error"}, in the order components finished.
+  results : dict
+      Component : value its initializer returned.
+
+  Methods
+  -------
+  add(name, function, requires=[], onDone=None, mainThread=False)
+      Registers an initializer.
+  mark(name, start=None)
+      Records something that ran outside the orchestrator.
+  run
+      Starts every initializer whose requirements are met. The rest follow as those finish.
+  isDone(name)
+      Checks if an initializer and its `onDone` have finished.
+  report
+      Returns the timeline as a table.
+  """
+  def __init__(self, root: tk.Tk, dispatcher: UIDispatcher, started: float=None, workers: int=cfg.STARTUP_WORKERS) -> None:
+    self.root = root
+    self.dispatcher = dispatcher
+    self.started = started if started != None else time.perf_counter()
+    self.timeline = []
+    self.results = {}
+    self.__tasks = {}
+    self.__pending = []
+    self.__done = set()
+    self.__failed = set()
+    self.__pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Startup")
+
+  def add(self, name: str, function, requires: list[str]=[], onDone=None, mainThread: bool=False) -> None:
+    """
+    Registers an initializer.
+
+    Parameters
+    ----------
+    name : str
+        Component name shown in the timeline.
+    function : function
+        Takes no arguments. Its return value goes to `onDone` and `results`.
+    requires : list[str], optional
+        Components that must finish first, by default none
+    onDone : function, optional
+        Called on the Tk thread with the result, by default None
+    mainThread : bool, optional
+        Run `function` on the Tk thread too, for initializers that build widgets, by default False
+    """
+    self.__tasks[name] = {"Function": function, "Requires": list(requires), "On Done": onDone, "Main Thread": mainThread}
+    self.__pending.append(name)
+
+  def mark(self, name: str, start: float=None) -> None:
+    """Records a component that ran outside the orchestrator, from `start` (or the previous mark) to now."""
+    _now = time.perf_counter()
+    if start == None: start = max([self.started] + [self.started + t["End"] for t in self.timeline])
+    self.timeline.append({"Component": name, "Start": start - self.started, "End": _now - self.started, "Thread": "main", "Error": None})
+
+  def isDone(self, name: str) -> bool:
+    return name in self.__done
+
+  def run(self) -> None:
+    self.__schedule()
+
+  def __schedule(self) -> None:
+    """Starts initializers whose requirements have finished. Skips those whose requirements failed."""
+    for name in list(self.__pending):
+      task = self.__tasks[name]
+      if any(r in self.__failed for r in task["Requires"]):
+        self.__pending.remove(name)
+        self.__failed.add(name)
+        self.timeline.append({"Component": name, "Start": None, "End": None, "Thread": None, "Error": "Skipped, a requirement failed"})
+      elif all(r in self.__done for r in task["Requires"]):
+        self.__pending.remove(name)
+        if task["Main Thread"]: self.root.after_idle(self.__execute, name, task)
+        else: self.__pool.submit(self.__execute, name, task)
+
+  def __execute(self, name: str, task: dict) -> None:
+    _start = time.perf_counter()
+    try:
+      _result, _error = task["Function"](), None
+    except Exception as e:
+      _result, _error = None, e
+    _record = {"Component": name, "Start": _start - self.started, "End": time.perf_counter() - self.started, "Thread": "main" if task["Main Thread"] else "worker", "Error": _error}
+    if task["Main Thread"]: self.__finish(name, task, _result, _record)
+    else: self.dispatcher.post(self.__finish, name, task, _result, _record)
+
+  def __finish(self, name: str, task: dict, result, record: dict) -> None:
+    """Runs on the Tk thread."""
+    if record["Error"] == None and task["On Done"] != None:
+      try:
+        task["On Done"](result)
+      except Exception as e:
+        record["Error"] = e
+      record["End"] = time.perf_counter() - self.started
+    if record["Error"] != None:
+      print(f"Startup: {name} failed: {record['Error']}")
+      self.__failed.add(name)
+    else:
+      self.results[name] = result
+      self.__done.add(name)
+    self.timeline.append(record)
+    self.__schedule()
+    if not self.__pending and len(self.__done | self.__failed) == len(self.__tasks):
+      self.__pool.shutdown(wait=False)
+      print(self.report())
+
+  def report(self) -> str:
+    """The timeline as text, one component per line with its start, end and duration in milliseconds."""
+    _lines = [f"{'Component':<22}{'Start':>8}{'End':>8}{'Took':>8}  Thread"]
+    for item in sorted(self.timeline, key=lambda t: (t["Start"] == None, t["Start"] or 0)):
+      if item["Start"] == None:
+        _lines.append(f"{item['Component']:<22}{'':>24}  {item['Error']}")
+        continue
+      _line = f"{item['Component']:<22}{item['Start']*1000:>8.0f}{item['End']*1000:>8.0f}{(item['End']-item['Start'])*1000:>8.0f}  {item['Thread']}"
+      if item["Error"] != None: _line += f"  failed: {item['Error']}"
+      _lines.append(_line)
+    return "\n".join(_lines)
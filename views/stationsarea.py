@@ -19,7 +19,7 @@ class StationsArea(tk.Frame):
   Attributes
   ----------
   stations : Stations
-      All Amtrak stations.
+      All Amtrak stations, `None` until `setStations` is called.
   stationKeys : list
       Display names for list elements.
   lengthOfList : int
@@ -28,6 +28,11 @@ class StationsArea(tk.Frame):
   origin : ttk.Combobox
   destination : ttk.Combobox
   swapButton : ttk.Button
+
+  Methods
+  -------
+  setStations(stations)
+      Fills the station lists once they have loaded.
   """
   def __init__(self, parent: tk.Tk, *args, **kwargs) -> None:
     """
@@ -40,9 +45,9 @@ class StationsArea(tk.Frame):
     """
     tk.Frame.__init__(self, parent, *args, **kwargs)
     self.parent = parent
-    self.stations = Stations()
-    self.stationKeys = self.stations.returnStationKeys()
-    self.lengthOfList = len(self.stations.returnStationKeys())
+    self.stations = None
+    self.stationKeys = []
+    self.lengthOfList = 0
     self.boxWidth = int(35/cfg.WIDTH_DIV)
     self.infoIcon = PhotoImage(file="information.png")
     self.infoIcon = self.infoIcon.zoom(2)
@@ -60,20 +65,46 @@ class StationsArea(tk.Frame):
 
     self.swapButton = ttk.Button(self, text="<- Swap ->", command=self.__swapStations)
     self.swapButton.grid(row=1, column=2, padx=12)
+    self.swapButton.configure(state='disabled')
 
-    self.parent.imageArea.doRefresh(self.stations.returnCityState(self.origin.get()), 1)
-    self.parent.imageArea.doRefresh(self.stations.returnCityState(self.destination.get()), 2)
     #if os.name == 'posix': self.parent.imageArea.doRefresh(self.stations.returnCityState(self.destination.get()), 2)
     #self.parent.startThread(self.parent.doRefresh, [self.stations.returnCityState(self.origin.get()), 1])
     #elif os.name == 'nt': self.parent.startThread(self.parent.imageArea.doRefresh, [self.stations.returnCityState(self.destination.get()), 2])
 
+  def setStations(self, stations: Stations) -> None:
+    """
+    Fills both station lists, picks a random station for each, and finds their photos. The lists show a placeholder until this is called.
+
+    Parameters
+    ----------
+    stations : Stations
+    """
+    self.stations = stations
+    self.stationKeys = self.stations.returnStationKeys()
+    self.lengthOfList = len(self.stationKeys)
+    for widget, side in [(self.origin, 1), (self.destination, 2)]:
+      widget.configure(values=self.stationKeys, state='normal')
+      widget.current(random.randint(0, self.lengthOfList-1))
+      self.parent.us.set(widget.get(), side)
+      self.parent.imageArea.refresh(self.stations.returnCityState(widget.get()), side)
+    self.swapButton.configure(state='normal')
+    self.parent.imageArea.prefetch(self.__popularCities())
+
+  def __popularCities(self) -> list[str]:
+    """'City, State' of the stations in `cfg.POPULAR_STATIONS` that are in the station list."""
+    _cities = []
+    for code in cfg.POPULAR_STATIONS:
+      try: _cities.append(self.stations.returnCityStateByCode(code))
+      except KeyError: pass
+    return _cities
+
   def __openDetailView(self, side: int):
     if side == 1: _key = self.origin.get()
     elif side == 2: _key = self.destination.get()
     else: _key = {}
 
-    if _key != {}:
-      self.parent.startThread(DetailWindow, [self.parent, self.stations.returnStationData(_key)])
+    if _key != {} and self.stations != None:
+      self.parent.ui.post(DetailWindow, self.parent, self.stations.returnStationData(_key))
 
   def __swapStations(self) -> None:
     """Swaps the origin and destination, both Combobox objects and ImageArea labels."""
@@ -107,7 +138,7 @@ class StationsArea(tk.Frame):
 
   def __createCombobox(self, side: int) -> ttk.Combobox:
     """
-    Creates a Combobox widget with all stations and a random initial selection.
+    Creates a Combobox widget, disabled with a placeholder until the stations load.
 
     Extended Summary
     ----------------
@@ -124,14 +155,14 @@ class StationsArea(tk.Frame):
         The newly created Combobox.
     """
     temp = ttk.Combobox(self, values=self.stationKeys, width=self.boxWidth, height=16, xscrollcommand=self.ignoreHorizontalScroll)
-    temp.current(random.randint(0, self.lengthOfList-1))
+    temp.set("Loading stations...")
+    temp.configure(state='disabled')
     temp.bind("<<ComboboxSelected>>", lambda e, widget=temp, side=side, isSwap=False: self.__selectionChangedCallback(widget, side, isSwap, e))
     temp.bind("<Shift-MouseWheel>", self.ignoreHorizontalScroll)
     temp.bind("<KeyRelease>", self.__autocomplete)
     temp.bind("<Return>", lambda e: temp.event_generate("<Down>"))
     temp.bind("<Tab>", lambda e: temp.event_generate("<Down>"))
     #temp.configure(xscrollcommand=self.ignoreHorizontalScroll)
-    self.parent.us.set(temp.get(), side)
     return temp
 
   def __selectionChangedCallback(self, widget: ttk.Combobox, side: int, isSwap: bool=False, e=None) -> None:
@@ -156,6 +187,6 @@ class StationsArea(tk.Frame):
     if widget.get() != '':
       self.parent.us.set((widget.get()), side)
       city = self.stations.returnCityState(widget.get())
-      self.parent.startThread(self.parent.imageArea.doRefresh, [city, side, isSwap])
-      self.parent.startThread(self.parent.mapWindow.updateMarker, [side])
+      self.parent.imageArea.refresh(city, side, isSwap)
+      if self.parent.mapWindow != None: self.parent.startThread(self.parent.mapWindow.updateMarker, [side])
     widget['values'] = self.stationKeys
\ No newline at end of file
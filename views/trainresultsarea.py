@@ -3,12 +3,13 @@ from tkinter import ttk, messagebox, PhotoImage
 from easygui import filesavebox
 
 from copy import deepcopy
-from datetime import datetime
-from math import trunc
 import webbrowser
 import os
+from time import perf_counter_ns
 from urllib.parse import quote
 
+from searcher.instrumentation import tracer
+from searcher.singleflight import SearchCancelled
 from . import config as cfg
 from views.details import DetailWindow
 from views.menuoptions import TrainMenu
@@ -73,6 +74,7 @@ class TrainResultsArea(tk.Frame):
     """
     tk.Frame.__init__(self, parent, *args, **kwargs)
     self.parent = parent
+    self.__searchFuture = None
     self.background = self.parent.resultsBackground
     self.config(background=self.background)
     self.resultsArea = tk.Frame(self)
@@ -188,6 +190,7 @@ class TrainResultsArea(tk.Frame):
       self.parent.isSaved = False
       self.parent.title(f"*{cfg.APP_NAME}")
       self.savedSegmentsIndices.append(segment["Index"])
+      self.parent.imageArea.prefetchSegments([segment["Train"]])
       self.parent.us.userSelections.updateSearch(self.parent.resultsHeadingArea.getSearchNum(), deepcopy(self.savedSegmentsIndices))
       try: self.parent.itineraryWindow.updateItinerary()
       except: pass
@@ -292,33 +295,50 @@ class TrainResultsArea(tk.Frame):
       self.parent.resultsHeadingArea.searchDate.set(prettyDate)
       self.update_idletasks()
       try:
-        # Starting search thread
-        self.parent.searcher.preSearchSetup(self.parent.stationsArea.stations.getStationCode(origin), self.parent.stationsArea.stations.getStationCode(dest), date, self.progressBar, self.parent.resultsHeadingArea.numberOfTrains)
-        self.parent.startThread(self.__doSearchCall, [cfg.DEV_MODE])
+        # Starting search thread, or joining the one already running for this journey
+        _query = (self.parent.stationsArea.stations.getStationCode(origin), self.parent.stationsArea.stations.getStationCode(dest), self.parent.us.getDate())
+        _future = self.parent.searcher.submitSearch(_query[0], _query[1], date, self.progressBar, self.parent.resultsHeadingArea.numberOfTrains, replay=cfg.DEV_MODE)
+        if _future is not self.__searchFuture:
+          self.__searchFuture = _future
+          _future.add_done_callback(lambda future: self.__searchDone(future, _query, (_query[0], _query[1], date), cfg.DEV_MODE))
       except Exception as e:
         print(e)
         messagebox.showerror(cfg.APP_NAME, message="Unable to search right now. The automated browser has not loaded. Try again in a few seconds.")
         self.__resetWidgets()
 
-  def __doSearchCall(self, dev: bool=False) -> None:
-    if dev == False: response = self.parent.searcher.oneWaySearch()
-    if dev == True:
-      oldWay = False
-      if oldWay == True:
-        response = dict()
-        import json
-        from traintracks.train import Train
-
-        # DEVELOPMENT
-        fileToUse = trunc(datetime.now().timestamp()) % 3
-        with open(f"_retrieved/TestTrainSearch{fileToUse}.json", "r") as f:
-          temp = json.loads(f.read())
-          for num in temp:
-            response[int(num)] = Train(temp[num])
-      else:
-        response = self.parent.searcher._test_search()
-    
-    self.__searchHandler(response)
+  def __searchDone(self, future, query: tuple, journey: tuple, replayed: bool) -> None:
+    """
+    Runs on the search thread. Results of a search that a newer one superseded are dropped. Live results are saved on their own thread, then all results are shown through the window's UI dispatcher.
+
+    Parameters
+    ----------
+    future : Future
+        From `AmtrakSearch.submitSearch`.
+    query : tuple
+        (origin code, destination code, date) the search was started with.
+    journey : tuple
+        (origin code, destination code, mm/dd/yyyy) the search was submitted with, finds its tracer id.
+    replayed : bool
+        The results are a saved search, not live fares.
+    """
+    if future is not self.__searchFuture: return
+    try:
+      response = future.result()
+    except SearchCancelled:
+      return
+    except Exception as e:
+      response = e
+    if type(response) == dict and not replayed: self.parent.startThread(self.__recordResults, [response, query])
+    self.parent.ui.post(self.__searchHandler, response, self.parent.searcher.traceIds.get(journey))
+
+  def __recordResults(self, response: dict, query: tuple) -> None:
+    """Adds the results to the saved schedules and the fare history, under the journey they were searched for."""
+    if self.parent.schedules != None:
+      self.parent.schedules.addTrains(response.values())
+      self.parent.schedules.saveLater()
+    if self.parent.fareHistory != None:
+      try: self.parent.fareHistory.record(*query, response.values())
+      except Exception as e: print(e)
 
   def refreshHandler(self, response: dict, saved: list) -> None:
     """
@@ -347,11 +367,11 @@ class TrainResultsArea(tk.Frame):
     self.exportResultsButton.configure(state=tk.DISABLED)
     self.update()
   
-  def __searchHandler(self, response: dict=None) -> None:
+  def __searchHandler(self, response: dict=None, traceId: int=None) -> None:
     if type(response) == dict: # Trains returned
       self.inViewSegmentResults = deepcopy(response)
       self.parent.us.userSelections.addSearch(self.parent.us.getOrigin(), self.parent.us.getDestination(), self.parent.us.getDate(), deepcopy(response))
-      self.__populateTreeview(response)
+      self.__populateTreeview(response, traceId)
       self.parent.isSaved = False
       self.parent.title(f"*{cfg.APP_NAME}")
       self.parent.resultsHeadingArea.changeSearchView(-1)
@@ -359,7 +379,7 @@ class TrainResultsArea(tk.Frame):
       messagebox.showerror(cfg.APP_NAME, message=response)
     self.__resetWidgets()
 
-  def __populateTreeview(self, _trains: dict) -> None:
+  def __populateTreeview(self, _trains: dict, traceId: int=None) -> None:
     """
     Populates the Treeview object with a list of trains.
 
@@ -367,8 +387,11 @@ class TrainResultsArea(tk.Frame):
     ----------
     trains : dict
         A dict containing search element (key) and Train object.
+    traceId : int, optional
+        Tracer id of the search the trains came from, by default the insert is not part of a search.
     """
     #trains = sorted(_trains) # This sorts IDs not the Trains
+    _start = perf_counter_ns()
     for train in _trains: # Every element of returned train dict
       num = train+1 # Dict starts at zero
       vals = _trains[train].returnSelectedElements(self.columns)
@@ -386,4 +409,5 @@ class TrainResultsArea(tk.Frame):
         self.parent.resultsHeadingArea.numberOfTrains.set(f"{num} train found")
       else:
         self.parent.resultsHeadingArea.numberOfTrains.set(f"{num} trains found")
+    tracer.record("Treeview insert", _start, perf_counter_ns(), traceId)
     self.__resetWidgets()
\ No newline at end of file